@@ -0,0 +1,322 @@
+"""
+KzBuilder — AS2 Bytecode Budget
+Pre-compile size estimate for generated AS2 classes.
+
+MTASC rejects classes over 32KB of bytecode (see docs/as2-reference.md),
+and the failure only shows up at the end of a build. This module walks the
+generated source token by token and charges each token roughly what MTASC
+emits for it, so a generator can see which of its sections dominate and
+switch to a more compact encoding before compiling.
+
+The numbers are estimates, not a disassembly: they are tuned to err on the
+large side so a warning fires before MTASC does.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+# MTASC per-class bytecode limit
+CLASS_LIMIT = 32 * 1024
+
+# Warn once the estimate passes this share of the limit (docs: "split if
+# approaching 28KB")
+WARN_RATIO = 0.85
+
+# Approximate bytes emitted per token kind (AVM1, SWF 8)
+PUSH_CONST = 3      # constant-pool reference inside a merged ActionPush
+PUSH_INT = 5        # int32 literal
+PUSH_DOUBLE = 9     # non-integer literal
+PUSH_SMALL = 2      # true / false / this (register)
+PUSH_NULL = 1
+OPCODE = 1          # get/set variable/member, arithmetic, compare, call
+BRANCH = 5          # ActionIf / ActionJump
+FUNCTION = 24       # DefineFunction2 header and register table
+
+# Keywords with a fixed cost (everything not listed here that is an
+# identifier is charged as a constant-pool push plus a get/set)
+KEYWORD_COSTS = {
+    'if': BRANCH * 2, 'while': BRANCH * 2, 'for': BRANCH * 2, 'else': BRANCH,
+    'do': BRANCH, 'switch': BRANCH, 'case': BRANCH * 2, 'break': BRANCH,
+    'continue': BRANCH, 'function': FUNCTION, 'return': OPCODE, 'new': OPCODE,
+    'delete': OPCODE, 'typeof': OPCODE, 'instanceof': OPCODE,
+    'true': PUSH_SMALL, 'false': PUSH_SMALL, 'this': PUSH_SMALL,
+    'null': PUSH_NULL, 'undefined': PUSH_NULL,
+    'var': 0, 'class': 0, 'extends': 0, 'implements': 0, 'import': 0,
+    'private': 0, 'public': 0, 'static': 0, 'dynamic': 0, 'intrinsic': 0,
+}
+
+# Punctuation that compiles to nothing on its own
+FREE_PUNCTUATION = {'{', '}', '(', ')', ';', ',', ':', '?'}
+
+# Tokens after which an identifier is a type annotation (erased by MTASC)
+_TYPE_FOLLOWERS = {';', ',', ')', '=', '{'}
+
+# One token per match; whitespace is skipped by findall(). Line comments
+# are matched (and later ignored) so their contents are never tokenized.
+_TOKEN_RE = re.compile(r'''
+    //[^\n]*
+  | "(?:\\.|[^"\\])*" | '(?:\\.|[^'\\])*'
+  | 0[xX][0-9a-fA-F]+ | \d+\.\d* | \.\d+ | \d+
+  | [A-Za-z_$][A-Za-z0-9_$]*
+  | ===|!==|==|!=|<=|>=|&&|\|\||\+\+|--|[-+*/%]=
+  | [-+*/%<>=!&|^~.\[\]{}();,:?]
+''', re.VERBOSE)
+
+_BLOCK_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+
+# Lines that change brace/function state take the slow path; every other
+# line's cost depends only on its shape (digits normalized), so it is memoized
+_STATEFUL_RE = re.compile(r'[{}]|\bfunction\b')
+_DIGITS_RE = re.compile(r'\d+')
+
+# Integer items of a comma list ("12, "); long array literals are priced
+# by counting these instead of walking every token
+_INT_ITEM_RE = re.compile(r'(?<![\w.$])-?\d+\s*,\s*')
+
+# Shared across estimates: generated classes repeat the same template lines
+# on every build. Cleared when it grows past _LINE_MEMO_MAX shapes.
+_line_memo = {}
+_LINE_MEMO_MAX = 8192
+
+# Whole-section traces keyed by (source, entry state): constant sections
+# (members, constructor, core methods) are walked once per process
+_trace_memo = {}
+_TRACE_MEMO_MAX = 32
+
+
+@dataclass
+class BudgetReport:
+    """Estimated bytecode of one class, broken down by section and function."""
+    class_name: str
+    total: int = 0
+    limit: int = CLASS_LIMIT
+    sections: Dict[str, int] = field(default_factory=dict)
+    functions: Dict[str, int] = field(default_factory=dict)
+    constant_pool: int = 0
+
+    @property
+    def ratio(self) -> float:
+        return self.total / self.limit if self.limit else 0.0
+
+    @property
+    def over_budget(self) -> bool:
+        return self.total > self.limit
+
+    @property
+    def near_budget(self) -> bool:
+        return self.ratio >= WARN_RATIO
+
+    def largest_sections(self, count=3) -> List[Tuple[str, int]]:
+        """Return the count biggest sections as (name, bytes), largest first."""
+        return sorted(self.sections.items(), key=lambda kv: kv[1], reverse=True)[:count]
+
+    def summary(self) -> str:
+        """One-line summary: total against the limit plus the dominant sections."""
+        parts = ", ".join(
+            f"{name} {_kb(size)}" for name, size in self.largest_sections() if size)
+        return (f"{self.class_name}: ~{_kb(self.total)} of {_kb(self.limit)} "
+                f"({self.ratio:.0%}) — {parts}")
+
+    def warnings(self) -> List[str]:
+        """Human-readable warnings (empty when comfortably under budget)."""
+        if self.over_budget:
+            return [f"{self.class_name} is estimated at ~{_kb(self.total)}, over MTASC's "
+                    f"{_kb(self.limit)} per-class limit — compilation will likely fail"]
+        if self.near_budget:
+            return [f"{self.class_name} is estimated at ~{_kb(self.total)} "
+                    f"({self.ratio:.0%} of the {_kb(self.limit)} limit)"]
+        return []
+
+
+def _kb(size) -> str:
+    return f"{size / 1024:.1f}KB"
+
+
+def _kind(token) -> str:
+    """Classify a token from _TOKEN_RE by its first character."""
+    c = token[0]
+    if c == '"' or c == "'":
+        return 'string'
+    if c.isdigit() or (c == '.' and len(token) > 1):
+        return 'number'
+    if c.isalpha() or c in '_$':
+        return 'ident'
+    if token.startswith('//'):
+        return 'comment'
+    return 'op'
+
+
+def _pool_text(token) -> str:
+    """Constant-pool text for a token (string literals lose their quotes)."""
+    return token[1:-1] if _kind(token) == 'string' else token
+
+
+class _Estimator:
+    """Token walker that keeps constant-pool and function state across sections."""
+
+    def __init__(self):
+        self.pool = set()
+        self.depth = 0
+        self.functions = []         # stack of (name, brace depth at open)
+        self.pending_function = None
+        self.function_sizes = {}
+
+    def _state(self):
+        return self.depth, tuple(self.functions), self.pending_function
+
+    def _owner(self):
+        """Name of the innermost open function (None at class level)."""
+        return self.functions[-1][0] if self.functions else None
+
+    def _pool_cost(self, text):
+        """Constant-pool bytes for the first use of text (length + NUL)."""
+        if text in self.pool:
+            return 0
+        self.pool.add(text)
+        return len(text.encode('utf-8')) + 1
+
+    def _add(self, owner, cost):
+        if owner is not None:
+            self.function_sizes[owner] = self.function_sizes.get(owner, 0) + cost
+        return cost
+
+    def feed(self, source) -> int:
+        """Estimate source, updating shared state. Returns the bytes charged."""
+        key = (source, self._state())
+        trace = _trace_memo.get(key)
+        if trace is None:
+            trace = self._trace(source)
+            if len(_trace_memo) >= _TRACE_MEMO_MAX:
+                _trace_memo.clear()
+            _trace_memo[key] = trace
+        costs, pooled, (self.depth, functions, self.pending_function) = trace
+        self.functions = list(functions)
+
+        total = 0
+        for owner, cost in costs.items():
+            total += self._add(owner, cost)
+        for owner, text in pooled:
+            total += self._add(owner, self._pool_cost(text))
+        return total
+
+    def _trace(self, source):
+        """
+        Walk source from the current state, leaving the pool untouched.
+
+        Returns ({function or None: bytes}, [(function or None, pool text)],
+        exit state) — enough to replay the walk against any pool.
+        """
+        costs = {}
+        pooled = []
+        for line in _BLOCK_COMMENT_RE.sub(' ', source).split('\n'):
+            if _STATEFUL_RE.search(line):
+                texts = []
+                cost = self._walk(_TOKEN_RE.findall(line), texts=texts)
+                owner = self._owner()
+                pooled.extend((owner, text) for text in texts)
+            else:
+                line, int_items = _INT_ITEM_RE.subn('', line)
+                tokens = _TOKEN_RE.findall(line)
+                if not tokens:
+                    continue
+                owner = self._owner()
+                key = (_DIGITS_RE.sub('0', line), owner is not None)
+                entry = _line_memo.get(key)
+                if entry is None:
+                    slots = []
+                    entry = (self._walk(tokens, slots=slots), slots)
+                    if len(_line_memo) >= _LINE_MEMO_MAX:
+                        _line_memo.clear()
+                    _line_memo[key] = entry
+                base, slots = entry
+                cost = base + int_items * PUSH_INT
+                pooled.extend((owner, _pool_text(tokens[i])) for i in slots)
+            costs[owner] = costs.get(owner, 0) + cost
+        return costs, pooled, self._state()
+
+    def _walk(self, tokens, texts=None, slots=None) -> int:
+        """
+        Charge one line's tokens (pool entries excluded), updating
+        brace/function state.
+
+        Tokens that would enter the constant pool are reported through
+        texts (their pool text) and/or slots (their index in tokens).
+        """
+        cost = 0
+        prev = None
+        count = len(tokens)
+        for i, text in enumerate(tokens):
+            kind = _kind(text)
+            if kind == 'comment':
+                continue
+            nxt = tokens[i + 1] if i + 1 < count else None
+            pooled = False
+
+            if kind == 'string':
+                cost += PUSH_CONST
+                pooled = True
+            elif kind == 'number':
+                cost += PUSH_INT if '.' not in text else PUSH_DOUBLE
+            elif kind == 'ident':
+                if prev == 'function':
+                    self.pending_function = text
+                    pooled = True
+                elif text in KEYWORD_COSTS:
+                    cost += KEYWORD_COSTS[text]
+                elif prev == 'var' and not self.functions:
+                    pass        # member declaration, no initializer code
+                elif prev == ':' and text[0].isupper() and (nxt in _TYPE_FOLLOWERS or nxt is None):
+                    pass        # type annotation
+                elif prev in ('class', 'extends', 'implements', 'import'):
+                    pass
+                else:
+                    cost += PUSH_CONST + OPCODE
+                    pooled = True
+            elif text == '{':
+                self.depth += 1
+                if self.pending_function:
+                    self.functions.append((self.pending_function, self.depth))
+                    self.pending_function = None
+            elif text == '}':
+                if self.functions and self.functions[-1][1] == self.depth:
+                    self.functions.pop()
+                self.depth -= 1
+            elif text not in FREE_PUNCTUATION:
+                cost += OPCODE
+
+            if pooled:
+                if texts is not None:
+                    texts.append(_pool_text(text))
+                if slots is not None:
+                    slots.append(i)
+            prev = text
+        return cost
+
+
+def estimate_source(source, class_name="class") -> BudgetReport:
+    """Estimate a single AS2 source string as one section."""
+    return analyze_sections(class_name, [("source", source)])
+
+
+def analyze_sections(class_name, sections) -> BudgetReport:
+    """
+    Estimate a class assembled from named source sections.
+
+    Args:
+        class_name: Class name used in summaries and warnings
+        sections: Iterable of (section_name, source) in emission order;
+            sections with the same name are added together
+
+    Returns:
+        BudgetReport
+    """
+    estimator = _Estimator()
+    report = BudgetReport(class_name)
+    for name, source in sections:
+        size = estimator.feed(source)
+        report.sections[name] = report.sections.get(name, 0) + size
+        report.total += size
+    report.functions = dict(estimator.function_sizes)
+    report.constant_pool = sum(len(s.encode('utf-8')) + 1 for s in estimator.pool)
+    return report
@@ -9,6 +9,9 @@ OPTIMIZATIONS APPLIED:
 - GC reduction (reusable arrays instead of new Array())
 - Smart expiry checking (early exit when queue empty)
 - Per-grid flashing control with configurable threshold
+- Feature blocks (%%IF KEY%% ... %%ENDIF%%, see template_engine.py): static or
+  dynamic grid updates, target signal wiring and stack counters are only
+  emitted when a grid uses them (CodeGenerator.features())
 
 FLASH CS6 REQUIREMENTS:
 - BuffSlot symbol: Linkage "BuffSlot", contains m_icon MovieClip at (0,0)
@@ -82,7 +85,9 @@ CORE_METHODS_TEMPLATE = '''
         var scale:Number = (sz / 64) * 100;
         s._xscale = s._yscale = scale;
         if (cfg.showTimers) slot.createTimerTF(s, cfg.timerFont, cfg.timerYOffset);
-        slot.createStackTF(s);
+%%IF STACKS%%
+        if (cfg.stacks) slot.createStackTF(s);
+%%ENDIF%%
         posSlot(s, idx, cfg);
         s._visible = false;
         s._idx = idx;
@@ -173,9 +178,10 @@ CORE_METHODS_TEMPLATE = '''
         }
     }
     
+    // OPTIMIZATION: Whitelists are interned into shared bitmasks (GM);
+    // cfg.mw/cfg.bit locate this grid's set, so no per-grid table lookup
     private function isTracked(bid:Number, obj:Object):Boolean {
-        var wl:Object = WL[obj.cfg.id];
-        return (wl != null && wl[bid] == true);
+        return (GM[obj.cfg.mw][bid] & obj.cfg.bit) != 0;
     }
     
     private function mkEntry(buff:Object):Object {
@@ -190,13 +196,8 @@ CORE_METHODS_TEMPLATE = '''
     private function addPBuff(buff:Object):Void {
         if (buff == null || buff.m_BuffId == null) return;
         var bid:Number = Number(buff.m_BuffId);
-        var tracked:Boolean = false;
-        var i:Number = 0;
-        while (i < grids.length) {
-            if (grids[i].cfg.type == "player" && isTracked(bid, grids[i])) { tracked = true; break; }
-            i++;
-        }
-        if (!tracked) return;
+        // OPTIMIZATION: One TRACK lookup instead of testing every player grid
+        if ((TRACK[bid] & 1) == 0) return;
         var entry:Object = mkEntry(buff);
         var cache:Object = buffIndexCache.player;
         var idx:Number = cache[bid];
@@ -221,16 +222,12 @@ CORE_METHODS_TEMPLATE = '''
         }
     }
     
+%%IF TARGET_GRIDS%%
     private function addTBuff(buff:Object):Void {
         if (buff == null || buff.m_BuffId == null) return;
         var bid:Number = Number(buff.m_BuffId);
-        var tracked:Boolean = false;
-        var i:Number = 0;
-        while (i < grids.length) {
-            if (grids[i].cfg.type == "target" && isTracked(bid, grids[i])) { tracked = true; break; }
-            i++;
-        }
-        if (!tracked) return;
+        // OPTIMIZATION: One TRACK lookup instead of testing every target grid
+        if ((TRACK[bid] & 2) == 0) return;
         var entry:Object = mkEntry(buff);
         var cache:Object = buffIndexCache.target;
         var idx:Number = cache[bid];
@@ -255,6 +252,7 @@ CORE_METHODS_TEMPLATE = '''
         }
     }
     
+%%ENDIF%%
     private function rebuildCache(cache:Object, arr:Array, rem:Number):Void {
         for (var k:String in cache) { if (cache[k] > rem) cache[k]--; }
     }
@@ -267,10 +265,21 @@ CORE_METHODS_TEMPLATE = '''
     private function updateGrid(obj:Object):Void {
         if (!obj.dirty) return;
         obj.dirty = false;
+%%IF STATIC_GRIDS%%
+%%IF DYNAMIC_GRIDS%%
         if (obj.cfg.slotMode == "static") updateStatic(obj);
         else updateDynamic(obj);
+%%ELSE%%
+        updateStatic(obj);
+%%ENDIF%%
+%%ELSE%%
+%%IF DYNAMIC_GRIDS%%
+        updateDynamic(obj);
+%%ENDIF%%
+%%ENDIF%%
     }
     
+%%IF DYNAMIC_GRIDS%%
     private function updateDynamic(obj:Object):Void {
         var src:Array = (obj.cfg.type == "player") ? playerBuffs : targetBuffs;
 
@@ -309,6 +318,8 @@ CORE_METHODS_TEMPLATE = '''
         if (!previewMode) obj.mc._visible = disp.length > 0;
     }
     
+%%ENDIF%%
+%%IF STATIC_GRIDS%%
     private function updateStatic(obj:Object):Void {
         var src:Array = (obj.cfg.type == "player") ? playerBuffs : targetBuffs;
         var sa:Object = obj.cfg.slots;
@@ -342,6 +353,8 @@ CORE_METHODS_TEMPLATE = '''
         if (!previewMode) obj.mc._visible = hasAny;
     }
     
+%%ENDIF%%
+%%IF DYNAMIC_GRIDS%%
     private function sortArr(arr:Array, order:String, now:Number):Void {
         if (arr.length <= 1) return;
         if (order == "shortest") {
@@ -361,6 +374,7 @@ CORE_METHODS_TEMPLATE = '''
         }
     }
     
+%%ENDIF%%
     private function showSlot(obj:Object, s:MovieClip, e:Object, si:Number):Void {
         if (s == null || e == null) return;
         var slotType:String = "BuffSlot";
@@ -369,12 +383,14 @@ CORE_METHODS_TEMPLATE = '''
         s = slot.swapType(obj, s, si, slotType);
         s._visible = true;
         s._buff = e;
+%%IF STACKS%%
         if (s.stk != null) {
             var stackLvl:Number = STACK_LEVEL[e.id];
             var stkTxt:String = (stackLvl != null && stackLvl != undefined) ? String(stackLvl) : "";
             s.stk.text = stkTxt;
             if (s.stkShadow != null) s.stkShadow.text = stkTxt;
         }
+%%ENDIF%%
         loadIcon(obj, si, e);
     }
     
@@ -386,8 +402,10 @@ CORE_METHODS_TEMPLATE = '''
         s._lastSec = null;
         if (s.tmr != null) s.tmr.text = "";
         if (s.tmrShadow != null) s.tmrShadow.text = "";
+%%IF STACKS%%
         if (s.stk != null) s.stk.text = "";
         if (s.stkShadow != null) s.stkShadow.text = "";
+%%ENDIF%%
         if (s.m_icon != null) { s.m_icon._visible = false; try { s.m_icon.unloadMovie(); } catch (e:Object) {} }
     }
     
@@ -414,7 +432,9 @@ CORE_METHODS_TEMPLATE = '''
 
         // SMART EXPIRY: Early exit if no buffs
         if (playerBuffs.length > 0) checkExpiry(playerBuffs, buffIndexCache.player, now, "player");
+%%IF TARGET_GRIDS%%
         if (targetBuffs.length > 0) checkExpiry(targetBuffs, buffIndexCache.target, now, "target");
+%%ENDIF%%
 
         var i:Number = 0;
         while (i < grids.length) { updateGrid(grids[i]); i++; }
@@ -508,8 +528,10 @@ CORE_METHODS_TEMPLATE = '''
             m_Player = com.GameInterface.Game.Character.GetClientCharacter();
             if (m_Player != null) {
                 connectP(m_Player);
+%%IF TARGET_GRIDS%%
                 var tgt:Object = m_Player.GetOffensiveTarget();
                 if (tgt != null && tgt.GetType() != _global.Enums.TypeID.e_Type_None) SlotTargetChanged(tgt);
+%%ENDIF%%
             }
         } catch (e:Object) {
             var self:KzGrids = this;
@@ -523,7 +545,9 @@ CORE_METHODS_TEMPLATE = '''
             ch.SignalBuffAdded.Connect(SlotPBuffAdd, this);
             ch.SignalBuffUpdated.Connect(SlotPBuffAdd, this);
             ch.SignalBuffRemoved.Connect(SlotPBuffRem, this);
+%%IF TARGET_GRIDS%%
             ch.SignalOffensiveTargetChanged.Connect(SlotTargetChanged, this);
+%%ENDIF%%
         } catch (e:Object) {}
     }
     
@@ -533,10 +557,13 @@ CORE_METHODS_TEMPLATE = '''
             ch.SignalBuffAdded.Disconnect(SlotPBuffAdd, this);
             ch.SignalBuffUpdated.Disconnect(SlotPBuffAdd, this);
             ch.SignalBuffRemoved.Disconnect(SlotPBuffRem, this);
+%%IF TARGET_GRIDS%%
             ch.SignalOffensiveTargetChanged.Disconnect(SlotTargetChanged, this);
+%%ENDIF%%
         } catch (e:Object) {}
     }
     
+%%IF TARGET_GRIDS%%
     private function SlotTargetChanged(tid:Object):Void {
         if (tid == null || tid.GetType() == _global.Enums.TypeID.e_Type_None) setTarget(null);
         else setTarget(com.GameInterface.Game.Character.GetCharacter(tid));
@@ -578,6 +605,7 @@ CORE_METHODS_TEMPLATE = '''
         try { for (var k:String in m_Target.m_BuffList) { var buff:Object = m_Target.m_BuffList[k]; if (buff != null) addTBuff(buff); } } catch (e:Object) {}
     }
     
+%%ENDIF%%
     private function SlotPBuffAdd(bid:Number):Void {
         if (m_Player != null && m_Player.m_BuffList != null && m_Player.m_BuffList[bid] != null) {
             var buff:Object = m_Player.m_BuffList[bid];
@@ -586,6 +614,7 @@ CORE_METHODS_TEMPLATE = '''
         }
     }
 
+%%IF TARGET_GRIDS%%
     private function SlotTBuffAdd(bid:Number):Void {
         if (m_Target != null && m_Target.m_BuffList != null && m_Target.m_BuffList[bid] != null) {
             var buff:Object = m_Target.m_BuffList[bid];
@@ -594,8 +623,9 @@ CORE_METHODS_TEMPLATE = '''
         }
     }
     
-    private function SlotPBuffRem(bid:Number):Void { remPBuff(bid); }
     private function SlotTBuffRem(bid:Number):Void { remTBuff(bid); }
+%%ENDIF%%
+    private function SlotPBuffRem(bid:Number):Void { remPBuff(bid); }
     
     private function handleKeyDown():Void {
         if (Key.isDown(16) && Key.isDown(17) && Key.isDown(18)) {
@@ -721,7 +751,9 @@ CORE_METHODS_TEMPLATE = '''
         cleanup();
         try { com.GameInterface.Game.CharacterBase.SignalClientCharacterAlive.Disconnect(SlotAlive, this); } catch (e:Object) {}
         if (m_Player != null) { disconnectP(m_Player); m_Player = null; }
+%%IF TARGET_GRIDS%%
         if (m_Target != null) { disconnectT(m_Target); m_Target = null; }
+%%ENDIF%%
         return config;
     }
 '''
@@ -1,52 +1,56 @@
 """
 Boss Timer Module for KzBuilder 3.3.6
-Core timing logic for Ethram-Fal seed cycle phases.
+Core timing logic for boss encounter cycles.
+
+Encounters (phase timelines, trigger bindings, display rules) are data:
+see encounters.py and assets/encounters/. The bundled definition is the
+Ethram-Fal seed cycle.
 
 Decoupled from UI - receives update_callback to push display data.
+
+Live, trigger matches arrive as TimerEvents: CombatLogMonitor builds them
+on its daemon thread and the Tk thread applies them (apply_event), so the
+timer state and the overlay callback are only touched from one thread.
 """
 
-import time
+import math
 import threading
-from .live_tracker_settings import COLORS
-
-# =============================================================================
-# ETHRAM-FAL SEED CYCLE TIMING CONSTANTS (seconds)
-# =============================================================================
-SEED_DURATION = 7           # How long the seed debuff lasts
-FIXATION_DELAY = 4          # Seconds after seed before fixation appears
-SEED_ACTIVE_END = 10        # End of seed active display phase
-SILENCE_START = 14          # Wait-for-silence phase ends here (countdown from 15)
-SILENCE_COUNTDOWN = 15      # Silence countdown target
-SCORPION_SPAWN = 16         # Scorpion spawns / DPS phase starts
-KILL_WINDOW_START = 31      # Kill window opens
-URGENCY_START = 33          # Urgency escalation starts (! marks)
-KILL_WINDOW_END = 36        # Kill window urgency ramps up
-CYCLE_DURATION = 39         # Full cycle duration
-NEW_SEED_WARNING = 5        # Show "New Seed in X" when <= this many seconds remain
-
-# Double-seed detection bounds
-DOUBLE_SEED_MIN_GAP = 5
-DOUBLE_SEED_MAX_GAP = 12
-DOUBLE_SEED_END = 14        # Second seed active until this time
-
-# First-seed-only detection threshold
-FIRST_SEED_THRESHOLD = 6    # If no fixation after this many seconds, it's first-seed
-
-# Kill window alert threshold
-KILL_ALERT_THRESHOLD = 28   # Switch to alert color when elapsed >= this
+from dataclasses import dataclass, replace
+from typing import Optional
+
+from .clock import MonotonicClock
+from .encounters import Encounter, load_encounters, render_row
+
+
+@dataclass(frozen=True)
+class TimerEvent:
+    """A trigger event bound for BossTimer, stamped with when its line was read."""
+    encounter: Encounter
+    event: str                  # binding name ("seed", "fixation", "syphon")
+    player: str
+    read_at: float              # clock time the log line was read
+    line: str = ""
+
+    @property
+    def action(self) -> Optional[str]:
+        binding = self.encounter.bindings.get(self.event)
+        return binding.action if binding else None
 
 
 class BossTimer:
     """
-    Tracks the 39-second Ethram-Fal seed cycle and calculates phase display data.
+    Tracks the active encounter's cycle and looks up its phase display data.
+
+    Several encounters can be loaded at once; the one whose start trigger
+    fired last drives the overlay.
 
     Usage:
         timer = BossTimer(update_callback=overlay.update_display)
         timer.start_cycle("PlayerName")
-        # Call update_display() every 50ms in a game loop
+        # Call update_display() when next_update_in() says the display changes
     """
 
-    def __init__(self, update_callback=None):
+    def __init__(self, update_callback=None, encounters=None, clock=None):
         """
         Initialize the boss timer.
 
@@ -54,102 +58,160 @@ class BossTimer:
             update_callback: Function to call with display data. Signature:
                 callback(row1_msg, row1_player, row1_timer, row1_color,
                         row2_msg, row2_player, row2_timer, row2_color, cycle_timer)
+            encounters: List of encounters.Encounter (default: the bundled
+                definitions in assets/encounters)
+            clock: clock.Clock to read time from (default: MonotonicClock;
+                replays pass a VirtualClock)
         """
         self._update_callback = update_callback
+        self.clock = clock or MonotonicClock()
         self._lock = threading.Lock()
 
+        self.encounters = load_encounters() if encounters is None else list(encounters)
+        self.encounter = self.encounters[0] if self.encounters else None
+
         # Core state
         self.timer_active = False
         self.cycle_start_time = None
-        self.seed_player = None
-        self.fixation_player = None
-        self.seed_detected = False
-        self.fixation_detected = False
-
-        # Special mechanics
-        self.syphon_active = False
-        self.double_seed_mode = False
-        self.second_seed_active = False
+        self.slots = {}             # player names by slot ("seed", "fixation")
+        self.flags = set()          # flags set by bindings ("fixation", "double")
+        self.interrupted = False    # interrupt display overrides everything
 
     def set_callback(self, callback):
         """Set or update the display callback."""
         self._update_callback = callback
 
-    def start_cycle(self, player_name):
+    def register_triggers(self, engine, sink=None):
+        """
+        Add every encounter's triggers to a log_triggers.TriggerEngine.
+
+        Args:
+            engine: TriggerEngine to add to
+            sink: Optional callable(TimerEvent). When given, matches are
+                wrapped in TimerEvents and handed to it (to be applied later
+                with apply_event()); otherwise they are applied immediately.
         """
-        Start a new seed cycle for the given player.
-        Detects double-seed (P4) if called 5-12s after previous seed.
+        triggers = []
+        for encounter in self.encounters:
+            for trigger in encounter.triggers:
+                key = f"{encounter.id}:{trigger.event}"
+                triggers.append(replace(trigger, event=key))
+                if sink is None:
+                    handler = (lambda m, enc=encounter, event=trigger.event:
+                               self.handle_event(event, m.target, enc, at=m.time))
+                else:
+                    handler = (lambda m, enc=encounter, event=trigger.event:
+                               sink(TimerEvent(enc, event, m.target,
+                                               self.clock.now() if m.time is None else m.time,
+                                               m.line)))
+                engine.on(key, handler)
+        engine.add(*triggers)
+
+    def apply_event(self, event: TimerEvent):
+        """Apply a queued TimerEvent (timed from when its line was read)."""
+        self.handle_event(event.event, event.player, event.encounter, at=event.read_at)
+
+    def handle_event(self, event, player="", encounter=None, at=None):
         """
-        current_time = time.time()
+        Apply a trigger event's binding.
 
-        with self._lock:
-            self.syphon_active = False
+        Args:
+            event: Event name from the encounter's bindings
+            player: Target name extracted from the log line
+            encounter: Encounter the trigger belongs to (default: active one)
+            at: Clock time the log line was read (default: now)
+        """
+        encounter = encounter or self.encounter
+        binding = encounter.bindings.get(event) if encounter else None
+        if binding is None:
+            return
+        current_time = self.clock.now() if at is None else at
 
-            # Check for double seed (P4 mechanic)
-            if (self.timer_active and
+        with self._lock:
+            if binding.action == "interrupt":
+                self.encounter = encounter
+                self.interrupted = True
+                self.timer_active = False
+                self.cycle_start_time = None
+                return
+
+            if binding.action == "mark":
+                if encounter is self.encounter:
+                    if binding.flag:
+                        self.flags.add(binding.flag)
+                    if binding.slot:
+                        self.slots[binding.slot] = player
+                return
+
+            # start
+            self.interrupted = False
+
+            # Repeat of the same player's start within the window (e.g. P4 double seed)
+            if (binding.repeat_flag and
+                self.timer_active and
+                self.encounter is encounter and
                 self.cycle_start_time is not None and
-                self.seed_player == player_name):
+                self.slots.get(binding.slot) == player):
 
                 elapsed = current_time - self.cycle_start_time
-                if DOUBLE_SEED_MIN_GAP <= elapsed <= DOUBLE_SEED_MAX_GAP:
-                    self.double_seed_mode = True
-                    self.second_seed_active = True
+                if binding.repeat_min <= elapsed <= binding.repeat_max:
+                    self.flags.add(binding.repeat_flag)
                     return
 
             # New cycle - reset state
+            self.encounter = encounter
             self.timer_active = True
             self.cycle_start_time = current_time
-            self.seed_player = player_name
-            self.fixation_player = None
-            self.seed_detected = True
-            self.fixation_detected = False
-            self.second_seed_active = False
-            self.double_seed_mode = False
+            self.slots = {binding.slot: player} if binding.slot else {}
+            self.flags = set()
+
+    def _event_for(self, action):
+        """First event of the active encounter bound to action."""
+        if self.encounter:
+            for event, binding in self.encounter.bindings.items():
+                if binding.action == action:
+                    return event
+        return None
+
+    def start_cycle(self, player_name):
+        """
+        Start a new cycle for the given player (the active encounter's start
+        event; a repeat within the encounter's window sets its repeat flag).
+        """
+        self.handle_event(self._event_for("start"), player_name)
+
+    def update_fixation(self, player_name):
+        """Record the active encounter's mark event (Ethram-Fal: fixation target)."""
+        self.handle_event(self._event_for("mark"), player_name)
+
+    def start_syphon(self):
+        """Interrupt the timer (Ethram-Fal: boss is using syphon)."""
+        self.handle_event(self._event_for("interrupt"))
 
     def stop_cycle(self):
         """Stop the current cycle and reset to waiting state."""
         with self._lock:
             self.timer_active = False
             self.cycle_start_time = None
-            self.seed_player = None
-            self.fixation_player = None
-            self.seed_detected = False
-            self.fixation_detected = False
-            self.second_seed_active = False
+            self.slots = {}
+            self.flags = set()
 
         self._push_waiting_state()
 
-    def start_syphon(self):
-        """Boss is using syphon attack - interrupt timer."""
-        with self._lock:
-            self.syphon_active = True
-            self.timer_active = False
-            self.cycle_start_time = None
-
     def reset_fight(self):
         """Full fight reset (boss death/restart)."""
         with self._lock:
             self.timer_active = False
             self.cycle_start_time = None
-            self.seed_player = None
-            self.fixation_player = None
-            self.seed_detected = False
-            self.fixation_detected = False
-            self.syphon_active = False
-            self.double_seed_mode = False
-            self.second_seed_active = False
+            self.slots = {}
+            self.flags = set()
+            self.interrupted = False
 
         self._push_waiting_state()
 
-    def update_fixation(self, player_name):
-        """Record the fixation target."""
-        with self._lock:
-            self.fixation_detected = True
-            self.fixation_player = player_name
-
     def get_current_phase(self):
         """
-        Calculate and return current phase display data.
+        Look up and return current phase display data.
 
         Returns:
             dict with keys: row1_msg, row1_player, row1_timer, row1_color,
@@ -157,274 +219,71 @@ class BossTimer:
             None if no active display needed
         """
         with self._lock:
-            # Syphon phase overrides everything
-            if self.syphon_active:
-                return {
-                    'row1_msg': "Avoid the clouds", 'row1_player': "",
-                    'row1_timer': "", 'row1_color': COLORS["alert"],
-                    'row2_msg': "", 'row2_player': "",
-                    'row2_timer': "", 'row2_color': COLORS["default"],
-                    'cycle_timer': ""
-                }
-
-            if not self.timer_active or self.cycle_start_time is None:
+            encounter = self.encounter
+            if encounter is None:
                 return None
 
-            elapsed = time.time() - self.cycle_start_time
+            # Interrupt phase overrides everything
+            if self.interrupted:
+                return self._display(encounter.interrupted, {}, "")
 
-            # Cycle complete
-            if elapsed >= CYCLE_DURATION:
-                pass  # Will stop after lock release
-            else:
-                elapsed_int = int(elapsed)
-                timer_text = f"{elapsed_int}s"
-
-                is_first_seed = elapsed_int > FIRST_SEED_THRESHOLD and not self.fixation_detected
-                is_double_seed = self.double_seed_mode
-                second_seed_active = self.second_seed_active
+            if not self.timer_active or self.cycle_start_time is None:
+                return None
 
-                seed_detected = self.seed_detected
-                fixation_detected = self.fixation_detected
-                seed_player = self.seed_player
-                fixation_player = self.fixation_player
+            elapsed_int = int(self.clock.now() - self.cycle_start_time)
+            rows = encounter.lookup(self.flags, elapsed_int)
+            slots = dict(self.slots)
 
-        # Handle cycle completion outside lock
-        if elapsed >= CYCLE_DURATION:
+        # Cycle complete (stop outside lock)
+        if rows is None:
             self.stop_cycle()
             return None
 
-        # Determine which phase we're in
-        if is_double_seed:
-            return self._get_double_seed_phase(
-                elapsed_int, timer_text, seed_player, fixation_player,
-                fixation_detected, second_seed_active
-            )
+        return self._display(rows, slots, f"{elapsed_int}s")
 
-        if is_first_seed:
-            return self._get_first_seed_phase(
-                elapsed_int, timer_text, seed_detected, seed_player
-            )
+    # Lands a deadline just past the second boundary so int(elapsed) has
+    # already rolled over when it fires
+    BOUNDARY_EPSILON = 1e-6
 
-        if elapsed_int < SCORPION_SPAWN + 1:
-            return self._get_seed_fixation_phase(
-                elapsed_int, timer_text, seed_detected, fixation_detected,
-                seed_player, fixation_player
-            )
+    def next_update_in(self):
+        """
+        Seconds until the display can next change without a new trigger.
 
-        return self._get_dps_kill_phase(elapsed_int, timer_text)
+        Rows are precompiled per whole second, so every phase boundary (and
+        the cycle counter) falls on the next whole second of elapsed time.
+
+        Returns:
+            float, or None while waiting or interrupted (static until a trigger)
+        """
+        with self._lock:
+            if self.interrupted or not self.timer_active or self.cycle_start_time is None:
+                return None
+            elapsed = self.clock.now() - self.cycle_start_time
+        return max(0.0, math.floor(elapsed) + 1 - elapsed) + self.BOUNDARY_EPSILON
 
     def update_display(self):
         """
         Get current phase and push to callback.
-        Call this every 50ms in the game loop.
+        Call this whenever next_update_in() elapses or a trigger arrives.
         """
         phase = self.get_current_phase()
         if phase and self._update_callback:
-            self._update_callback(
-                row1_msg=phase.get('row1_msg', ''),
-                row1_player=phase.get('row1_player', ''),
-                row1_timer=phase.get('row1_timer', ''),
-                row1_color=phase.get('row1_color', COLORS["default"]),
-                row2_msg=phase.get('row2_msg', ''),
-                row2_player=phase.get('row2_player', ''),
-                row2_timer=phase.get('row2_timer', ''),
-                row2_color=phase.get('row2_color', COLORS["default"]),
-                cycle_timer=phase.get('cycle_timer', '')
-            )
+            self._update_callback(**phase)
 
     def _push_waiting_state(self):
         """Push the idle/waiting display state."""
-        if self._update_callback:
-            self._update_callback(
-                row1_msg="Waiting for Seed...", row1_player="", row1_timer="",
-                row1_color=COLORS["default"], row2_msg="", row2_player="",
-                row2_timer="", row2_color=COLORS["default"], cycle_timer=""
-            )
-
-    # =========================================================================
-    # HELPER: Build phase display dict
-    # =========================================================================
+        if self._update_callback and self.encounter:
+            self._update_callback(**self._display(self.encounter.waiting, {}, ""))
 
     @staticmethod
-    def _phase(row1_msg, row1_color, timer_text,
-               row1_player="", row1_timer="",
-               row2_msg="", row2_player="", row2_timer="",
-               row2_color=None):
-        """Build a phase display dict with sensible defaults."""
+    def _display(rows, slots, cycle_timer):
+        """Build the display dict from precompiled rows."""
+        row1_msg, row1_player, row1_timer, row1_color = render_row(rows[0], slots)
+        row2_msg, row2_player, row2_timer, row2_color = render_row(rows[1], slots)
         return {
             'row1_msg': row1_msg, 'row1_player': row1_player,
             'row1_timer': row1_timer, 'row1_color': row1_color,
             'row2_msg': row2_msg, 'row2_player': row2_player,
-            'row2_timer': row2_timer,
-            'row2_color': row2_color or COLORS["default"],
-            'cycle_timer': timer_text
+            'row2_timer': row2_timer, 'row2_color': row2_color,
+            'cycle_timer': cycle_timer
         }
-
-    # =========================================================================
-    # PHASE CALCULATION METHODS
-    # =========================================================================
-
-    def _get_first_seed_phase(self, elapsed, timer_text, seed_detected, seed_player):
-        """First seed without fixation (scorpion soon)."""
-        if elapsed <= SEED_DURATION:
-            seed_remaining = max(0, SEED_DURATION - elapsed)
-            row1_msg = "Seed: " if seed_detected and seed_player else "Seed"
-            row1_player = seed_player if seed_detected and seed_player else ""
-            row1_timer = f"{int(seed_remaining)}s" if seed_remaining > 0 else "Done"
-            return self._phase(row1_msg, COLORS["alert"], timer_text,
-                               row1_player=row1_player, row1_timer=row1_timer)
-
-        return self._phase("First Seed - Scorp Soon", COLORS["warning"], timer_text)
-
-    def _get_seed_fixation_phase(self, elapsed, timer_text, seed_detected,
-                                  fixation_detected, seed_player, fixation_player):
-        """Normal seed + fixation cycle phases."""
-        if elapsed <= SEED_ACTIVE_END:
-            return self._phase_seed_active(
-                elapsed, timer_text, seed_player, fixation_detected, fixation_player)
-
-        if elapsed <= SILENCE_START:
-            return self._phase_wait_silence(elapsed, timer_text, fixation_player)
-
-        if elapsed <= SCORPION_SPAWN:
-            return self._phase_dps_scorpion(timer_text)
-
-        # Kill window countdown
-        kill_window_in = KILL_WINDOW_START - elapsed
-        return self._phase("Kill window in", COLORS["warning"], timer_text,
-                           row1_timer=f"{int(kill_window_in)}s",
-                           row2_msg="Dps Scorp to 5%", row2_color=COLORS["warning"])
-
-    def _phase_seed_active(self, elapsed, timer_text, seed_player,
-                           fixation_detected, fixation_player):
-        """Seed active phase (0-10s)."""
-        seed_remaining = max(0, SEED_DURATION - elapsed)
-        row1_msg = "Seed: " if seed_player else "Seed"
-        row1_player = seed_player if seed_player else ""
-        if elapsed <= SEED_DURATION:
-            row1_timer = f"{int(seed_remaining)}s" if seed_remaining > 0 else "Done"
-        else:
-            row1_timer = "Done"
-
-        if fixation_detected:
-            fixation_elapsed = elapsed - FIXATION_DELAY
-            fixation_remaining = max(0, SEED_DURATION - fixation_elapsed)
-            return self._phase(row1_msg, COLORS["alert"], timer_text,
-                               row1_player=row1_player, row1_timer=row1_timer,
-                               row2_msg="Fix: ",
-                               row2_player=fixation_player or "",
-                               row2_timer=f"{int(fixation_remaining)}s",
-                               row2_color=COLORS["active"])
-
-        return self._phase(row1_msg, COLORS["alert"], timer_text,
-                           row1_player=row1_player, row1_timer=row1_timer)
-
-    def _phase_wait_silence(self, elapsed, timer_text, fixation_player):
-        """Wait for silence phase (11-14s)."""
-        silence_remaining = SILENCE_COUNTDOWN - elapsed
-        return self._phase("Wait for Silence", COLORS["active"], timer_text,
-                           row1_timer=f"{int(silence_remaining)}s",
-                           row2_msg="Fix: ",
-                           row2_player=fixation_player or "",
-                           row2_timer="Done", row2_color=COLORS["active"])
-
-    def _phase_dps_scorpion(self, timer_text):
-        """Silence done, DPS scorpion phase (15-16s)."""
-        return self._phase("Wait for Silence", COLORS["active"], timer_text,
-                           row1_timer="Done",
-                           row2_msg="Dps Scorp to 5%", row2_color=COLORS["warning"])
-
-    def _get_dps_kill_phase(self, elapsed, timer_text):
-        """DPS window and kill scorpion phases."""
-        kill_window_in = max(0, KILL_WINDOW_START - elapsed)
-        new_seed_in = max(0, CYCLE_DURATION - elapsed)
-
-        if elapsed < KILL_WINDOW_START:
-            color = COLORS["alert"] if elapsed >= KILL_ALERT_THRESHOLD else COLORS["warning"]
-            return self._phase("Kill window in", color, timer_text,
-                               row1_timer=f"{int(kill_window_in)}s",
-                               row2_msg="Dps Scorp to 5%", row2_color=COLORS["warning"])
-
-        if elapsed < KILL_WINDOW_END:
-            urgency = "!" * max(0, elapsed - URGENCY_START) if elapsed > URGENCY_START else ""
-            row1_timer = f"{int(new_seed_in)}s" if elapsed > URGENCY_START else ""
-            return self._phase(f"Kill Scorp{urgency}", COLORS["alert"], timer_text,
-                               row1_timer=row1_timer)
-
-        # Final burn - new seed imminent
-        urgency = "!" * (elapsed - URGENCY_START)
-        return self._phase(f"Kill Scorp{urgency}", COLORS["alert"], timer_text,
-                           row1_timer=f"{int(new_seed_in)}s",
-                           row2_msg=f"New Seed in {int(new_seed_in)}",
-                           row2_color=COLORS["warning"])
-
-    def _get_double_seed_phase(self, elapsed, timer_text, seed_player, fixation_player,
-                                fixation_detected, second_seed_active):
-        """P4 double seed mechanic phases."""
-        if elapsed <= SEED_DURATION:
-            return self._phase_double_first_seed(
-                elapsed, timer_text, seed_player, fixation_player, fixation_detected)
-
-        if elapsed <= DOUBLE_SEED_END:
-            return self._phase_double_second_seed(
-                elapsed, timer_text, seed_player, fixation_player, fixation_detected)
-
-        return self._phase_double_kite(elapsed, timer_text)
-
-    def _phase_double_first_seed(self, elapsed, timer_text, seed_player,
-                                  fixation_player, fixation_detected):
-        """P4 first seed phase (0-7s)."""
-        seed_remaining = max(0, SEED_DURATION - elapsed)
-        row1_msg = "Seed: " if seed_player else "Seed"
-        row1_player = seed_player if seed_player else ""
-
-        if fixation_detected and elapsed >= FIXATION_DELAY:
-            fixation_elapsed = elapsed - FIXATION_DELAY
-            fixation_remaining = max(0, SEED_DURATION - fixation_elapsed)
-            return self._phase(row1_msg, COLORS["alert"], timer_text,
-                               row1_player=row1_player,
-                               row1_timer=f"{int(seed_remaining)}s",
-                               row2_msg="Fix: ",
-                               row2_player=fixation_player or "",
-                               row2_timer=f"{int(fixation_remaining)}s",
-                               row2_color=COLORS["active"])
-
-        return self._phase(row1_msg, COLORS["alert"], timer_text,
-                           row1_player=row1_player,
-                           row1_timer=f"{int(seed_remaining)}s",
-                           row2_msg="P4 - Double Seed",
-                           row2_color=COLORS["warning"])
-
-    def _phase_double_second_seed(self, elapsed, timer_text, seed_player,
-                                   fixation_player, fixation_detected):
-        """P4 second seed phase (8-14s)."""
-        seed2_remaining = max(0, DOUBLE_SEED_END - elapsed)
-        row1_msg = "Seed 2: " if seed_player else "Seed 2"
-        row1_player = seed_player if seed_player else ""
-
-        if fixation_detected:
-            fixation_elapsed = elapsed - FIXATION_DELAY
-            fixation_remaining = max(0, SEED_DURATION - fixation_elapsed)
-            fix_timer = f"{int(fixation_remaining)}s" if fixation_remaining > 0 else "Done"
-            return self._phase(row1_msg, COLORS["alert"], timer_text,
-                               row1_player=row1_player,
-                               row1_timer=f"{int(seed2_remaining)}s",
-                               row2_msg="Fix: ",
-                               row2_player=fixation_player or "",
-                               row2_timer=fix_timer,
-                               row2_color=COLORS["active"])
-
-        return self._phase(row1_msg, COLORS["alert"], timer_text,
-                           row1_player=row1_player,
-                           row1_timer=f"{int(seed2_remaining)}s")
-
-    def _phase_double_kite(self, elapsed, timer_text):
-        """P4 kite phase (15s+)."""
-        new_seed_in = max(0, CYCLE_DURATION - elapsed)
-
-        if new_seed_in <= NEW_SEED_WARNING:
-            return self._phase("Kite Scorps", COLORS["warning"], timer_text,
-                               row2_msg=f"New Seed in {int(new_seed_in)}",
-                               row2_color=COLORS["alert"])
-
-        return self._phase("Kite Scorps", COLORS["warning"], timer_text)
@@ -0,0 +1,450 @@
+"""
+KzGrids Buff Database
+Loading, searching, and editing the buff database (no UI dependencies).
+
+v2 Format:
+{
+    "name": "Buff Name",
+    "ids": [id1, id2, ...],
+    "category": "#Category",
+    "type": "buff" | "debuff" | "misc",
+    "stacking": true,      // optional - IDs represent stack levels
+    "stackStart": 1        // optional - first ID = this stack number (default: 1)
+}
+"""
+
+import bisect
+import copy
+import json
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Substring index granularity: queries at least this long are answered from
+# n-gram postings; shorter ones scan the precomputed lowercase names
+NGRAM = 3
+
+
+def _ngrams(text):
+    """Return the set of NGRAM-character substrings of text."""
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+# ============================================================================
+# SEARCH INDEX
+# ============================================================================
+class BuffSearchIndex:
+    """
+    Precomputed search structures for BuffDatabase.search().
+
+    Per entry: lowercase name, the IDs as one digit string, and the
+    (category, name) sort key. Across entries: trigram postings for names
+    and IDs, posting sets per category and per type, and a lazily rebuilt
+    list of all entries in result order.
+
+    Entries are keyed by an insertion sequence number, which also breaks
+    sort-key ties so results keep database order. Entry dicts are treated
+    as immutable once indexed — change them through BuffDatabase.update_buff().
+    """
+
+    def __init__(self, buffs=()):
+        """Index buffs (in database order)."""
+        self._entries = {}      # seq -> buff dict
+        self._seq_of = {}       # id(buff dict) -> seq
+        self._names = {}        # seq -> lowercase name
+        self._id_text = {}      # seq -> "id1 id2 ..."
+        self._sort_keys = {}    # seq -> (category, name, seq)
+        self._name_grams = {}   # ngram -> set of seq
+        self._id_grams = {}     # ngram -> set of seq
+        self._by_category = {}  # category -> set of seq
+        self._by_type = {}      # type -> set of seq
+        self._order = None      # all seqs in result order (None = stale)
+        self._next_seq = 0
+        for buff in buffs:
+            self.add(buff)
+
+    def __len__(self):
+        return len(self._entries)
+
+    # -------------------------------------------------------------------------
+    # Maintenance
+    # -------------------------------------------------------------------------
+
+    def add(self, buff, seq=None):
+        """Index one entry (seq reuses a removed entry's position). Returns its seq."""
+        if seq is None:
+            seq = self._next_seq
+            self._next_seq += 1
+        name = buff.get('name', '').lower()
+        id_text = " ".join(str(bid) for bid in buff.get('ids', []))
+        self._entries[seq] = buff
+        self._seq_of[id(buff)] = seq
+        self._names[seq] = name
+        self._id_text[seq] = id_text
+        self._sort_keys[seq] = (buff.get('category', ''), buff.get('name', ''), seq)
+        for gram in _ngrams(name):
+            self._name_grams.setdefault(gram, set()).add(seq)
+        for gram in _ngrams(id_text):
+            self._id_grams.setdefault(gram, set()).add(seq)
+        self._by_category.setdefault(buff.get('category'), set()).add(seq)
+        self._by_type.setdefault(buff.get('type', 'buff'), set()).add(seq)
+        self._order = None
+        return seq
+
+    def remove(self, buff):
+        """Drop one entry from the index. Returns its seq (None if not indexed)."""
+        seq = self._seq_of.pop(id(buff), None)
+        if seq is None:
+            return None
+        del self._entries[seq]
+        for gram in _ngrams(self._names.pop(seq)):
+            self._discard(self._name_grams, gram, seq)
+        for gram in _ngrams(self._id_text.pop(seq)):
+            self._discard(self._id_grams, gram, seq)
+        del self._sort_keys[seq]
+        self._discard(self._by_category, buff.get('category'), seq)
+        self._discard(self._by_type, buff.get('type', 'buff'), seq)
+        self._order = None
+        return seq
+
+    def replace(self, old, new):
+        """Swap old for new, keeping old's position among tied results."""
+        self.add(new, self.remove(old))
+
+    @staticmethod
+    def _discard(postings, key, seq):
+        members = postings.get(key)
+        if members is not None:
+            members.discard(seq)
+            if not members:
+                del postings[key]
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+
+    def _substring(self, query, texts, grams, within):
+        """Seqs whose text contains query, restricted to within (None = all)."""
+        if len(query) >= NGRAM:
+            postings = []
+            for gram in _ngrams(query):
+                members = grams.get(gram)
+                if not members:
+                    return set()
+                postings.append(members)
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for members in postings[1:]:
+                candidates &= members
+            if within is not None:
+                candidates &= within
+        else:
+            candidates = within if within is not None else texts.keys()
+        return {seq for seq in candidates if query in texts[seq]}
+
+    def search(self, query="", category=None, buff_type=None):
+        """Same contract as BuffDatabase.search(): matches sorted by (category, name)."""
+        within = None
+        if category:
+            within = set(self._by_category.get(category, ()))
+        if buff_type:
+            members = self._by_type.get(buff_type, set())
+            within = set(members) if within is None else within & members
+
+        query_lower = query.lower() if query else ""
+        if query_lower:
+            matches = self._substring(query_lower, self._names, self._name_grams, within)
+            if query_lower.isdigit():
+                matches |= self._substring(query_lower, self._id_text, self._id_grams, within)
+        elif within is not None:
+            matches = within
+        else:
+            return [self._entries[seq] for seq in self._sorted_all()]
+
+        # Small result sets sort directly; large ones filter the cached order
+        if len(matches) * 8 < len(self._entries):
+            ordered = sorted(matches, key=self._sort_keys.__getitem__)
+        else:
+            ordered = [seq for seq in self._sorted_all() if seq in matches]
+        return [self._entries[seq] for seq in ordered]
+
+    def _sorted_all(self):
+        if self._order is None:
+            self._order = sorted(self._entries, key=self._sort_keys.__getitem__)
+        return self._order
+
+
+# ============================================================================
+# BUFF DATABASE
+# ============================================================================
+class BuffDatabase:
+    """
+    Handles loading, searching, and managing the buff database.
+
+    add_buff/update_buff/remove_buff keep by_id, categories, grouped_buffs
+    and the search index current by touching only the affected entry. For
+    bulk changes use add_many() or a batch(), which rebuild once at the end.
+    """
+
+    def __init__(self):
+        self.buffs = []
+        self.categories = []
+        self.by_id = {}
+        self.grouped_buffs = []
+        self.search_index = BuffSearchIndex()
+        self._category_counts = {}
+        # Set when two entries share an ID: by_id then depends on list order,
+        # so mutations fall back to a full rebuild
+        self._id_collisions = False
+        self._batch_depth = 0
+        self._batch_dirty = False
+
+    def load(self, json_path):
+        """Load database from JSON file."""
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.buffs = data.get('buffs', [])
+            self._rebuild_indexes()
+            return True
+        except Exception as e:
+            logger.error("Error loading buff database: %s", e)
+            return False
+
+    def _rebuild_indexes(self):
+        """Rebuild internal indexes after data changes."""
+        self._rebuild_lookups()
+        self.search_index = BuffSearchIndex(self.buffs)
+
+    def _rebuild_lookups(self):
+        """Rebuild by_id, categories and grouped_buffs from self.buffs."""
+        counts = {}
+        self.by_id = {}
+        self._id_collisions = False
+        for b in self.buffs:
+            cat = b.get('category', 'Unknown')
+            counts[cat] = counts.get(cat, 0) + 1
+            ids = b.get('ids', [])
+            for bid in ids:
+                if bid in self.by_id:
+                    self._id_collisions = True
+                self.by_id[bid] = b
+        self._category_counts = counts
+        self.categories = sorted(counts)
+        self._group_buffs_by_name()
+
+    def _group_buffs_by_name(self):
+        """Group buffs by name for display purposes."""
+        # In v2 format, each entry is already properly grouped
+        # Just copy the buffs list to grouped_buffs
+        self.grouped_buffs = list(self.buffs)
+
+    def search(self, query="", category=None, buff_type=None):
+        """
+        Search buffs by query, category, and type.
+
+        Args:
+            query: Search string (case-insensitive substring of name or ID)
+            category: Category filter (None = all)
+            buff_type: Type filter - "buff", "debuff", "misc" (None = all)
+
+        Returns:
+            New list of matching entries sorted by (category, name)
+        """
+        return self.search_index.search(query, category, buff_type)
+
+    def get_by_id(self, buff_id):
+        """Get buff entry by ID."""
+        return self.by_id.get(buff_id)
+
+    def get_name(self, buff_id):
+        """Get buff name by ID."""
+        buff = self.by_id.get(buff_id)
+        return buff['name'] if buff else f"ID:{buff_id}"
+
+    def get_type(self, buff_id):
+        """Get buff type by ID (buff/debuff/misc)."""
+        buff = self.by_id.get(buff_id)
+        if buff:
+            return buff.get('type', 'buff')
+        return 'buff'
+
+    def is_debuff(self, buff_id):
+        """Check if buff is a debuff."""
+        return self.get_type(buff_id) == 'debuff'
+
+    def is_stacking(self, buff_id):
+        """Check if buff is a stacking buff."""
+        buff = self.by_id.get(buff_id)
+        if buff:
+            return buff.get('stacking', False)
+        return False
+
+    def get_stack_level(self, buff_id):
+        """
+        Get stack level for a buff ID.
+        Returns stackStart + index for stacking buffs.
+        Returns None if not a stacking buff or ID not found.
+        """
+        buff = self.by_id.get(buff_id)
+        if buff and buff.get('stacking', False):
+            ids = buff.get('ids', [])
+            stack_start = buff.get('stackStart', 1)
+            try:
+                return stack_start + ids.index(buff_id)
+            except ValueError:
+                return None
+        return None
+
+    def snapshot(self, ids=None):
+        """
+        Independent copy for reading on another thread (e.g. a build job).
+
+        Entries are deep-copied, so edits made to this database afterwards
+        (Database Editor, Import) never show through. Only the ID lookups
+        (get_by_id, get_type, get_stack_level, ...) are set up; the search
+        index stays empty.
+
+        Args:
+            ids: Only copy the entries these IDs resolve to (default: all)
+        """
+        snap = BuffDatabase()
+        source = self.by_id if ids is None else {bid: self.by_id[bid] for bid in ids if bid in self.by_id}
+        copies = {}
+        for bid, buff in source.items():
+            entry = copies.get(id(buff))
+            if entry is None:
+                entry = copies[id(buff)] = copy.deepcopy(buff)
+            snap.by_id[bid] = entry
+        snap.buffs = list(copies.values())
+        snap.grouped_buffs = list(snap.buffs)
+        for buff in snap.buffs:
+            cat = buff.get('category', 'Unknown')
+            snap._category_counts[cat] = snap._category_counts.get(cat, 0) + 1
+        snap.categories = sorted(snap._category_counts)
+        return snap
+
+    # -------------------------------------------------------------------------
+    # Mutations
+    # -------------------------------------------------------------------------
+
+    def add_buff(self, buff_data):
+        """Add a new buff entry."""
+        self.buffs.append(buff_data)
+        if self._batch_depth:
+            self._batch_dirty = True
+            return
+        self.search_index.add(buff_data)
+        self.grouped_buffs.append(buff_data)
+        self._link(buff_data)
+        self._settle()
+
+    def add_many(self, buffs):
+        """Add several entries with a single index rebuild."""
+        with self.batch():
+            for buff in buffs:
+                self.add_buff(buff)
+
+    def update_buff(self, old_ids, new_data):
+        """Update an existing buff entry."""
+        pos, buff = self._find(old_ids)
+        if buff is None:
+            return
+        self.buffs[pos] = new_data
+        if self._batch_depth:
+            self._batch_dirty = True
+            return
+        self.search_index.replace(buff, new_data)
+        self.grouped_buffs[pos] = new_data
+        self._unlink(buff)
+        self._link(new_data)
+        self._settle()
+
+    def remove_buff(self, ids):
+        """Remove every buff entry whose ID set equals ids."""
+        while True:
+            pos, buff = self._find(ids)
+            if buff is None:
+                return
+            del self.buffs[pos]
+            if self._batch_depth:
+                self._batch_dirty = True
+                continue
+            self.search_index.remove(buff)
+            del self.grouped_buffs[pos]
+            self._unlink(buff)
+            self._settle()
+
+    @contextmanager
+    def batch(self):
+        """
+        Defer index maintenance to one rebuild when the outermost batch exits.
+
+        Inside a batch, self.buffs is current but by_id, categories,
+        grouped_buffs and search() reflect the state before the batch.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._batch_dirty:
+                self._batch_dirty = False
+                self._rebuild_indexes()
+
+    def _find(self, ids):
+        """Return (position, entry) of the first entry whose ID set equals ids, or (None, None)."""
+        target = set(ids)
+        if self._batch_depth or self._id_collisions or not target:
+            candidates = self.buffs
+        else:
+            candidates = [self.by_id.get(bid) for bid in target]
+        for entry in candidates:
+            if entry is not None and set(entry.get('ids', [])) == target:
+                for pos, b in enumerate(self.buffs):
+                    if b is entry:
+                        return pos, entry
+        return None, None
+
+    def _link(self, buff):
+        """Add one entry to by_id and categories."""
+        for bid in buff.get('ids', []):
+            if bid in self.by_id:
+                self._id_collisions = True
+            self.by_id[bid] = buff
+        cat = buff.get('category', 'Unknown')
+        count = self._category_counts.get(cat, 0)
+        if count == 0:
+            bisect.insort(self.categories, cat)
+        self._category_counts[cat] = count + 1
+
+    def _unlink(self, buff):
+        """Remove one entry from by_id and categories."""
+        for bid in buff.get('ids', []):
+            if self.by_id.get(bid) is buff:
+                del self.by_id[bid]
+        cat = buff.get('category', 'Unknown')
+        count = self._category_counts.get(cat, 0) - 1
+        if count > 0:
+            self._category_counts[cat] = count
+            return
+        self._category_counts.pop(cat, None)
+        idx = bisect.bisect_left(self.categories, cat)
+        if idx < len(self.categories) and self.categories[idx] == cat:
+            del self.categories[idx]
+
+    def _settle(self):
+        """Fall back to a full lookup rebuild while any ID is shared by two entries."""
+        if self._id_collisions:
+            self._rebuild_lookups()
+
+    def save(self, json_path):
+        """Save database to JSON file."""
+        data = {
+            "version": 2,
+            "description": "KzGrids buff/debuff database v2",
+            "buffs": self.buffs
+        }
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,189 @@
+"""
+KzBuilder — Content-Addressed Build Cache
+Stores compiled SWFs keyed by a hash of everything MTASC reads, so an
+unchanged module is copied from disk instead of recompiled.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+
+from .build_utils import hash_file, hash_tree
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024   # 32 MB — roughly 100 full five-module builds
+CACHE_SUFFIX = ".swf"
+
+# Bump when the key layout changes so stale entries are never matched
+KEY_VERSION = "1"
+
+
+class BuildCache:
+    """
+    On-disk SWF cache with a size cap and least-recently-used eviction.
+
+    Each entry is a single <key>.swf file. Recency is tracked through the
+    file's mtime (touched on every hit), so the cache needs no index file
+    and survives being partially deleted by hand.
+
+    Usage:
+        cache = BuildCache(settings_path / "build_cache")
+        key = cache.make_key(compiler, classpaths, target_swf, sources)
+        if not cache.fetch(key, target_swf):
+            ... compile ...
+            cache.store(key, target_swf)
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        """Initialize the cache rooted at cache_dir (created on first store)."""
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------------------------------
+    # Keys
+    # -------------------------------------------------------------------------
+
+    def make_key(self, compiler_path, classpaths, target_swf, sources, extra_flags=None) -> str:
+        """
+        Hash every compile input into a cache key.
+
+        Args:
+            compiler_path: MTASC executable (its std/std8 libraries are included)
+            classpaths: Classpath directories passed with -cp
+            target_swf: The -swf file before compilation (the copied base SWF)
+            sources: Source .as path or list of paths
+            extra_flags: Additional MTASC flags
+
+        Returns:
+            Hex digest string
+        """
+        compiler_path = Path(compiler_path)
+        if not isinstance(sources, list):
+            sources = [sources]
+
+        h = hashlib.sha256()
+
+        def add(label, value):
+            h.update(label.encode('utf-8'))
+            h.update(b"=")
+            h.update(value.encode('utf-8'))
+            h.update(b"\n")
+
+        add("version", KEY_VERSION)
+        add("compiler", hash_file(compiler_path))
+        add("std", hash_tree(compiler_path.parent / "std"))
+        add("std8", hash_tree(compiler_path.parent / "std8"))
+        for cp in classpaths:
+            add("cp", hash_tree(cp))
+        add("swf", hash_file(target_swf))
+        for src in sources:
+            add("src:" + Path(src).name, hash_file(src))
+        for flag in extra_flags or []:
+            add("flag", str(flag))
+        return h.hexdigest()
+
+    def _entry(self, key) -> Path:
+        return self.cache_dir / f"{key}{CACHE_SUFFIX}"
+
+    # -------------------------------------------------------------------------
+    # Lookup / store
+    # -------------------------------------------------------------------------
+
+    def fetch(self, key, dest) -> bool:
+        """Copy the cached SWF for key to dest. Returns True on a hit."""
+        entry = self._entry(key)
+        with self._lock:
+            if not entry.exists():
+                self.misses += 1
+                return False
+            try:
+                shutil.copyfile(entry, dest)
+                os.utime(entry)   # mark as most recently used
+            except OSError as e:
+                logger.warning("Build cache read failed for %s: %s", entry.name, e)
+                self.misses += 1
+                return False
+            self.hits += 1
+            return True
+
+    def store(self, key, swf):
+        """Add a compiled SWF to the cache, then evict down to the size cap."""
+        entry = self._entry(key)
+        with self._lock:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                tmp = entry.with_name(f"{entry.name}.{threading.get_ident()}.tmp")
+                shutil.copyfile(swf, tmp)
+                os.replace(tmp, entry)
+            except OSError as e:
+                logger.warning("Build cache write failed for %s: %s", entry.name, e)
+                return
+            self._evict()
+
+    def _evict(self):
+        """Delete least-recently-used entries until the cache fits max_bytes."""
+        entries = []
+        total = 0
+        for f in self.cache_dir.glob(f"*{CACHE_SUFFIX}"):
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, f))
+            total += st.st_size
+        entries.sort()
+        for _, size, f in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                f.unlink()
+                total -= size
+            except OSError:
+                pass
+
+    # -------------------------------------------------------------------------
+    # Inspection
+    # -------------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        """Return {'entries', 'bytes', 'max_bytes', 'hits', 'misses'}."""
+        entries = 0
+        size = 0
+        if self.cache_dir.exists():
+            for f in self.cache_dir.glob(f"*{CACHE_SUFFIX}"):
+                try:
+                    size += f.stat().st_size
+                    entries += 1
+                except OSError:
+                    pass
+        return {
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def clear(self) -> int:
+        """Delete every cached SWF. Returns the number of entries removed."""
+        removed = 0
+        with self._lock:
+            if not self.cache_dir.exists():
+                return 0
+            for f in self.cache_dir.iterdir():
+                try:
+                    f.unlink()
+                    if f.suffix == CACHE_SUFFIX:
+                        removed += 1
+                except OSError:
+                    pass
+            self.hits = 0
+            self.misses = 0
+        return removed
@@ -0,0 +1,100 @@
+"""
+KzBuilder — Install Manifest
+Per-module change fingerprints recorded next to the installed SWFs, used by
+"Build Changed" to rebuild only modules whose inputs differ from what is
+installed.
+"""
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+from .build_utils import hash_file, hash_tree
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "KzBuilder_manifest.json"
+MANIFEST_VERSION = 1
+
+# Installed SWF per module (Flash/ folder)
+MODULE_SWFS = {
+    "KzGrids": "KzGrids.swf",
+    "DamageInfo": "DamageInfo.swf",
+    "KzCastbars": "KzCastbars.swf",
+    "KzTimers": "KzTimers.swf",
+    "KzStopwatch": "KzStopwatch.swf",
+}
+
+
+def compute_fingerprint(profile_data, asset_paths, app_version) -> str:
+    """
+    Hash a module's profile data and the assets it is built from.
+
+    Args:
+        profile_data: JSON-serializable module settings (tab.get_profile_data())
+        asset_paths: Files/directories the build reads (templates, base.swf,
+            stubs, compiler)
+        app_version: Builder version — generator changes invalidate fingerprints
+
+    Returns:
+        Hex digest string
+    """
+    h = hashlib.sha256()
+    h.update(app_version.encode('utf-8'))
+    h.update(b"\0")
+    h.update(json.dumps(profile_data, sort_keys=True, default=str).encode('utf-8'))
+    for path in asset_paths:
+        h.update(b"\0")
+        h.update(hash_tree(path).encode('ascii'))
+    return h.hexdigest()
+
+
+def load_manifest(flash_path) -> dict:
+    """Load {module: {'fingerprint', 'swf_sha256'}} from the Flash folder (empty if absent)."""
+    path = Path(flash_path) / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        logger.warning("Could not read build manifest %s: %s", path, e)
+        return {}
+    if data.get('version') != MANIFEST_VERSION:
+        return {}
+    return data.get('modules', {})
+
+
+def save_manifest(flash_path, modules):
+    """Write the manifest dict to the Flash folder."""
+    path = Path(flash_path) / MANIFEST_NAME
+    data = {'version': MANIFEST_VERSION, 'modules': modules}
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+    except OSError as e:
+        logger.warning("Could not write build manifest %s: %s", path, e)
+
+
+def manifest_entry(flash_path, module, fingerprint) -> dict:
+    """Build a manifest entry for a freshly installed module."""
+    swf = Path(flash_path) / MODULE_SWFS[module]
+    return {
+        'fingerprint': fingerprint,
+        'swf_sha256': hash_file(swf) if swf.exists() else None,
+    }
+
+
+def is_up_to_date(manifest, flash_path, module, fingerprint) -> bool:
+    """
+    True if module was last installed from identical inputs and its SWF
+    has not been replaced since (e.g. by a per-tab Build).
+    """
+    entry = manifest.get(module)
+    if not entry or entry.get('fingerprint') != fingerprint:
+        return False
+    swf = Path(flash_path) / MODULE_SWFS[module]
+    if not swf.exists():
+        return False
+    return hash_file(swf) == entry.get('swf_sha256')
@@ -0,0 +1,107 @@
+"""
+KzBuilder — Build Scheduler
+Runs independent module builds on a worker pool and streams progress
+back to the Tk thread.
+"""
+
+import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Worker count: one per module is enough — builds are dominated by MTASC
+# subprocesses, so threads spend their time waiting, not holding the GIL.
+DEFAULT_MAX_WORKERS = 5
+
+# How often the Tk thread wakes up to drain progress events (seconds)
+POLL_INTERVAL = 0.05
+
+
+def failed_job(message: str) -> Callable[[], Tuple[bool, str]]:
+    """Return a job that fails immediately with message (pre-check errors)."""
+    return lambda: (False, message)
+
+
+class BuildScheduler:
+    """
+    Run module build jobs concurrently.
+
+    Jobs are plain callables returning (success, message), the same contract
+    as every build_*() function. They must not touch Tk widgets — all profile
+    data has to be collected on the Tk thread before the job is submitted.
+
+    Usage:
+        scheduler = BuildScheduler()
+        scheduler.add_job("KzGrids", functools.partial(build_grids, ...))
+        results = scheduler.run(on_progress=callback, pump=root.update)
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS):
+        """Initialize an empty scheduler with the given worker pool size."""
+        self.max_workers = max_workers
+        self._jobs = []
+        self._events = queue.Queue()
+
+    def add_job(self, name: str, job: Callable[[], Tuple[bool, str]]):
+        """Queue a named build job. Names must be unique per run."""
+        self._jobs.append((name, job))
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def _run_job(self, name, job):
+        """Worker body: run one job, report start/finish, never raise."""
+        self._events.put((name, "started", None))
+        try:
+            result = job()
+        except Exception as e:
+            logger.error("Build job %s crashed: %s", name, e)
+            result = (False, f"Build error: {e}")
+        self._events.put((name, "finished", result))
+        return result
+
+    def run(self, on_progress=None, pump=None) -> Dict[str, Tuple[bool, str]]:
+        """
+        Run all queued jobs and block until they finish.
+
+        Args:
+            on_progress: Called on the calling thread as
+                on_progress(name, state, done, total) where state is
+                "started" or "finished"
+            pump: Called between progress polls to keep the UI responsive
+                (typically the Tk root's update method)
+
+        Returns:
+            Dict of {name: (success, message)} in submission order
+        """
+        total = len(self._jobs)
+        results = {}
+        if total == 0:
+            return results
+
+        done = 0
+        workers = max(1, min(self.max_workers, total))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kzbuild") as pool:
+            for name, job in self._jobs:
+                pool.submit(self._run_job, name, job)
+
+            while done < total:
+                try:
+                    name, state, result = self._events.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    if pump:
+                        pump()
+                    continue
+                if state == "finished":
+                    results[name] = result
+                    done += 1
+                if on_progress:
+                    on_progress(name, state, done, total)
+                if pump:
+                    pump()
+
+        order = [name for name, _ in self._jobs]
+        self._jobs = []
+        return {name: results[name] for name in order}
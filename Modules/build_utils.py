@@ -3,9 +3,67 @@ KzBuilder — Shared Build Utilities
 Common functions used across all module generators.
 """
 
-import subprocess
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
+from .compiler_backend import MtascBackend
+
+# File digest memo: {resolved path: ((mtime_ns, size), hexdigest)}
+# Classpath trees are re-hashed on every build; this skips re-reading
+# files whose stat signature has not changed.
+_digest_memo = {}
+_DIGEST_MEMO_MAX = 4096
+_digest_lock = threading.Lock()
+
+# Optional BuildCache consulted by compile_as2 (see build_cache.py)
+_build_cache = None
+
+# Backend that actually runs the compiler (see compiler_backend.py)
+_compiler_backend = MtascBackend()
+
+# Per-thread stage timing collector (see record_build_stages)
+_stage_local = threading.local()
+
+# Active compile session: {directory: digest} shared by every module in one
+# build so std/std8/common_stubs are walked once, not once per module
+_session_trees = None
+
+
+@contextmanager
+def build_stage(name):
+    """Time a build step when stage recording is active on this thread.
+
+    No-op otherwise, so build functions can be instrumented unconditionally.
+    Standard names: generate, write_temp, copy_base, compile, copy_output.
+    """
+    timings = getattr(_stage_local, 'timings', None)
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+@contextmanager
+def record_build_stages():
+    """Collect build_stage() timings for builds run on this thread.
+
+    Yields a dict of {stage name: seconds} filled in as stages complete.
+    """
+    outer = getattr(_stage_local, 'timings', None)
+    timings = {}
+    _stage_local.timings = timings
+    try:
+        yield timings
+    finally:
+        _stage_local.timings = outer
+
 
 def escape_as2_string(s: str) -> str:
     """Escape a string for safe inclusion in AS2 string literals."""
@@ -31,27 +89,120 @@ def find_compiler(assets_path, app_path):
     return None
 
 
-def compile_as2(compiler_path, classpaths, base_swf, source_as, cwd, timeout=60, extra_flags=None):
-    """Run MTASC compiler. Returns (success, error_message_or_empty)."""
-    cmd = [str(compiler_path)]
-    for cp in classpaths:
-        if Path(cp).exists():
-            cmd.extend(["-cp", str(cp)])
-    if extra_flags:
-        cmd.extend(extra_flags)
-    cmd.extend(["-swf", str(base_swf), "-version", "8"])
-    if isinstance(source_as, list):
-        for sa in source_as:
-            cmd.append(str(sa))
-    else:
-        cmd.append(str(source_as))
+def hash_file(path) -> str:
+    """Return the SHA-256 hex digest of a file, memoized on (mtime, size)."""
+    path = Path(path).resolve()
+    st = path.stat()
+    sig = (st.st_mtime_ns, st.st_size)
+    with _digest_lock:
+        cached = _digest_memo.get(path)
+    if cached and cached[0] == sig:
+        return cached[1]
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()
+    with _digest_lock:
+        if len(_digest_memo) > _DIGEST_MEMO_MAX:
+            _digest_memo.clear()   # temp build dirs never repeat; don't grow forever
+        _digest_memo[path] = (sig, digest)
+    return digest
+
+
+def hash_tree(path) -> str:
+    """Return a digest over every file (relative name + content) under a directory.
+
+    A single file is hashed directly; a missing path hashes to a fixed marker
+    so that adding it later changes the digest.
+    """
+    path = Path(path)
+    if not path.exists():
+        return "missing"
+    if path.is_file():
+        return hash_file(path)
+    session = _session_trees
+    if session is not None:
+        key = path.resolve()
+        with _digest_lock:
+            cached = session.get(key)
+        if cached:
+            return cached
+    h = hashlib.sha256()
+    for f in sorted(p for p in path.rglob("*") if p.is_file()):
+        h.update(f.relative_to(path).as_posix().encode('utf-8'))
+        h.update(b"\0")
+        h.update(hash_file(f).encode('ascii'))
+    digest = h.hexdigest()
+    if session is not None:
+        with _digest_lock:
+            session[key] = digest
+    return digest
+
+
+@contextmanager
+def compile_session():
+    """Share classpath digests across every compile_as2 call in one build.
+
+    Directories are assumed not to change while the session is open —
+    open it around the compile phase only, not around source generation
+    into a classpath directory.
+    """
+    global _session_trees
+    outer = _session_trees
+    if outer is None:
+        _session_trees = {}
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, cwd=str(cwd), timeout=timeout)
-    except subprocess.TimeoutExpired:
-        return False, f"MTASC compilation timed out after {timeout}s"
-    if result.returncode != 0:
-        error = result.stderr or result.stdout or f"Unknown MTASC error (exit code {result.returncode})"
-        return False, error
+        yield
+    finally:
+        _session_trees = outer
+
+
+def set_build_cache(cache):
+    """Install the BuildCache used by compile_as2 (None disables caching)."""
+    global _build_cache
+    _build_cache = cache
+
+
+def get_build_cache():
+    """Return the active BuildCache, or None."""
+    return _build_cache
+
+
+def set_compiler_backend(backend):
+    """Install the CompilerBackend used by compile_as2 (None restores MTASC)."""
+    global _compiler_backend
+    _compiler_backend = backend if backend is not None else MtascBackend()
+
+
+def get_compiler_backend():
+    """Return the active CompilerBackend."""
+    return _compiler_backend
+
+
+def compile_as2(compiler_path, classpaths, base_swf, source_as, cwd, timeout=60, extra_flags=None):
+    """Run MTASC compiler. Returns (success, error_message_or_empty).
+
+    When a build cache is installed and an identical compile has been seen
+    before, the cached SWF is copied over base_swf and MTASC is skipped.
+    """
+    classpaths = [cp for cp in classpaths if Path(cp).exists()]
+    sources = source_as if isinstance(source_as, list) else [source_as]
+
+    cache = _build_cache
+    cache_key = None
+    if cache is not None:
+        target = Path(cwd) / base_swf
+        try:
+            cache_key = cache.make_key(compiler_path, classpaths, target,
+                                       [Path(cwd) / sa for sa in sources], extra_flags)
+        except OSError:
+            cache_key = None
+        if cache_key and cache.fetch(cache_key, target):
+            return True, ""
+
+    ok, err = _compiler_backend.run(compiler_path, classpaths, base_swf, sources, cwd,
+                                    timeout=timeout, extra_flags=extra_flags)
+    if not ok:
+        return False, err
+    if cache_key:
+        cache.store(cache_key, Path(cwd) / base_swf)
     return True, ""
 
 
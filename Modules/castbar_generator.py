@@ -11,7 +11,8 @@ from pathlib import Path
 from typing import Tuple
 
 from .castbar_settings import validate_all_settings, STYLE_COLOR_MULT, STYLE_COLOR_OFFS, BAR_STYLE_LINKAGE
-from .build_utils import compile_as2, resolve_assets_path
+from .build_utils import build_stage, compile_as2, resolve_assets_path
+from .template_engine import load_template
 
 
 # =============================================================================
@@ -19,11 +20,9 @@ from .build_utils import compile_as2, resolve_assets_path
 # =============================================================================
 
 def _load_template(assets_path=None):
-    """Load AS2 template from external file."""
+    """Load the AS2 template (parsed once, cached until the file changes)."""
     base = resolve_assets_path(assets_path)
-    template_path = base / "castbars" / "KzCastbars.as.template"
-    with open(template_path, 'r', encoding='utf-8') as f:
-        return f.read()
+    return load_template(base / "castbars" / "KzCastbars.as.template")
 
 
 # =============================================================================
@@ -81,9 +80,7 @@ def generate_castbar_code(settings: dict, assets_path=None) -> str:
         "COLOR_MULT": color_mult,
         "COLOR_OFFS": color_offs,
     }
-    for key, value in replacements.items():
-        template = template.replace(f"%%{key}%%", str(value))
-    return template
+    return template.render(replacements)
 
 
 # =============================================================================
@@ -125,26 +122,31 @@ def build_castbars(
     temp_dir = None
     try:
         # Step 1: Generate AS2 code
-        code = generate_castbar_code(settings, assets_path=str(castbars_path.parent))
+        with build_stage("generate"):
+            code = generate_castbar_code(settings, assets_path=str(castbars_path.parent))
 
         # Step 2: Write to temp .as file
-        temp_dir = tempfile.mkdtemp(prefix="castbars_")
-        temp_as = Path(temp_dir) / "KzCastbars.as"
-        with open(temp_as, 'w', encoding='utf-8') as f:
-            f.write(code)
+        with build_stage("write_temp"):
+            temp_dir = tempfile.mkdtemp(prefix="castbars_")
+            temp_as = Path(temp_dir) / "KzCastbars.as"
+            with open(temp_as, 'w', encoding='utf-8') as f:
+                f.write(code)
 
         # Step 3: Copy base.swf to output location
-        output_swf.parent.mkdir(parents=True, exist_ok=True)
-        temp_swf = Path(temp_dir) / "KzCastbars_temp.swf"
-        shutil.copy2(base_swf, temp_swf)
+        with build_stage("copy_base"):
+            output_swf.parent.mkdir(parents=True, exist_ok=True)
+            temp_swf = Path(temp_dir) / "KzCastbars_temp.swf"
+            shutil.copy2(base_swf, temp_swf)
 
         # Step 4: Compile
-        ok, err = compile_as2(compiler_path, [stubs_path, common_stubs], temp_swf, temp_as, temp_dir)
+        with build_stage("compile"):
+            ok, err = compile_as2(compiler_path, [stubs_path, common_stubs], temp_swf, temp_as, temp_dir)
         if not ok:
             return False, f"MTASC compilation failed:\n{err}"
 
         # Step 5: Move to final location
-        shutil.copy2(temp_swf, output_swf)
+        with build_stage("copy_output"):
+            shutil.copy2(temp_swf, output_swf)
 
         output_size = output_swf.stat().st_size
         return True, f"KzCastbars.swf built successfully ({output_size:,} bytes)"
@@ -0,0 +1,63 @@
+"""
+KzBuilder — Clocks
+Time sources for the Live Tracker.
+
+BossTimer, CombatLogMonitor and the Live Tracker loop read time through
+one shared clock object instead of calling the time module directly, so a
+replay or a test can drive all three with VirtualClock and get the same
+phase timing as a live raid without waiting for it.
+
+The live default is MonotonicClock: wall-clock adjustments (NTP, DST, the
+user fixing their clock mid-raid) never shift a running cycle.
+"""
+
+import time
+
+
+class Clock:
+    """Base clock: now() returns seconds as a float (only differences matter)."""
+
+    def now(self) -> float:
+        raise NotImplementedError
+
+
+class MonotonicClock(Clock):
+    """
+    Monotonic high-resolution time (time.perf_counter).
+
+    Never goes backwards and is unaffected by system clock changes. The
+    epoch is arbitrary, so values are only meaningful as differences.
+    """
+
+    def now(self) -> float:
+        return time.perf_counter()
+
+
+class SystemClock(Clock):
+    """Wall-clock time (time.time). Can jump; prefer MonotonicClock for timing."""
+
+    def now(self) -> float:
+        return time.time()
+
+
+class VirtualClock(Clock):
+    """
+    Manually driven clock.
+
+    Time only moves when set() or advance() is called, so replays and tests
+    are deterministic and can run as fast as the CPU allows.
+    """
+
+    def __init__(self, start=0.0):
+        self._now = float(start)
+
+    def now(self) -> float:
+        return self._now
+
+    def set(self, value):
+        """Move to an absolute time (never backwards)."""
+        self._now = max(self._now, float(value))
+
+    def advance(self, seconds):
+        """Move forward by seconds."""
+        self._now += max(0.0, float(seconds))
@@ -3,17 +3,34 @@ Combat Log Monitor Module for KzBuilder 3.3.6
 Daemon thread that monitors Age of Conan combat logs for boss mechanics.
 """
 
-import time
+import logging
 import threading
 from pathlib import Path
 
+from .log_reader import LogLineReader
+from .log_triggers import TriggerEngine
+from .log_watcher import create_watcher, CREATED, PollingWatcher
+
+logger = logging.getLogger(__name__)
+
 
 class CombatLogMonitor:
     """
-    Monitors AoC combat log files for Ethram-Fal boss triggers.
+    Monitors AoC combat log files for boss encounter triggers.
 
     Runs in a daemon thread, automatically detects new log files,
-    and calls the boss_timer methods when triggers are found.
+    and calls the boss_timer methods when triggers are found. The thread
+    sleeps in a LogWatcher (see log_watcher.py) between reads: inotify on
+    Linux, folder change notifications on Windows, adaptive polling
+    otherwise (also if the requested watcher cannot be created).
+
+    Triggers are applied to the boss timer directly, or, when an event_sink
+    is given, handed to it as boss_timer.TimerEvents so another thread (the
+    Tk thread) can apply them.
+
+    Time comes from the BossTimer's clock (see clock.py): each batch of lines
+    is stamped with the clock time it was read, and that stamp, not the
+    moment a handler happens to run, is what starts a cycle.
 
     Usage:
         monitor = CombatLogMonitor(boss_timer)
@@ -23,26 +40,41 @@ class CombatLogMonitor:
         monitor.stop_monitoring()
     """
 
-    # Combat log trigger patterns
-    TRIGGER_SEED = "Viscous Seed"
-    TRIGGER_FIXATION = "Lotus Fixation"
-    TRIGGER_SYPHON = "Syphon hits"
+    # Longest wait between reads when the watcher reports nothing; bounds
+    # how late truncation and the newer-log check are noticed
+    IDLE_WAKE = 1.0
+
+    # Seconds between checks for a newer CombatLog file
+    NEW_LOG_CHECK = 30
 
-    def __init__(self, boss_timer):
+    def __init__(self, boss_timer, watcher="auto", clock=None, event_sink=None):
         """
         Initialize the combat log monitor.
 
         Args:
             boss_timer: BossTimer instance to call when triggers detected
+            watcher: Watcher kind for log_watcher.create_watcher() ("auto",
+                "inotify", "windows", "polling") or a callable(folder) -> LogWatcher
+            clock: clock.Clock for line timestamps (default: the boss
+                timer's clock, so both measure time the same way)
+            event_sink: Optional thread-safe callable(TimerEvent), e.g.
+                TrackerScheduler.post; the monitor thread then never touches
+                boss_timer state itself
         """
         self.boss_timer = boss_timer
+        self.clock = clock or boss_timer.clock
+        self.triggers = TriggerEngine()
+        boss_timer.register_triggers(self.triggers, sink=event_sink)
+        self.watcher_kind = watcher
+        self.watcher = None
         self.log_path = None
         self.log_folder = None
         self.monitoring = False
         self.monitor_thread = None
         self.last_position = 0
-        self.last_file_check = 0
-        self.file_handle = None
+        self.last_file_check = None
+        self.last_read_time = None
+        self.reader = None
         self._lock = threading.Lock()
 
     def set_log_folder(self, folder):
@@ -58,6 +90,7 @@ class CombatLogMonitor:
         self.log_folder = folder
         latest = self.find_latest_log()
         if latest:
+            self._close_reader()
             self.log_path = latest
             p = Path(latest)
             if p.exists():
@@ -69,19 +102,14 @@ class CombatLogMonitor:
     def rescan_log(self):
         """
         Manually rescan for the latest combat log file.
-        Resets the file handle and position to the end of the new log.
+        Resets the reader and position to the end of the new log.
 
         Returns:
             str: Path to latest log file, or None if not found
         """
         latest = self.find_latest_log()
         if latest:
-            if self.file_handle:
-                try:
-                    self.file_handle.close()
-                except (IOError, OSError):
-                    pass
-                self.file_handle = None
+            self._close_reader()
             self.log_path = latest
             p = Path(latest)
             if p.exists():
@@ -97,6 +125,7 @@ class CombatLogMonitor:
         Args:
             path: Full path to a CombatLog*.txt file
         """
+        self._close_reader()
         self.log_path = path
         self.log_folder = str(Path(path).parent)
         p = Path(path)
@@ -156,16 +185,13 @@ class CombatLogMonitor:
         return True
 
     def stop_monitoring(self):
-        """Stop the monitoring thread and close file handle."""
+        """Stop the monitoring thread and close the log reader."""
         with self._lock:
             self.monitoring = False
+            if self.watcher:
+                self.watcher.wake()
 
-        if self.file_handle:
-            try:
-                self.file_handle.close()
-            except (IOError, OSError):
-                pass
-            self.file_handle = None
+        self._close_reader()
 
     def is_monitoring(self):
         """Check if monitor is currently running."""
@@ -173,15 +199,16 @@ class CombatLogMonitor:
 
     def _check_for_newer_log(self):
         """
-        Check for a newer log file every 30 seconds.
+        Check for a newer log file every NEW_LOG_CHECK seconds.
         Switches to new log if found.
 
         Returns:
             bool: True if switched to a new log
         """
         try:
-            current_time = time.time()
-            if current_time - self.last_file_check < 30:
+            current_time = self.clock.now()
+            if (self.last_file_check is not None and
+                    current_time - self.last_file_check < self.NEW_LOG_CHECK):
                 return False
             self.last_file_check = current_time
 
@@ -198,9 +225,7 @@ class CombatLogMonitor:
 
             if newest_log and newest_log != self.log_path:
                 # Switch to newer log
-                if self.file_handle:
-                    self.file_handle.close()
-                    self.file_handle = None
+                self._close_reader()
                 self.log_path = newest_log
                 self.last_position = 0
                 return True
@@ -211,100 +236,76 @@ class CombatLogMonitor:
 
     def _monitor_loop(self):
         """Main monitoring loop - runs in daemon thread."""
-        while self.monitoring:
-            try:
-                self._check_for_newer_log()
-
-                # Handle log file truncation/rotation
-                log = Path(self.log_path)
-                if log.exists():
-                    current_size = log.stat().st_size
-                    if current_size < self.last_position:
-                        # Log was truncated/rotated
-                        self.last_position = 0
-                        if self.file_handle:
-                            self.file_handle.close()
-                            self.file_handle = None
-
-                # Open file if needed
-                if self.file_handle is None:
-                    self.file_handle = open(
-                        self.log_path, 'r',
-                        encoding='utf-8', errors='replace'
-                    )
-
-                # Read new content
-                self.file_handle.seek(self.last_position)
-                new_content = self.file_handle.read()
-                self.last_position = self.file_handle.tell()
-
-                # Process new lines
-                if new_content:
-                    for line in new_content.splitlines():
-                        if (self.TRIGGER_SEED in line or
-                            self.TRIGGER_FIXATION in line or
-                            self.TRIGGER_SYPHON in line):
-                            self._process_line(line)
-
-            except (IOError, OSError):
-                # Handle file access errors gracefully
-                if self.file_handle:
-                    try:
-                        self.file_handle.close()
-                    except (IOError, OSError):
-                        pass
-                    self.file_handle = None
-
-            # 100ms polling interval
-            time.sleep(0.1)
-
-    def _process_line(self, line):
+        folder = self.log_folder or str(Path(self.log_path).parent)
+        try:
+            watcher = create_watcher(folder, self.watcher_kind)
+        except OSError as e:
+            logger.warning("Log watcher %r unavailable (%s), polling instead", self.watcher_kind, e)
+            watcher = PollingWatcher(folder)
+        with self._lock:
+            self.watcher = watcher
+        try:
+            while self.monitoring:
+                had_data = self._read_new_lines()
+                watcher.note_activity(had_data)
+                if watcher.wait(self.IDLE_WAKE) & CREATED:
+                    # A new log appeared: switch now instead of at the next 30s check
+                    self.last_file_check = None
+        finally:
+            with self._lock:
+                self.watcher = None
+            watcher.close()
+
+    def _read_new_lines(self):
         """
-        Process a combat log line for triggers.
+        Read and process every complete line appended since last_position.
 
-        Args:
-            line: Single line from combat log
+        Lines are streamed by LogLineReader: a line the game has only half
+        written is held back until its newline arrives, and a long backlog
+        is processed in bounded chunks.
+
+        Returns:
+            bool: True if any new line was read
         """
-        # Syphon check (highest priority - interrupts timer)
-        if "Ethram-Fal's Syphon hits" in line:
-            self.boss_timer.start_syphon()
-            return
-
-        # Seed check
-        if "Ethram-Fal afflicts" in line and "with Viscous Seed" in line:
-            if "afflicts you with" in line:
-                player = "YOU"
-            else:
-                player = self._extract_player(line, "afflicts", "with Viscous Seed")
-            self.boss_timer.start_cycle(player)
-            return
-
-        # Fixation check
-        if "The Emerald Lotus afflicts" in line and "with Lotus Fixation" in line:
-            if "afflicts you with" in line:
-                player = "YOU"
-            else:
-                player = self._extract_player(
-                    line, "The Emerald Lotus afflicts", "with Lotus Fixation"
-                )
-            self.boss_timer.update_fixation(player)
-            return
+        had_data = False
+        try:
+            self._check_for_newer_log()
+
+            if self.reader is None:
+                self.reader = LogLineReader(self.log_path, self.last_position)
 
-    def _extract_player(self, line, before_text, after_text):
+            read_at = self.clock.now()
+            for line in self.reader.read_lines():
+                had_data = True
+                self._process_line(line, read_at)
+            if had_data:
+                self.last_read_time = read_at
+
+        except (IOError, OSError):
+            # Handle file access errors gracefully (reopened on the next read,
+            # position and any partial line are kept)
+            if self.reader:
+                self.reader.close()
+
+        if self.reader:
+            self.last_position = self.reader.position
+        return had_data
+
+    def _close_reader(self):
+        """Close and drop the log reader (next read starts at last_position)."""
+        if self.reader:
+            self.reader.close()
+            self.reader = None
+
+    def _process_line(self, line, read_at=None):
         """
-        Extract player name from between two text markers.
+        Process a combat log line for triggers.
 
         Args:
-            line: Full log line
-            before_text: Text that appears before the player name
-            after_text: Text that appears after the player name
+            line: Single line from combat log
+            read_at: Clock time the line was read (default: when handled)
 
         Returns:
-            str: Extracted player name, or "Unknown" if extraction fails
+            TriggerMatch or None
         """
-        try:
-            start = line.find(before_text) + len(before_text)
-            end = line.find(after_text)
-            return line[start:end].strip()
-        except (ValueError, IndexError):
-            return "Unknown"
+        return self.triggers.dispatch(line, read_at)
@@ -0,0 +1,108 @@
+"""
+KzBuilder — Compiler Backends
+Pluggable drivers behind build_utils.compile_as2().
+
+MTASC has no resident/server mode and writes exactly one SWF per
+invocation, so every backend runs one compile per call. What a backend
+controls is *how* that compile runs: the real mtasc.exe, a stand-in
+executable for tests and benchmarks, or an in-process stub.
+"""
+
+import subprocess
+from pathlib import Path
+from typing import List, Tuple
+
+
+class CompilerBackend:
+    """
+    Base compiler backend.
+
+    Subclasses override command() to change the argv, or run() to replace
+    process execution entirely. Install one with
+    build_utils.set_compiler_backend().
+    """
+
+    name = "base"
+
+    def command(self, compiler_path, classpaths, target_swf, sources, extra_flags=None) -> List[str]:
+        """Return the MTASC-style argv for one compile."""
+        cmd = [str(compiler_path)]
+        for cp in classpaths:
+            cmd.extend(["-cp", str(cp)])
+        if extra_flags:
+            cmd.extend(extra_flags)
+        cmd.extend(["-swf", str(target_swf), "-version", "8"])
+        for src in sources:
+            cmd.append(str(src))
+        return cmd
+
+    def run(self, compiler_path, classpaths, target_swf, sources, cwd,
+            timeout=60, extra_flags=None) -> Tuple[bool, str]:
+        """Compile sources into target_swf. Returns (success, error_message_or_empty)."""
+        cmd = self.command(compiler_path, classpaths, target_swf, sources, extra_flags)
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, cwd=str(cwd), timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return False, f"MTASC compilation timed out after {timeout}s"
+        except OSError as e:
+            return False, f"Could not start compiler {cmd[0]}: {e}"
+        if result.returncode != 0:
+            error = result.stderr or result.stdout or f"Unknown MTASC error (exit code {result.returncode})"
+            return False, error
+        return True, ""
+
+
+class MtascBackend(CompilerBackend):
+    """Run the bundled mtasc.exe (default)."""
+
+    name = "mtasc"
+
+
+class CommandBackend(CompilerBackend):
+    """
+    Run a stand-in executable with MTASC's arguments.
+
+    The compiler_path passed by the generators is replaced by argv, so a
+    test can drive the full build with e.g.
+    CommandBackend([sys.executable, "fake_mtasc.py"]).
+    """
+
+    name = "command"
+
+    def __init__(self, argv):
+        """Initialize with the argv prefix that replaces the compiler path."""
+        self.argv = [str(a) for a in argv]
+
+    def command(self, compiler_path, classpaths, target_swf, sources, extra_flags=None) -> List[str]:
+        """Return argv prefix + MTASC arguments."""
+        return self.argv + super().command(compiler_path, classpaths, target_swf, sources, extra_flags)[1:]
+
+
+class StubBackend(CompilerBackend):
+    """
+    In-process stand-in: appends a marker to the target SWF, no subprocess.
+
+    For headless benchmarks and tests on machines that cannot run mtasc.exe.
+    Records every call in self.calls.
+    """
+
+    name = "stub"
+
+    def __init__(self, marker=b"KZSTUB"):
+        """Initialize with the bytes appended to each compiled SWF."""
+        self.marker = marker
+        self.calls = []
+
+    def run(self, compiler_path, classpaths, target_swf, sources, cwd,
+            timeout=60, extra_flags=None) -> Tuple[bool, str]:
+        """Verify inputs exist, then append the marker to target_swf."""
+        target = Path(cwd) / target_swf
+        self.calls.append(self.command(compiler_path, classpaths, target_swf, sources, extra_flags))
+        for src in sources:
+            if not (Path(cwd) / src).exists():
+                return False, f"type error: source not found {src}"
+        if not target.exists():
+            return False, f"SWF not found {target_swf}"
+        with open(target, 'ab') as f:
+            f.write(self.marker)
+        return True, ""
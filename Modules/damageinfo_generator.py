@@ -1,18 +1,38 @@
 """
 DamageInfo Generator for KzBuilder 3.3.6
 Handles AS2 code modification and MTASC compilation for DamageInfo.swf.
+
+Settings are applied by a patch engine: every GLOBAL_SETTINGS pattern is
+compiled once at import, each source file is scanned once for all of its
+patch sites, and the value spans found are cached as a patch map for the
+pristine file (re-scanned only when the file changes on disk). Rendering
+is then a single splice per file, cheap enough for a live preview. A
+setting whose pattern no longer matches raises PatchMapError instead of
+being skipped with a warning.
+
+Builds use an overlay classpath: only the handful of files the settings
+patch are written to a small directory, which goes on the MTASC classpath
+after the read-only pristine __Packages tree (MTASC searches the last -cp
+first, so the patched copies shadow the originals). Overlay directories are
+keyed by a hash of the settings and the pristine sources, so rebuilding
+with unchanged settings reuses the previous one.
 """
 
+import hashlib
+import json
 import logging
+import os
 import re
 import shutil
 import tempfile
+import threading
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 
 logger = logging.getLogger(__name__)
 
-from Modules.build_utils import compile_as2
+from Modules.build_utils import build_stage, compile_as2, hash_tree
 
 from .damageinfo_settings import (
     GLOBAL_SETTINGS,
@@ -22,6 +42,154 @@ from .damageinfo_settings import (
 )
 
 
+# Bump when generated output changes for the same settings (invalidates overlays)
+OVERLAY_VERSION = 1
+
+# Overlay directories kept per root (least recently used are removed)
+MAX_OVERLAYS = 8
+
+DEFAULT_OVERLAY_ROOT = Path(tempfile.gettempdir()) / "kzbuilder_damageinfo"
+
+ENTRY_POINT = "MainDamageNumbers.as"
+
+
+class PatchMapError(Exception):
+    """The pristine sources no longer contain a patch site the settings need."""
+
+
+@dataclass(frozen=True)
+class PatchSite:
+    """A compiled setting pattern. Groups 2..n are the values it replaces."""
+    key: str
+    regex: re.Pattern
+    anchor: str             # literal text every match starts with
+
+
+@dataclass(frozen=True)
+class PatchMap:
+    """Where each setting's values sit in one pristine file."""
+    signature: Tuple[int, int]                  # (mtime_ns, size) when scanned
+    content: str
+    spans: Tuple[Tuple[int, int, str], ...]     # (start, end, setting key), in file order
+
+
+def _literal_prefix(pattern: str) -> str:
+    """Leading literal text of a setting pattern (up to the first regex construct)."""
+    prefix = []
+    i = 1 if pattern.startswith("(") else 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\" and i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+            prefix.append(pattern[i + 1])
+            i += 2
+        elif c in "\\()[]{}.*+?|^$":
+            break
+        else:
+            prefix.append(c)
+            i += 1
+    # A quantifier applies to the last literal character: don't require it
+    if i < len(pattern) and pattern[i] in "*?{" and prefix:
+        prefix.pop()
+    return "".join(prefix)
+
+
+def _compile_sites() -> Dict[str, List[PatchSite]]:
+    """Compile every GLOBAL_SETTINGS pattern, grouped by file."""
+    sites = {}
+    for key, meta in GLOBAL_SETTINGS.items():
+        regex = re.compile(meta["pattern"])
+        anchor = _literal_prefix(meta["pattern"])
+        if not anchor or regex.groups < 2:
+            raise ValueError(f"Setting {key!r}: pattern needs a literal prefix and a value group")
+        sites.setdefault(meta["file"], []).append(PatchSite(key, regex, anchor))
+    return sites
+
+
+# {relative file path: [PatchSite, ...]}, compiled once
+_SITES = _compile_sites()
+
+# One pass per file finds every candidate position (longest anchors first)
+_ANCHORS = {
+    file_path: re.compile("(?=(?:%s))" % "|".join(
+        re.escape(a) for a in sorted({s.anchor for s in sites}, key=len, reverse=True)))
+    for file_path, sites in _SITES.items()
+}
+
+# Patch map cache: {resolved path: PatchMap}
+_patch_maps = {}
+_patch_lock = threading.Lock()
+
+
+def scan_patch_sites(file_path: str, content: str) -> Tuple[Tuple[int, int, str], ...]:
+    """
+    Locate every patch site of file_path's settings in content in one scan.
+
+    Returns:
+        (start, end, setting key) value spans, in file order
+
+    Raises:
+        PatchMapError: If a setting has no site or two sites overlap
+    """
+    sites = _SITES.get(file_path, [])
+    spans = []
+    found = set()
+    ends = {}               # key -> end of its last match (matches don't overlap, as re.sub)
+    for hit in _ANCHORS[file_path].finditer(content):
+        pos = hit.start()
+        for site in sites:
+            if pos < ends.get(site.key, 0) or not content.startswith(site.anchor, pos):
+                continue
+            m = site.regex.match(content, pos)
+            if m is None:
+                continue
+            ends[site.key] = m.end()
+            found.add(site.key)
+            spans.extend((m.start(g), m.end(g), site.key) for g in range(2, site.regex.groups + 1))
+
+    missing = [s.key for s in sites if s.key not in found]
+    if missing:
+        raise PatchMapError(f"{file_path}: no patch site for {', '.join(missing)}")
+    spans.sort()
+    for (_, end, key), (start, _, other) in zip(spans, spans[1:]):
+        if start < end:
+            raise PatchMapError(f"{file_path}: patch sites for {key} and {other} overlap")
+    return tuple(spans)
+
+
+def get_patch_map(source_path, file_path: str) -> PatchMap:
+    """
+    Return the patch map for one pristine file, scanning it only when it
+    changed since the last call.
+
+    Raises:
+        PatchMapError: If the file is missing or no longer matches the patterns
+    """
+    path = (Path(source_path) / file_path).resolve()
+    try:
+        st = path.stat()
+    except OSError:
+        raise PatchMapError(f"{file_path}: source file not found") from None
+    signature = (st.st_mtime_ns, st.st_size)
+    with _patch_lock:
+        cached = _patch_maps.get(path)
+    if cached and cached.signature == signature:
+        return cached
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    patch_map = PatchMap(signature, content, scan_patch_sites(file_path, content))
+    with _patch_lock:
+        _patch_maps[path] = patch_map
+    return patch_map
+
+
+def format_value(key: str, offset) -> str:
+    """AS2 literal for a setting: game default + offset (floats to 4 significant digits)."""
+    final_value = compute_final_value(key, offset)
+    if isinstance(GAME_DEFAULTS.get(key, 0), float):
+        return f"{float(final_value):.4g}"
+    return str(int(final_value))
+
+
 class DamageInfoGenerator:
     """Generates customized DamageInfo AS2 code from user settings."""
 
@@ -35,109 +203,151 @@ class DamageInfoGenerator:
         """
         self.source_path = Path(source_path)
         self.settings = validate_all_global_settings(settings)
-        self._modifications = {}
 
     def generate(self, output_path: str) -> bool:
         """
-        Generate modified AS2 files to output directory.
+        Generate the complete modified source tree to output directory.
 
         Args:
-            output_path: Path to write modified files
+            output_path: Path to write the tree to
 
         Returns:
             True if successful, False otherwise
+
+        Raises:
+            PatchMapError: If the sources no longer match the setting patterns
         """
         output_path = Path(output_path)
 
         try:
-            # Step 1: Copy entire source tree to output
+            patched = self.render()
             shutil.copytree(self.source_path, output_path, dirs_exist_ok=True)
+            self._write_files(output_path, patched)
+            return True
 
-            # Step 2: Build modifications map
-            self._build_modifications()
+        except PatchMapError:
+            raise
+        except Exception as e:
+            logger.error("Error generating DamageInfo code: %s", e)
+            return False
 
-            # Step 3: Apply modifications to relevant files
-            for file_path, replacements in self._modifications.items():
-                full_path = output_path / file_path
-                if not full_path.exists():
-                    logger.warning("File not found: %s", full_path)
-                    continue
+    def generate_overlay(self, output_path: str) -> bool:
+        """
+        Write only the patched files to output directory (an overlay for
+        the pristine source on the classpath).
 
-                self._apply_replacements(full_path, replacements)
+        Args:
+            output_path: Path to write the patched files to
+
+        Returns:
+            True if successful, False otherwise
 
+        Raises:
+            PatchMapError: If the sources no longer match the setting patterns
+        """
+        try:
+            self._write_files(Path(output_path), self.render())
             return True
 
+        except PatchMapError:
+            raise
         except Exception as e:
             logger.error("Error generating DamageInfo code: %s", e)
             return False
 
-    def _build_modifications(self):
-        """Build dict of {file_path: [(pattern, replacement), ...]}"""
-        self._modifications = {}
+    def render(self) -> Dict[str, str]:
+        """
+        Patch the pristine sources in memory.
 
-        for key, meta in GLOBAL_SETTINGS.items():
-            file_path = meta["file"]
-            value = self.settings[key]
+        Returns:
+            {relative file path: patched content} for every file the settings
+            actually change (files left at game defaults are omitted)
+        """
+        values = {key: format_value(key, self.settings[key]) for key in GLOBAL_SETTINGS}
+        patched = {}
+        for file_path in _SITES:
+            patch_map = get_patch_map(self.source_path, file_path)
+            content = self._splice(patch_map, values)
+            if content != patch_map.content:
+                patched[file_path] = content
+        return patched
+
+    def settings_key(self) -> str:
+        """Hash of the validated settings and the pristine sources (the overlay cache key)."""
+        h = hashlib.sha256()
+        h.update(f"damageinfo-overlay-{OVERLAY_VERSION}".encode('utf-8'))
+        h.update(b"\0")
+        h.update(json.dumps(self.settings, sort_keys=True, default=str).encode('utf-8'))
+        h.update(b"\0")
+        h.update(hash_tree(self.source_path).encode('ascii'))
+        return h.hexdigest()[:32]
+
+    @staticmethod
+    def _splice(patch_map: PatchMap, values: Dict[str, str]) -> str:
+        """Replace every value span of the map in one pass."""
+        original = patch_map.content
+        parts = []
+        pos = 0
+        for start, end, key in patch_map.spans:
+            parts.append(original[pos:start])
+            parts.append(values[key])
+            pos = end
+        parts.append(original[pos:])
+        return "".join(parts)
+
+    @staticmethod
+    def _write_files(output_path: Path, files: Dict[str, str]):
+        for rel, content in files.items():
+            target = output_path / rel
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with open(target, 'w', encoding='utf-8') as f:
+                f.write(content)
 
-            if file_path not in self._modifications:
-                self._modifications[file_path] = []
 
-            # Build replacement based on setting
-            replacement = self._build_replacement(key, meta, value)
-            if replacement:
-                self._modifications[file_path].append(replacement)
+def prepare_overlay(generator: DamageInfoGenerator, overlay_root=None) -> Optional[Path]:
+    """
+    Return the overlay directory for the generator's settings, generating it
+    only if no overlay with the same key exists.
 
-    def _build_replacement(self, key: str, meta: dict, offset) -> Optional[Tuple[str, str]]:
-        """
-        Build a (pattern, replacement) tuple for a setting.
+    Args:
+        generator: DamageInfoGenerator with the build's settings
+        overlay_root: Directory holding overlays (default: DEFAULT_OVERLAY_ROOT)
 
-        Args:
-            key: Setting key
-            meta: Setting metadata from GLOBAL_SETTINGS
-            offset: User's offset value (0 = no change from game default)
+    Returns:
+        Path to the overlay directory, or None if generation failed
+    """
+    root = Path(overlay_root) if overlay_root else DEFAULT_OVERLAY_ROOT
+    overlay = root / generator.settings_key()
+    if overlay.is_dir():
+        os.utime(overlay)       # most recently used
+        return overlay
+
+    root.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=".staging_", dir=root))
+    try:
+        if not generator.generate_overlay(staging):
+            return None
+        try:
+            staging.rename(overlay)
+        except OSError:
+            if not overlay.is_dir():    # lost a race to an identical build: use theirs
+                raise
+    finally:
+        if staging.exists():
+            shutil.rmtree(staging, ignore_errors=True)
+    _prune_overlays(root)
+    return overlay
 
-        Returns:
-            (regex_pattern, replacement_string) or None
-        """
-        # Compute final value: game_default + user_offset
-        final_value = compute_final_value(key, offset)
 
-        # Format value appropriately for AS2
-        if isinstance(GAME_DEFAULTS.get(key, 0), float):
-            formatted_value = f"{float(final_value):.4g}"
-        else:
-            formatted_value = str(int(final_value))
-
-        # Special handling for shadow_blur (needs to replace two values)
-        if key == "shadow_blur":
-            # DropShadowFilter(dist,angle,color,alpha,blurX,blurY,...)
-            # Match and replace both blurX and blurY
-            pattern = r"(DropShadowFilter\(\d+,\d+,\d+,\d+,)(\d+),(\d+)"
-            replacement = rf"\g<1>{formatted_value},{formatted_value}"
-            return (pattern, replacement)
-
-        # Generic pattern: use the pattern from settings, replace captured group 2
-        pattern = meta["pattern"]
-        replacement = rf"\g<1>{formatted_value}"
-        return (pattern, replacement)
-
-    def _apply_replacements(self, file_path: Path, replacements: list):
-        """Apply all replacements to a file."""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        modified = False
-        for pattern, replacement in replacements:
-            new_content, count = re.subn(pattern, replacement, content)
-            if count > 0:
-                content = new_content
-                modified = True
-            else:
-                logger.warning("Pattern did not match in %s: %s...", file_path.name, pattern[:60])
-
-        if modified:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+def _prune_overlays(root: Path):
+    """Remove all but the MAX_OVERLAYS most recently used overlays."""
+    try:
+        overlays = sorted((p for p in root.iterdir() if p.is_dir() and not p.name.startswith(".")),
+                          key=lambda p: p.stat().st_mtime, reverse=True)
+    except OSError:
+        return
+    for stale in overlays[MAX_OVERLAYS:]:
+        shutil.rmtree(stale, ignore_errors=True)
 
 
 def build_damageinfo(
@@ -145,7 +355,8 @@ def build_damageinfo(
     backup_swf: str,
     output_swf: str,
     settings: dict,
-    compiler_path: str
+    compiler_path: str,
+    overlay_root: Optional[str] = None
 ) -> Tuple[bool, str]:
     """
     Complete build process for DamageInfo.swf.
@@ -156,6 +367,8 @@ def build_damageinfo(
         output_swf: Path to write final DamageInfo.swf
         settings: User global settings dict
         compiler_path: Path to mtasc.exe
+        overlay_root: Directory for settings-keyed overlays of patched files
+            (default: DEFAULT_OVERLAY_ROOT in the temp folder)
 
     Returns:
         (success: bool, message: str)
@@ -173,20 +386,21 @@ def build_damageinfo(
     if not compiler_path.exists():
         return False, f"Compiler not found: {compiler_path}"
 
-    temp_dir = None
     try:
-        # Create temp directory for modified sources
-        temp_dir = tempfile.mkdtemp(prefix="damageinfo_")
-        temp_scripts = Path(temp_dir) / "__Packages"
-
-        # Step 1: Generate modified code
-        generator = DamageInfoGenerator(source_path, settings)
-        if not generator.generate(temp_scripts):
+        # Step 1: Generate the patched files (reused when settings are unchanged)
+        with build_stage("generate"):
+            generator = DamageInfoGenerator(source_path, settings)
+            try:
+                overlay = prepare_overlay(generator, overlay_root)
+            except PatchMapError as e:
+                return False, f"DamageInfo sources do not match the setting patterns: {e}"
+        if overlay is None:
             return False, "Failed to generate modified AS2 code"
 
         # Step 2: Copy backup SWF to output location
-        output_swf.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(backup_swf, output_swf)
+        with build_stage("copy_base"):
+            output_swf.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(backup_swf, output_swf)
 
         # Step 3: Find std library paths relative to compiler
         compiler_dir = compiler_path.parent
@@ -194,14 +408,17 @@ def build_damageinfo(
         std8_path = compiler_dir / "std8"
 
         # Step 4: Build MTASC command
-        # Entry point is MainDamageNumbers.as
-        entry_point = temp_scripts / "MainDamageNumbers.as"
+        # Entry point is MainDamageNumbers.as (the patched copy if there is one)
+        entry_point = overlay / ENTRY_POINT
+        if not entry_point.exists():
+            entry_point = source_path / ENTRY_POINT
         if not entry_point.exists():
             return False, f"Entry point not found: {entry_point}"
 
-        # Step 5: Compile
-        ok, err = compile_as2(compiler_path, [std_path, std8_path, temp_scripts],
-                              output_swf, entry_point, temp_dir)
+        # Step 5: Compile (overlay last: MTASC searches the last -cp first)
+        with build_stage("compile"):
+            ok, err = compile_as2(compiler_path, [std_path, std8_path, source_path, overlay],
+                                  output_swf, entry_point, overlay)
         if not ok:
             return False, f"MTASC compilation failed:\n{err}"
 
@@ -211,9 +428,3 @@ def build_damageinfo(
 
     except Exception as e:
         return False, f"Build error: {str(e)}"
-    finally:
-        if temp_dir:
-            try:
-                shutil.rmtree(temp_dir)
-            except Exception:
-                pass
@@ -1,28 +1,17 @@
 """
 KzGrids Database Editor Module
-Handles buff database loading, editing, and the Database tab UI.
-
-v2 Format:
-{
-    "name": "Buff Name",
-    "ids": [id1, id2, ...],
-    "category": "#Category",
-    "type": "buff" | "debuff" | "misc",
-    "stacking": true,      // optional - IDs represent stack levels
-    "stackStart": 1        // optional - first ID = this stack number (default: 1)
-}
+Handles buff editing dialogs and the Database tab UI.
+The BuffDatabase model lives in buff_database.py (see there for the v2 format).
 """
 
-import logging
 import tkinter as tk
 from tkinter import ttk, filedialog
 from ttkbootstrap.dialogs import Messagebox
 from .ui_helpers import THEME_COLORS, FONT_SMALL, style_tk_text, apply_dark_titlebar, BTN_SMALL, BTN_MEDIUM, add_tooltip
+from .buff_database import BuffDatabase  # noqa: F401 — re-exported for existing imports
 import json
 import re
 
-logger = logging.getLogger(__name__)
-
 
 # ============================================================================
 # CONSTANTS
@@ -30,153 +19,6 @@ logger = logging.getLogger(__name__)
 TYPE_FILTER_MAP = {"Buff": "buff", "Debuff": "debuff", "Misc": "misc"}
 
 
-# ============================================================================
-# BUFF DATABASE
-# ============================================================================
-class BuffDatabase:
-    """Handles loading, searching, and managing the buff database."""
-
-    def __init__(self):
-        self.buffs = []
-        self.categories = []
-        self.by_id = {}
-        self.grouped_buffs = []
-
-    def load(self, json_path):
-        """Load database from JSON file."""
-        try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            self.buffs = data.get('buffs', [])
-            self._rebuild_indexes()
-            return True
-        except Exception as e:
-            logger.error("Error loading buff database: %s", e)
-            return False
-
-    def _rebuild_indexes(self):
-        """Rebuild internal indexes after data changes."""
-        cats = set()
-        self.by_id = {}
-        for b in self.buffs:
-            cats.add(b.get('category', 'Unknown'))
-            ids = b.get('ids', [])
-            for bid in ids:
-                self.by_id[bid] = b
-        self.categories = sorted(list(cats))
-        self._group_buffs_by_name()
-
-    def _group_buffs_by_name(self):
-        """Group buffs by name for display purposes."""
-        # In v2 format, each entry is already properly grouped
-        # Just copy the buffs list to grouped_buffs
-        self.grouped_buffs = list(self.buffs)
-
-    def search(self, query="", category=None, buff_type=None):
-        """
-        Search buffs by query, category, and type.
-
-        Args:
-            query: Search string (matches name or ID)
-            category: Category filter (None = all)
-            buff_type: Type filter - "buff", "debuff", "misc" (None = all)
-        """
-        results = []
-        query_lower = query.lower() if query else ""
-
-        for buff in self.grouped_buffs:
-            # Category filter
-            if category and buff.get('category') != category:
-                continue
-
-            # Type filter
-            if buff_type and buff.get('type', 'buff') != buff_type:
-                continue
-
-            # Query filter (name or ID)
-            if query_lower:
-                name_match = query_lower in buff.get('name', '').lower()
-                id_match = any(query_lower in str(bid) for bid in buff.get('ids', []))
-                if not name_match and not id_match:
-                    continue
-
-            results.append(buff)
-
-        return sorted(results, key=lambda b: (b.get('category', ''), b.get('name', '')))
-
-    def get_by_id(self, buff_id):
-        """Get buff entry by ID."""
-        return self.by_id.get(buff_id)
-
-    def get_name(self, buff_id):
-        """Get buff name by ID."""
-        buff = self.by_id.get(buff_id)
-        return buff['name'] if buff else f"ID:{buff_id}"
-
-    def get_type(self, buff_id):
-        """Get buff type by ID (buff/debuff/misc)."""
-        buff = self.by_id.get(buff_id)
-        if buff:
-            return buff.get('type', 'buff')
-        return 'buff'
-
-    def is_debuff(self, buff_id):
-        """Check if buff is a debuff."""
-        return self.get_type(buff_id) == 'debuff'
-
-    def is_stacking(self, buff_id):
-        """Check if buff is a stacking buff."""
-        buff = self.by_id.get(buff_id)
-        if buff:
-            return buff.get('stacking', False)
-        return False
-
-    def get_stack_level(self, buff_id):
-        """
-        Get stack level for a buff ID.
-        Returns stackStart + index for stacking buffs.
-        Returns None if not a stacking buff or ID not found.
-        """
-        buff = self.by_id.get(buff_id)
-        if buff and buff.get('stacking', False):
-            ids = buff.get('ids', [])
-            stack_start = buff.get('stackStart', 1)
-            try:
-                return stack_start + ids.index(buff_id)
-            except ValueError:
-                return None
-        return None
-
-    def add_buff(self, buff_data):
-        """Add a new buff entry."""
-        self.buffs.append(buff_data)
-        self._rebuild_indexes()
-
-    def update_buff(self, old_ids, new_data):
-        """Update an existing buff entry."""
-        for i, buff in enumerate(self.buffs):
-            buff_ids = buff.get('ids', [])
-            if set(buff_ids) == set(old_ids):
-                self.buffs[i] = new_data
-                break
-        self._rebuild_indexes()
-
-    def remove_buff(self, ids):
-        """Remove a buff entry by its IDs."""
-        self.buffs = [b for b in self.buffs if set(b.get('ids', [])) != set(ids)]
-        self._rebuild_indexes()
-
-    def save(self, json_path):
-        """Save database to JSON file."""
-        data = {
-            "version": 2,
-            "description": "KzGrids buff/debuff database v2",
-            "buffs": self.buffs
-        }
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-
-
 # ============================================================================
 # BUFF EDIT DIALOG
 # ============================================================================
@@ -585,12 +427,8 @@ class DatabaseEditorTab(ttk.Frame):
     def _check_id_collision(self, new_ids, exclude_ids=None):
         """Check if any IDs already exist in database. Returns overlapping set or None."""
         exclude = set(exclude_ids or [])
-        for buff in self.database.buffs:
-            existing = set(buff.get('ids', [])) - exclude
-            overlap = new_ids & existing
-            if overlap:
-                return overlap
-        return None
+        overlap = {bid for bid in new_ids if bid in self.database.by_id} - exclude
+        return overlap or None
 
     def add_buff(self):
         """Add a new buff entry."""
@@ -694,13 +532,11 @@ class DatabaseEditorTab(ttk.Frame):
                 Messagebox.show_warning("No buffs found in file", title="Warning")
                 return
 
-            existing_ids = set()
-            for buff in self.database.buffs:
-                for bid in buff.get('ids', []):
-                    existing_ids.add(bid)
+            existing_ids = set(self.database.by_id)
 
             added = 0
             skipped = 0
+            new_buffs = []
 
             for buff in import_buffs:
                 buff_ids = buff.get('ids', [buff.get('id')] if 'id' in buff else [])
@@ -719,11 +555,13 @@ class DatabaseEditorTab(ttk.Frame):
                     if 'type' not in buff:
                         buff['type'] = 'buff'
 
-                    self.database.add_buff(buff)
+                    new_buffs.append(buff)
                     for bid in buff_ids:
                         existing_ids.add(bid)
                     added += 1
 
+            # One index rebuild for the whole file instead of one per entry
+            self.database.add_many(new_buffs)
             self._set_modified()
             self.update_categories()
             self.refresh_list()
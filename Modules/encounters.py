@@ -0,0 +1,267 @@
+"""
+KzBuilder — Encounter Definitions
+Declarative boss encounters for the Live Tracker.
+
+An encounter is a JSON file in assets/encounters/ describing:
+- triggers: combat log phrases (see log_triggers.Trigger)
+- bindings: what each trigger event does to the cycle (start / mark / interrupt)
+- variants: per-second phase timelines, chosen by which flags are set
+
+load_encounter() validates the file and precompiles every variant into a
+flat table indexed by [flag set][elapsed second], so BossTimer renders a
+phase with one lookup instead of walking a branch cascade.
+
+File format (see ethram_fal.json):
+
+    {
+      "format": 1, "id": "ethram-fal", "name": "Ethram-Fal",
+      "cycle_duration": 39,
+      "triggers": [{"template": "... {target} ...", "event": "seed", ...}],
+      "bindings": {
+        "seed": {"action": "start", "slot": "seed",
+                 "repeat": {"min_gap": 5, "max_gap": 12, "flag": "double"}},
+        "fixation": {"action": "mark", "slot": "fixation", "flag": "fixation"},
+        "syphon": {"action": "interrupt"}
+      },
+      "waiting": {"row1": {...}}, "interrupted": {"row1": {...}},
+      "variants": [{"name": ..., "when": {"double": true},
+                    "phases": [{"from": 0, "to": 7, "row1": {...}, "row2": {...}}]}]
+    }
+
+Rows: {"msg", "player" (slot name), "empty_msg" (msg when the slot is
+empty), "color" (COLORS key), "timer" (text, or {"until": N, "done": text}
+counting down to second N)}. "{until:N}" in msg is replaced the same way.
+Variants are tried in order; the first whose "when" flags all match wins.
+"""
+
+import itertools
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from .live_tracker_settings import COLORS
+from .log_triggers import Trigger
+
+logger = logging.getLogger(__name__)
+
+ENCOUNTER_FORMAT = 1
+
+# Bundled definitions (assets/encounters next to the Modules package)
+DEFAULT_ENCOUNTERS_DIR = Path(__file__).resolve().parent.parent / "assets" / "encounters"
+
+ACTIONS = ("start", "mark", "interrupt")
+
+_UNTIL_RE = re.compile(r"\{until:(\d+)\}")
+
+# Precompiled overlay row: (msg, empty_msg, player slot, timer text, color)
+Row = Tuple[str, Optional[str], Optional[str], str, str]
+BLANK_ROW: Row = ("", None, None, "", COLORS["default"])
+
+
+@dataclass
+class Binding:
+    """What a trigger event does to the encounter state."""
+    action: str
+    slot: Optional[str] = None
+    flag: Optional[str] = None
+    repeat_flag: Optional[str] = None
+    repeat_min: float = 0
+    repeat_max: float = 0
+
+
+@dataclass
+class Encounter:
+    """A loaded, precompiled encounter definition."""
+    id: str
+    name: str
+    cycle_duration: int
+    triggers: List[Trigger]
+    bindings: Dict[str, Binding]
+    waiting: Tuple[Row, Row]
+    interrupted: Tuple[Row, Row]
+    flags: Tuple[str, ...] = ()
+    # table[active flags][second] -> (row1, row2)
+    table: Dict[FrozenSet[str], List[Tuple[Row, Row]]] = field(default_factory=dict)
+
+    def lookup(self, flags, second) -> Optional[Tuple[Row, Row]]:
+        """Rows for the given active flags and elapsed second (None past the cycle)."""
+        rows = self.table.get(frozenset(flags).intersection(self.flags))
+        if rows is None or not 0 <= second < len(rows):
+            return None
+        return rows[second]
+
+
+def render_row(row: Row, slots) -> Tuple[str, str, str, str]:
+    """Fill a precompiled row with player names. Returns (msg, player, timer, color)."""
+    msg, empty_msg, slot, timer, color = row
+    player = ""
+    if slot:
+        player = slots.get(slot) or ""
+        if not player and empty_msg is not None:
+            msg = empty_msg
+    return msg, player, timer, color
+
+
+# =============================================================================
+# LOADING / COMPILATION
+# =============================================================================
+
+def load_encounter(source) -> Encounter:
+    """
+    Load and precompile an encounter.
+
+    Args:
+        source: Path to a JSON file, or an already-parsed dict
+
+    Raises:
+        ValueError: If the definition is malformed
+    """
+    if isinstance(source, dict):
+        data = source
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+    if data.get("format", ENCOUNTER_FORMAT) != ENCOUNTER_FORMAT:
+        raise ValueError(f"Unsupported encounter format {data.get('format')!r}")
+    enc_id = _require(data, "id", str)
+    where = f"encounter {enc_id!r}"
+    duration = _require(data, "cycle_duration", int, where)
+    if duration <= 0:
+        raise ValueError(f"{where}: cycle_duration must be positive")
+
+    triggers = []
+    for t in _require(data, "triggers", list, where):
+        triggers.append(Trigger(
+            template=_require(t, "template", str, where),
+            event=_require(t, "event", str, where),
+            ability=t.get("ability", ""),
+            actor=t.get("actor", ""),
+        ))
+
+    bindings = {}
+    for event, spec in _require(data, "bindings", dict, where).items():
+        action = spec.get("action")
+        if action not in ACTIONS:
+            raise ValueError(f"{where}: binding {event!r} has unknown action {action!r}")
+        repeat = spec.get("repeat") or {}
+        bindings[event] = Binding(
+            action=action, slot=spec.get("slot"), flag=spec.get("flag"),
+            repeat_flag=repeat.get("flag"),
+            repeat_min=repeat.get("min_gap", 0), repeat_max=repeat.get("max_gap", 0),
+        )
+    unbound = {t.event for t in triggers} - set(bindings)
+    if unbound:
+        raise ValueError(f"{where}: no binding for trigger event(s) {', '.join(sorted(unbound))}")
+
+    variants = _require(data, "variants", list, where)
+    flags = set()
+    for b in bindings.values():
+        flags.update(f for f in (b.flag, b.repeat_flag) if f)
+    for v in variants:
+        flags.update(v.get("when", {}))
+    flags = tuple(sorted(flags))
+
+    encounter = Encounter(
+        id=enc_id,
+        name=data.get("name", enc_id),
+        cycle_duration=duration,
+        triggers=triggers,
+        bindings=bindings,
+        waiting=_compile_display(data.get("waiting", {}), where),
+        interrupted=_compile_display(data.get("interrupted", {}), where),
+        flags=flags,
+    )
+    compiled = [(v.get("when", {}), _compile_variant(v, duration, where)) for v in variants]
+    for n in range(len(flags) + 1):
+        for active in itertools.combinations(flags, n):
+            active = frozenset(active)
+            for when, rows in compiled:
+                if all((flag in active) == bool(want) for flag, want in when.items()):
+                    encounter.table[active] = rows
+                    break
+    return encounter
+
+
+def load_encounters(folder=None) -> List[Encounter]:
+    """
+    Load every *.json encounter in folder (default: bundled definitions).
+
+    Malformed files are logged and skipped; ids must be unique (first wins).
+    """
+    folder = Path(folder) if folder else DEFAULT_ENCOUNTERS_DIR
+    encounters = []
+    seen = set()
+    if not folder.is_dir():
+        logger.warning("Encounter folder not found: %s", folder)
+        return encounters
+    for path in sorted(folder.glob("*.json")):
+        try:
+            encounter = load_encounter(path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Skipping encounter %s: %s", path.name, e)
+            continue
+        if encounter.id in seen:
+            logger.warning("Skipping encounter %s: duplicate id %r", path.name, encounter.id)
+            continue
+        seen.add(encounter.id)
+        encounters.append(encounter)
+    return encounters
+
+
+def _require(data, key, kind, where="encounter"):
+    value = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(value, kind):
+        raise ValueError(f"{where}: '{key}' is missing or not of type {kind.__name__}")
+    return value
+
+
+def _compile_display(spec, where) -> Tuple[Row, Row]:
+    """Compile a static (second-independent) display such as the waiting state."""
+    return (_compile_row(spec.get("row1"), 0, where), _compile_row(spec.get("row2"), 0, where))
+
+
+def _compile_variant(variant, duration, where) -> List[Tuple[Row, Row]]:
+    """Expand a variant's phases into one (row1, row2) entry per second."""
+    name = variant.get("name", "?")
+    rows: List[Optional[Tuple[Row, Row]]] = [None] * duration
+    for phase in variant.get("phases", []):
+        start, end = phase.get("from", 0), phase.get("to", duration - 1)
+        if not (0 <= start <= end < duration):
+            raise ValueError(f"{where}: variant {name!r} phase {start}-{end} "
+                             f"outside 0-{duration - 1}")
+        for second in range(start, end + 1):
+            rows[second] = (_compile_row(phase.get("row1"), second, where),
+                            _compile_row(phase.get("row2"), second, where))
+    missing = [s for s, r in enumerate(rows) if r is None]
+    if missing:
+        raise ValueError(f"{where}: variant {name!r} has no phase for second(s) "
+                         f"{missing[0]}-{missing[-1]}")
+    return rows
+
+
+def _compile_row(spec, second, where) -> Row:
+    """Resolve a row spec for one second (timers and {until:N} become text)."""
+    if not spec:
+        return BLANK_ROW
+    color_name = spec.get("color", "default")
+    if color_name not in COLORS:
+        raise ValueError(f"{where}: unknown color {color_name!r}")
+
+    def until(m):
+        return str(max(0, int(m.group(1)) - second))
+
+    timer = spec.get("timer", "")
+    if isinstance(timer, dict):
+        remaining = max(0, timer["until"] - second)
+        done = timer.get("done")
+        timer = done if remaining <= 0 and done is not None else f"{remaining}s"
+
+    return (_UNTIL_RE.sub(until, spec.get("msg", "")),
+            spec.get("empty_msg"),
+            spec.get("player"),
+            _UNTIL_RE.sub(until, timer),
+            COLORS[color_name])
@@ -3,29 +3,60 @@ KzBuilder — KzGrids Code Generator
 Generates KzGrids.as ActionScript 2.0 source code from grid configurations.
 """
 
+import logging
 import shutil
 import tempfile
 from pathlib import Path
-from datetime import datetime
 from typing import Tuple
 
+from Modules.as2_budget import analyze_sections
 from Modules.as2_template import CORE_METHODS_TEMPLATE
-from Modules.build_utils import compile_as2
+from Modules.build_utils import build_stage, compile_as2
+from Modules.template_engine import Template
+
+logger = logging.getLogger(__name__)
 
 MAX_TOTAL_SLOTS = 64
 
+# Shared whitelist: grid sets per GM bitmask word (31 keeps AS2 ints positive)
+# and the TRACK flags addPBuff/addTBuff test
+WL_WORD_BITS = 31
+TRACK_PLAYER = 1
+TRACK_TARGET = 2
+
+# Lookup-table emission modes for CodeGenerator, fastest-loading first
+# ("auto" picks the first that fits the class budget): one statement per ID,
+# parallel array literals, or a single delimited string split at startup
+LOOKUP_ENCODINGS = ("statements", "arrays", "packed")
+
+# Runtime methods, parsed once; feature blocks are resolved per profile
+_CORE_METHODS = Template(CORE_METHODS_TEMPLATE, "CORE_METHODS_TEMPLATE")
+
 # ============================================================================
 # CODE GENERATOR
 # ============================================================================
 class CodeGenerator:
     """Generate AS2 source code for the KzGrids buff-tracking grid system."""
 
-    def __init__(self, grids, database, app_version="3.3.6"):
-        """Initialize the code generator with grid configs and the buff database."""
+    def __init__(self, grids, database, app_version="3.3.6", lookup_encoding="auto"):
+        """
+        Initialize the code generator with grid configs and the buff database.
+
+        lookup_encoding selects how the ISDEB/BUFFTYPE/STACK_LEVEL tables are
+        emitted: "statements" (one assignment per ID), "arrays" (parallel
+        array literals), "packed" (one delimited string) or "auto"
+        (the first of those that fits the class budget).
+        """
         # Filter out disabled grids
         self.grids = [g for g in grids if g.get('enabled', True)]
         self.database = database
         self.app_version = app_version
+        self.lookup_encoding = lookup_encoding
+        self.encoding_used = None
+        self.budget = None
+        self.encoding_budgets = {}      # encoding -> BudgetReport estimated so far
+        self._whitelist_cache = None
+        self._stacks_cache = {}
 
     def sanitize_id(self, grid_id):
         """Convert a grid ID to a safe AS2 identifier by replacing invalid characters."""
@@ -41,22 +72,65 @@ class CodeGenerator:
 
     def generate(self):
         """Generate the complete AS2 source code for all enabled grids."""
-        lines = []
-        lines.append(self._header())
-        lines.append(self._class_start())
-        lines.append(self._member_variables())
-        lines.append(self._constructor())
-        lines.append(self._init_config())
-        lines.append(self._core_methods())
-        lines.append(self._class_end())
-        return '\n'.join(lines)
+        return '\n'.join(code for _, code in self.generate_sections())
+
+    def generate_sections(self):
+        """
+        Generate the class as named (section, code) pairs in emission order.
+
+        Also records the size estimate in self.budget, the lookup encoding
+        actually emitted in self.encoding_used and every estimate made along
+        the way in self.encoding_budgets. With lookup_encoding="auto" the
+        lookup tables are emitted as statements unless that puts the class
+        over budget, in which case the arrays and then the packed encoding
+        are tried.
+        """
+        self.encoding_budgets = {}
+        encoding = self.lookup_encoding
+        if encoding == "auto":
+            # Fastest-loading encoding that fits; the smallest if none does
+            best = None
+            for encoding in LOOKUP_ENCODINGS:
+                sections = self._sections(encoding)
+                budget = self._estimate(encoding, sections)
+                if not budget.over_budget:
+                    best = (encoding, sections, budget)
+                    break
+                if best is None or budget.total < best[2].total:
+                    best = (encoding, sections, budget)
+            self.encoding_used, sections, self.budget = best
+            return sections
+        if encoding not in LOOKUP_ENCODINGS:
+            encoding = "statements"
+        sections = self._sections(encoding)
+        self.encoding_used = encoding
+        self.budget = self._estimate(encoding, sections)
+        return sections
+
+    def _estimate(self, encoding, sections):
+        budget = analyze_sections("KzGrids", sections)
+        self.encoding_budgets[encoding] = budget
+        return budget
+
+    def _sections(self, encoding):
+        return [
+            ("header", self._header()),
+            ("class", self._class_start()),
+            ("members", self._member_variables()),
+            ("constructor", self._constructor()),
+            ("grid configs", self._grid_configs()),
+            ("whitelists", self._shared_whitelist()),
+            ("lookup tables", self._lookup_tables(encoding)),
+            ("core methods", self._core_methods()),
+            ("class", self._class_end()),
+        ]
 
     def _header(self):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+        # No timestamp: identical profiles must generate identical source
+        # so the build cache can recognise them.
         total_slots = sum(g['rows'] * g['cols'] for g in self.grids)
         return f'''// ============================================================================
 // KZGRIDS - Generated by KzBuilder v{self.app_version}
-// Generated: {timestamp}
 // Total slots: {total_slots} / {MAX_TOTAL_SLOTS}
 // ============================================================================
 '''
@@ -87,7 +161,8 @@ class CodeGenerator:
     private var C_DEBUFF:Number;
     private var C_BG:Number;
     private var CFG:Object;
-    private var WL:Object;
+    private var GM:Array;
+    private var TRACK:Object;
     private var ISDEB:Object;
     private var BUFFTYPE:Object;
     private var STACK_LEVEL:Object;
@@ -156,30 +231,151 @@ class CodeGenerator:
     }
 '''
 
-    def _init_config(self):
+    def _tracked_buff_ids(self):
+        """Return every buff ID referenced by a whitelist or slot assignment, sorted."""
+        all_buff_ids = set()
+        for grid in self.grids:
+            for bid in grid.get('whitelist', []):
+                all_buff_ids.add(bid)
+            for slot_ids in grid.get('slotAssignments', {}).values():
+                for bid in slot_ids:
+                    all_buff_ids.add(bid)
+        return sorted(all_buff_ids)
+
+    def _grid_configs(self):
         lines = ['''
     private function initConfig():Void {
         CFG = {};
         CFG.grids = new Array();
-        WL = {};
+        GM = new Array();
+        TRACK = {};
         ISDEB = {};
         BUFFTYPE = {};
         STACK_LEVEL = {};
         var i:Number;
 ''']
-
-        all_buff_ids = set()
+        grid_bits, _ = self._whitelist_sets()
         for grid in self.grids:
-            lines.append(self._generate_grid_config(grid))
-            for bid in grid.get('whitelist', []):
-                all_buff_ids.add(bid)
+            lines.append(self._generate_grid_config(grid, *grid_bits[grid['id']]))
+        return '\n'.join(lines)
+
+    def features(self):
+        """
+        Runtime features the enabled grids use; code for the others is left
+        out of the generated class.
+
+        Returns:
+            {feature: bool} for the CORE_METHODS_TEMPLATE blocks:
+            STATIC_GRIDS / DYNAMIC_GRIDS (a grid in that slot mode),
+            TARGET_GRIDS (a target grid: target signal wiring),
+            STACKS (a grid tracks a buff with a stack level)
+        """
+        return {
+            'STATIC_GRIDS': any(g['slotMode'] == 'static' for g in self.grids),
+            'DYNAMIC_GRIDS': any(g['slotMode'] != 'static' for g in self.grids),
+            'TARGET_GRIDS': any(g['type'] != 'player' for g in self.grids),
+            'STACKS': any(self._grid_stacks(g) for g in self.grids),
+        }
+
+    def _grid_stacks(self, grid):
+        """True if the grid can show a buff with a stack level (needs stack counters)."""
+        cached = self._stacks_cache.get(grid['id'])
+        if cached is None:
+            ids = set(grid.get('whitelist', []))
             for slot_ids in grid.get('slotAssignments', {}).values():
-                for bid in slot_ids:
-                    all_buff_ids.add(bid)
+                ids.update(slot_ids)
+            cached = any(self.database.get_stack_level(bid) is not None for bid in ids)
+            self._stacks_cache[grid['id']] = cached
+        return cached
+
+    def _tracked_set(self, grid):
+        """IDs a grid reacts to: slot assignments for static grids (whitelist if none), else the whitelist."""
+        if grid['slotMode'] == 'static':
+            slot_ids = set()
+            for ids in grid.get('slotAssignments', {}).values():
+                slot_ids.update(ids)
+            if slot_ids:
+                return frozenset(slot_ids)
+        return frozenset(grid.get('whitelist', []))
+
+    def _whitelist_sets(self):
+        """
+        Intern grid whitelists into shared bitmask words.
+
+        Grids with identical tracked sets share one bit; a grid tracking
+        nothing gets bit 0. Each word of GM holds WL_WORD_BITS sets.
+
+        Returns:
+            (grid_bits, rows): grid_bits maps grid id -> (word, bit);
+            rows is [(bid, track_flags, [mask per word])] sorted by ID, where
+            track_flags has TRACK_PLAYER/TRACK_TARGET set for the grid types
+            that track bid
+        """
+        if self._whitelist_cache is not None:
+            return self._whitelist_cache
+        set_index = {}
+        grid_bits = {}
+        track = {}
+        for grid in self.grids:
+            ids = self._tracked_set(grid)
+            if not ids:
+                grid_bits[grid['id']] = (0, 0)
+                continue
+            k = set_index.setdefault(ids, len(set_index))
+            grid_bits[grid['id']] = (k // WL_WORD_BITS, 1 << (k % WL_WORD_BITS))
+            flag = TRACK_PLAYER if grid['type'] == 'player' else TRACK_TARGET
+            for bid in ids:
+                track[bid] = track.get(bid, 0) | flag
+
+        words = (len(set_index) + WL_WORD_BITS - 1) // WL_WORD_BITS
+        masks = {bid: [0] * words for bid in track}
+        for ids, k in set_index.items():
+            bit = 1 << (k % WL_WORD_BITS)
+            for bid in ids:
+                masks[bid][k // WL_WORD_BITS] |= bit
+        rows = [(bid, track[bid], masks[bid]) for bid in sorted(track)]
+        self._whitelist_cache = (grid_bits, rows)
+        return self._whitelist_cache
+
+    def _shared_whitelist(self):
+        """Emit the interned whitelist: TRACK flags and GM bitmask words per buff ID."""
+        _, rows = self._whitelist_sets()
+        if not rows:
+            return ''
+        words = len(rows[0][2])
+        values = []
+        for bid, flags, masks in rows:
+            values.append(str(bid))
+            values.append(str(flags))
+            values.extend(str(m) for m in masks)
+        return '\n'.join([
+            '\n        // Shared whitelist: buff ID, player(1)/target(2) flags, one grid-set mask per GM word',
+            f'        GM = [{", ".join("{}" for _ in range(words))}];',
+            f'        var _wlRows:Array = [{", ".join(values)}];',
+            f'''        var _wlBid:Number;
+        var _wlWord:Number;
+        i = 0;
+        while (i < _wlRows.length) {{
+            _wlBid = _wlRows[i];
+            TRACK[_wlBid] = _wlRows[i + 1];
+            _wlWord = 0;
+            while (_wlWord < {words}) {{ GM[_wlWord][_wlBid] = _wlRows[i + 2 + _wlWord]; _wlWord++; }}
+            i += {2 + words};
+        }}''',
+        ])
+
+    def _lookup_tables(self, encoding):
+        """Emit ISDEB/BUFFTYPE/STACK_LEVEL setup and close initConfig()."""
+        lines = []
+        buff_ids = self._tracked_buff_ids()
 
-        if all_buff_ids:
+        if buff_ids and encoding == "arrays":
+            lines.extend(self._lookup_arrays(buff_ids))
+        elif buff_ids and encoding == "packed":
+            lines.extend(self._lookup_packed(buff_ids))
+        elif buff_ids:
             lines.append('\n        // Debuff, Type, and Stack Level lookup')
-            for bid in sorted(all_buff_ids):
+            for bid in buff_ids:
                 is_deb = "true" if self.database.is_debuff(bid) else "false"
                 buff_type = self.database.get_type(bid)
                 lines.append(f'        ISDEB[{bid}] = {is_deb};')
@@ -192,7 +388,88 @@ class CodeGenerator:
         lines.append('    }')
         return '\n'.join(lines)
 
-    def _generate_grid_config(self, grid):
+    def _lookup_columns(self, buff_ids):
+        """Return (type_names, type_codes, stack_levels) for the compact encodings."""
+        type_names = sorted({self.database.get_type(bid) for bid in buff_ids})
+        type_index = {name: i for i, name in enumerate(type_names)}
+        codes = []
+        stacks = []
+        for bid in buff_ids:
+            codes.append(type_index[self.database.get_type(bid)])
+            stack_level = self.database.get_stack_level(bid)
+            stacks.append(stack_level if stack_level is not None else -1)
+        return type_names, codes, stacks
+
+    def _lookup_arrays(self, buff_ids):
+        """
+        Compact lookup: parallel array literals decoded by one loop.
+
+        _lkTypes holds an index into _lkNames, _lkStacks the stack level
+        or -1. ISDEB is derived from the type, as BuffDatabase.is_debuff() does.
+        """
+        type_names, codes, stacks = self._lookup_columns(buff_ids)
+        names_str = ', '.join(f'"{name}"' for name in type_names)
+        return [
+            '\n        // Debuff, Type, and Stack Level lookup (packed arrays)',
+            f'        var _lkNames:Array = [{names_str}];',
+            f'        var _lkIds:Array = [{", ".join(str(bid) for bid in buff_ids)}];',
+            f'        var _lkTypes:Array = [{", ".join(str(c) for c in codes)}];',
+            f'        var _lkStacks:Array = [{", ".join(str(s) for s in stacks)}];',
+            '''        var _lkBid:Number;
+        var _lkType:String;
+        i = 0;
+        while (i < _lkIds.length) {
+            _lkBid = _lkIds[i];
+            _lkType = _lkNames[_lkTypes[i]];
+            BUFFTYPE[_lkBid] = _lkType;
+            ISDEB[_lkBid] = (_lkType == "debuff");
+            if (_lkStacks[i] >= 0) STACK_LEVEL[_lkBid] = _lkStacks[i];
+            i++;
+        }''',
+        ]
+
+    def _lookup_packed(self, buff_ids):
+        """
+        Smallest lookup: one "id,type[,stack];..." string split at startup.
+
+        Trades a little load-time string work for a single constant-pool
+        entry instead of one push per value.
+        """
+        type_names, codes, stacks = self._lookup_columns(buff_ids)
+        names_str = ', '.join(f'"{name}"' for name in type_names)
+        rows = []
+        for bid, code, stack in zip(buff_ids, codes, stacks):
+            rows.append(f"{bid},{code},{stack}" if stack >= 0 else f"{bid},{code}")
+        return [
+            '\n        // Debuff, Type, and Stack Level lookup (packed string)',
+            f'        var _lkNames:Array = [{names_str}];',
+            f'        var _lkRows:Array = "{";".join(rows)}".split(";");',
+            '''        var _lkRow:Array;
+        var _lkType:String;
+        i = 0;
+        while (i < _lkRows.length) {
+            _lkRow = _lkRows[i].split(",");
+            _lkType = _lkNames[Number(_lkRow[1])];
+            BUFFTYPE[_lkRow[0]] = _lkType;
+            ISDEB[_lkRow[0]] = (_lkType == "debuff");
+            if (_lkRow.length > 2) STACK_LEVEL[_lkRow[0]] = Number(_lkRow[2]);
+            i++;
+        }''',
+        ]
+
+    def compare_encodings(self):
+        """
+        Return {encoding: estimated class bytes} for every lookup encoding.
+
+        Reuses the estimates generate_sections() already made and only
+        generates the encodings it did not try.
+        """
+        for encoding in LOOKUP_ENCODINGS:
+            if encoding not in self.encoding_budgets:
+                self._estimate(encoding, self._sections(encoding))
+        return {encoding: self.encoding_budgets[encoding].total for encoding in LOOKUP_ENCODINGS}
+
+    def _generate_grid_config(self, grid, word=0, bit=0):
         gid = grid['id']
         vid = self.sanitize_id(gid)
         lines = []
@@ -216,7 +493,10 @@ class CodeGenerator:
             timerFont: {grid.get('timerFontSize', 18)},
             timerFlashThreshold: {grid.get('timerFlashThreshold', 6)},
             timerYOffset: {grid.get('timerYOffset', 0)},
-            enableFlashing: {'true' if grid.get('enableFlashing', True) else 'false'}''')
+            enableFlashing: {'true' if grid.get('enableFlashing', True) else 'false'},
+            stacks: {'true' if self._grid_stacks(grid) else 'false'},
+            mw: {word},
+            bit: {bit}''')
 
         if grid['slotMode'] == 'static':
             lines[-1] += ',\n            slots: {}\n        };'
@@ -228,32 +508,44 @@ class CodeGenerator:
             lines[-1] += '\n        };'
 
         lines.append(f'        CFG.grids.push({vid});')
-
-        whitelist = grid.get('whitelist', [])
-        if whitelist or grid['slotMode'] == 'dynamic':
-            lines.append(f'\n        WL["{gid}"] = {{}};')
-            if whitelist:
-                ids_str = ', '.join(str(bid) for bid in whitelist)
-                lines.append(f'        var {vid}_ids:Array = [{ids_str}];')
-                lines.append(f'''        i = 0;
-        while (i < {vid}_ids.length) {{
-            WL["{gid}"][{vid}_ids[i]] = true;
-            i++;
-        }}''')
-
-        if grid['slotMode'] == 'static':
-            all_ids = set()
-            for slot_ids in grid.get('slotAssignments', {}).values():
-                all_ids.update(slot_ids)
-            if all_ids:
-                lines.append(f'\n        WL["{gid}"] = {{}};')
-                for bid in sorted(all_ids):
-                    lines.append(f'        WL["{gid}"][{bid}] = true;')
-
         return '\n'.join(lines)
 
     def _core_methods(self):
-        return CORE_METHODS_TEMPLATE
+        return _CORE_METHODS.render(self.features())
+
+
+def grid_buff_ids(grids):
+    """Every buff ID the grids reference (whitelists and slot assignments): the
+    database entries generation reads."""
+    ids = set()
+    for grid in grids:
+        ids.update(grid.get('whitelist', []))
+        for slot_ids in grid.get('slotAssignments', {}).values():
+            ids.update(slot_ids)
+    return ids
+
+
+def _budget_notes(generator, lookup_encoding):
+    """Summarize the generator's size estimate; warnings are also logged."""
+    notes = [f"Bytecode estimate: {generator.budget.summary()}"]
+    used = generator.encoding_used
+    # Only pay for generating the other encodings when the class is over
+    # budget and the comparison helps pick one; otherwise list what the
+    # build already estimated
+    if generator.budget.over_budget:
+        sizes = generator.compare_encodings()
+    else:
+        sizes = {enc: budget.total for enc, budget in generator.encoding_budgets.items()}
+    notes.append("Lookup encodings: " + ", ".join(
+        f"{enc} ~{size / 1024:.1f}KB" + (" (used)" if enc == used else "")
+        for enc, size in sizes.items()))
+    if lookup_encoding == "auto" and used != "statements":
+        notes.append(f"Lookup tables switched to the compact '{used}' encoding "
+                     "to stay under the per-class limit")
+    for warning in generator.budget.warnings():
+        logger.warning(warning)
+        notes.append(f"Warning: {warning}")
+    return notes
 
 
 # ============================================================================
@@ -266,7 +558,8 @@ def build_grids(
     stubs_path: str,
     output_swf: str,
     compiler_path: str,
-    app_version: str = "3.3.5"
+    app_version: str = "3.3.5",
+    lookup_encoding: str = "auto"
 ) -> Tuple[bool, str]:
     """
     Complete build process for KzGrids.swf.
@@ -279,9 +572,11 @@ def build_grids(
         output_swf: Path to write final KzGrids.swf
         compiler_path: Path to mtasc.exe
         app_version: Version string for header comment
+        lookup_encoding: "auto" or one of LOOKUP_ENCODINGS (see CodeGenerator)
 
     Returns:
-        (success: bool, message: str)
+        (success: bool, message: str) — on success, lines after the first
+        carry the bytecode estimate and any budget warnings
     """
     base_swf = Path(base_swf)
     stubs_path = Path(stubs_path)
@@ -296,31 +591,40 @@ def build_grids(
     temp_dir = None
     try:
         # Step 1: Generate AS2 code
-        generator = CodeGenerator(grids, database, app_version)
-        code = generator.generate()
+        with build_stage("generate"):
+            generator = CodeGenerator(grids, database, app_version, lookup_encoding)
+            code = generator.generate()
+        budget_notes = _budget_notes(generator, lookup_encoding)
 
         # Step 2: Write to temp .as file
-        temp_dir = tempfile.mkdtemp(prefix="kzgrids_")
-        temp_as = Path(temp_dir) / "KzGrids.as"
-        with open(temp_as, 'w', encoding='utf-8') as f:
-            f.write(code)
+        with build_stage("write_temp"):
+            temp_dir = tempfile.mkdtemp(prefix="kzgrids_")
+            temp_as = Path(temp_dir) / "KzGrids.as"
+            with open(temp_as, 'w', encoding='utf-8') as f:
+                f.write(code)
 
         # Step 3: Copy base.swf to temp
-        output_swf.parent.mkdir(parents=True, exist_ok=True)
-        temp_swf = Path(temp_dir) / "KzGrids.swf"
-        shutil.copy2(base_swf, temp_swf)
+        with build_stage("copy_base"):
+            output_swf.parent.mkdir(parents=True, exist_ok=True)
+            temp_swf = Path(temp_dir) / "KzGrids.swf"
+            shutil.copy2(base_swf, temp_swf)
 
         # Step 4: Compile
         common_stubs = base_swf.parent.parent / "common_stubs"
-        ok, err = compile_as2(compiler_path, [stubs_path, common_stubs], temp_swf, temp_as, temp_dir)
+        with build_stage("compile"):
+            ok, err = compile_as2(compiler_path, [stubs_path, common_stubs], temp_swf, temp_as, temp_dir)
         if not ok:
+            if generator.budget.near_budget:
+                err += "\n\n" + "\n".join(budget_notes)
             return False, f"MTASC compilation failed:\n{err}"
 
         # Step 5: Copy to game directory
-        shutil.copy2(temp_swf, output_swf)
+        with build_stage("copy_output"):
+            shutil.copy2(temp_swf, output_swf)
 
         output_size = output_swf.stat().st_size
-        return True, f"KzGrids.swf built successfully ({output_size:,} bytes)"
+        return True, "\n".join(
+            [f"KzGrids.swf built successfully ({output_size:,} bytes)"] + budget_notes)
 
     except Exception as e:
         return False, f"Build error: {str(e)}"
@@ -10,7 +10,7 @@ import json
 from pathlib import Path
 
 from Modules.database_editor import format_ids_display
-from Modules.grids_generator import build_grids
+from Modules.grids_generator import build_grids, LOOKUP_ENCODINGS
 from Modules.build_utils import update_script_with_marker
 from Modules.ui_helpers import (
     restore_window_position, bind_window_position_save,
@@ -33,6 +33,15 @@ MAX_COLS = 64
 SCREEN_MAX_X = 2560
 SCREEN_MAX_Y = 1440
 
+# Build config: how KzGrids emits its buff lookup tables (settings key
+# 'grids_lookup_encoding'; see grids_generator.LOOKUP_ENCODINGS)
+LOOKUP_ENCODING_LABELS = {
+    "auto": "Auto",
+    "statements": "Statements",
+    "arrays": "Arrays",
+    "packed": "Packed String",
+}
+
 
 # Dialog default sizes (width, height)
 ADD_GRID_WIZARD_SIZE = (460, 600)
@@ -1030,6 +1039,19 @@ class GridsTab(ttk.Frame):
         ttk.Button(btn_frame, text="Clear All", command=self._clear_all_grids, width=BTN_MEDIUM).pack(side='left', padx=2)
         ttk.Button(btn_frame, text="Database", command=self._on_database_click, width=BTN_MEDIUM).pack(side='left', padx=2)
         ttk.Button(btn_frame, text="Build", command=self._build, width=BTN_MEDIUM).pack(side='right', padx=2)
+
+        encoding = get_setting('grids_lookup_encoding', 'auto')
+        if encoding != 'auto' and encoding not in LOOKUP_ENCODINGS:
+            encoding = 'auto'
+        self.lookup_encoding_var = tk.StringVar(value=LOOKUP_ENCODING_LABELS[encoding])
+        lookup_cb = ttk.Combobox(btn_frame, textvariable=self.lookup_encoding_var,
+                                 values=list(LOOKUP_ENCODING_LABELS.values()),
+                                 state='readonly', width=13)
+        lookup_cb.pack(side='right', padx=(0, 6))
+        lookup_cb.bind('<<ComboboxSelected>>', lambda e: set_setting(
+            'grids_lookup_encoding', self.get_lookup_encoding()))
+        add_tooltip(lookup_cb, "Buff lookup encoding in KzGrids.swf (Auto compacts it near MTASC's 32KB class limit)")
+        ttk.Label(btn_frame, text="Lookup:").pack(side='right', padx=(6, 2))
         ttk.Button(btn_frame, text="Export...", command=self.export_grids, width=BTN_MEDIUM).pack(side='right', padx=2)
         ttk.Button(btn_frame, text="Import...", command=self.import_grids, width=BTN_MEDIUM).pack(side='right', padx=2)
 
@@ -1059,6 +1081,14 @@ class GridsTab(ttk.Frame):
         """Return current grid configurations."""
         return self.grids
 
+    def get_lookup_encoding(self):
+        """Return the selected lookup-table encoding key ("auto", "statements", ...)."""
+        label = self.lookup_encoding_var.get()
+        for key, text in LOOKUP_ENCODING_LABELS.items():
+            if text == label:
+                return key
+        return "auto"
+
     def load_profile_data(self, grids):
         """Load grid configs and rebuild panels."""
         self.grids = grids
@@ -1119,7 +1149,8 @@ class GridsTab(ttk.Frame):
 
         success, message = build_grids(
             grids, self.database, str(base_swf), str(stubs),
-            str(output_path), str(compiler_path), self.app_version
+            str(output_path), str(compiler_path), self.app_version,
+            lookup_encoding=self.get_lookup_encoding()
         )
 
         if success:
@@ -16,8 +16,11 @@ from .live_tracker_settings import (
     load_settings, save_settings, get_default_settings, validate_all_settings,
 )
 from .boss_timer import BossTimer
+from .clock import MonotonicClock
+from .encounters import load_encounters
 from .combat_monitor import CombatLogMonitor
 from .timer_overlay import TimerOverlay
+from .tracker_scheduler import TrackerScheduler
 from .ui_helpers import (
     THEME_COLORS, FONT_SMALL, FONT_SMALL_BOLD,
     create_tip_bar, create_profile_info_bar, BTN_SMALL, BTN_MEDIUM, add_tooltip,
@@ -58,7 +61,10 @@ class LiveTrackerTab(ttk.Frame):
         self.overlay = None
         self.boss_timer = None
         self.combat_monitor = None
-        self._game_loop_id = None
+        self.scheduler = None
+
+        # One clock shared by the timer, the log monitor and the game loop
+        self.clock = MonotonicClock()
 
         # Build UI
         self._build_ui()
@@ -67,8 +73,12 @@ class LiveTrackerTab(ttk.Frame):
         self._create_overlay()
 
         # Wire up components
-        self.boss_timer = BossTimer(update_callback=self.overlay.update_display)
-        self.combat_monitor = CombatLogMonitor(self.boss_timer)
+        encounters = load_encounters(Path(assets_path) / "encounters") if assets_path else None
+        self.boss_timer = BossTimer(update_callback=self.overlay.update_display,
+                                    encounters=encounters, clock=self.clock)
+        self.scheduler = TrackerScheduler(self, self.boss_timer)
+        self.combat_monitor = CombatLogMonitor(self.boss_timer, clock=self.clock,
+                                               event_sink=self.scheduler.post)
 
         # Auto-detect log path from game_path setting
         self._update_log_path()
@@ -289,6 +299,7 @@ class LiveTrackerTab(ttk.Frame):
         self.boss_timer.stop_cycle()
 
         self._stop_game_loop()
+        logger.debug("Tracker loop stats: %s", self.scheduler.stats())
 
         self.status_label.config(text="Stopped", foreground=THEME_COLORS['muted'])
         self.start_btn.config(state='normal')
@@ -316,22 +327,18 @@ class LiveTrackerTab(ttk.Frame):
             )
 
     def _start_game_loop(self):
-        """Start the 50ms update loop."""
-        def loop():
-            try:
-                self.boss_timer.update_display()
-            except Exception as e:
-                logger.error("Timer loop error: %s", e)
-            finally:
-                self._game_loop_id = self.after(50, loop)
+        """
+        Start the overlay update loop.
 
-        self._game_loop_id = self.after(50, loop)
+        TrackerScheduler refreshes on the next whole second of a running
+        cycle and otherwise sleeps until the combat monitor posts a trigger.
+        """
+        self.scheduler.start()
 
     def _stop_game_loop(self):
         """Stop the update loop."""
-        if self._game_loop_id:
-            self.after_cancel(self._game_loop_id)
-            self._game_loop_id = None
+        if self.scheduler:
+            self.scheduler.stop()
 
     def _toggle_overlay(self):
         """Toggle overlay visibility."""
@@ -376,6 +383,7 @@ class LiveTrackerTab(ttk.Frame):
             def trigger_fixation():
                 if self.boss_timer.timer_active:
                     self.boss_timer.update_fixation("FixPlayer")
+                    self.scheduler.wake()
 
             def check_reset():
                 if not self.boss_timer.timer_active:
@@ -0,0 +1,451 @@
+"""
+KzBuilder — Combat Log Index
+Offline index of every CombatLog*.txt in the game folder.
+
+The game never deletes old combat logs, so the folder fills up with
+hundreds of megabytes of text. CombatLogIndex scans each log once and
+records, per file:
+
+- trigger occurrences: byte offset, log time and event of every line a
+  loaded encounter's triggers match
+- pulls: runs of one encounter's triggers that begin with a start event
+  and end after two cycles without a trigger
+- checkpoints: (offset, log time) every CHECKPOINT_BYTES, so any moment of
+  the log can be seeked to without reading what comes before it
+
+Scanning works on raw bytes: the trigger engine's anchor prefilter runs
+over whole chunks and only lines it hits are decoded and matched.
+update() is incremental: a file that only grew is scanned from where the
+last scan stopped; a replaced or truncated file is rescanned.
+
+Log times are seconds since midnight of the file's first day (a midnight
+rollover inside a file adds a day), as in log_replay.
+
+Usage:
+    index = CombatLogIndex(game_folder, settings_folder / "combatlog_index.json")
+    index.update()
+    for pull in index.pulls("ethram-fal"):
+        LogReplay().run(pull.path, start=pull.start_offset, stop=pull.end_offset)
+
+Command line (updates the index and lists every pull, or replays one):
+
+    python -m Modules.log_index AgeOfConan/ [--encounter ID] [--replay N]
+"""
+
+import argparse
+import bisect
+import hashlib
+import json
+import logging
+import re
+import sys
+import tempfile
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import List, Optional
+
+from .encounters import load_encounters
+from .log_replay import DAY, LogReplay, parse_timestamp, print_timeline
+from .log_triggers import TriggerEngine
+from .log_watcher import is_combat_log
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+SCAN_CHUNK = 1024 * 1024
+CHECKPOINT_BYTES = 1024 * 1024
+
+# Bytes hashed to tell a grown file from a replaced one
+HEAD_BYTES = 4096
+
+# Longest line kept across a chunk boundary (see log_reader.MAX_LINE_BYTES)
+MAX_LINE_BYTES = 64 * 1024
+
+# A pull ends after this many cycles without one of its encounter's triggers
+PULL_GAP_CYCLES = 2
+
+# Index file used by the command line when --index-file is not given
+DEFAULT_INDEX_FILE = Path(tempfile.gettempdir()) / "KzBuilder_combatlog_index.json"
+
+
+@dataclass
+class IndexedEvent:
+    """One trigger occurrence."""
+    path: str
+    offset: int             # byte offset of the line
+    time: float             # log time (seconds, see module docstring)
+    encounter_id: str
+    event: str
+
+
+@dataclass
+class Pull:
+    """One attempt at an encounter: first start trigger to last trigger."""
+    path: str
+    encounter_id: str
+    start_offset: int       # first byte of the starting line
+    end_offset: int         # one past the last trigger line
+    start_time: float
+    end_time: float
+    triggers: int
+
+    @property
+    def duration(self) -> float:
+        return self.end_time - self.start_time
+
+
+class CombatLogIndex:
+    """
+    On-disk index of trigger offsets, pulls and timestamps for a combat log folder.
+    """
+
+    def __init__(self, folder, index_path, encounters=None, encoding='utf-8'):
+        """
+        Initialize the index (loads index_path if it exists).
+
+        Args:
+            folder: Folder containing CombatLog*.txt files
+            index_path: JSON file the index is kept in
+            encounters: Encounter list whose triggers are indexed (default:
+                bundled definitions). Changing the triggers invalidates the index.
+            encoding: Text encoding of the logs
+        """
+        self.folder = Path(folder)
+        self.index_path = Path(index_path)
+        self.encoding = encoding
+        self.encounters = {e.id: e for e in (load_encounters() if encounters is None else encounters)}
+
+        self._engine = TriggerEngine()
+        self._event_keys = []
+        for encounter in self.encounters.values():
+            for trigger in encounter.triggers:
+                key = f"{encounter.id}:{trigger.event}"
+                if key not in self._event_keys:
+                    self._event_keys.append(key)
+            self._engine.add(*[_keyed(encounter, t) for t in encounter.triggers])
+        pattern = self._engine.prefilter_pattern()
+        self._prefilter = re.compile(pattern.encode('utf-8')) if pattern else None
+        self._codes = {key: code for code, key in enumerate(self._event_keys)}
+        self._signature = hashlib.sha256(json.dumps(
+            [[t.template, t.event] for t in self._engine.triggers]).encode('utf-8')).hexdigest()[:16]
+
+        self.files = {}
+        self.load()
+
+    # =========================================================================
+    # PERSISTENCE
+    # =========================================================================
+
+    def load(self):
+        """Read the index file; a missing, corrupt or stale index starts empty."""
+        self.files = {}
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning("Could not read combat log index %s: %s", self.index_path, e)
+            return
+        if data.get('version') != INDEX_VERSION or data.get('triggers') != self._signature:
+            return
+        if data.get('events') != self._event_keys:
+            return
+        self.files = data.get('files', {})
+
+    def save(self):
+        """Write the index file (compact JSON)."""
+        data = {'version': INDEX_VERSION, 'triggers': self._signature,
+                'events': self._event_keys, 'files': self.files}
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.index_path.with_suffix('.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            tmp.replace(self.index_path)
+        except OSError as e:
+            logger.warning("Could not write combat log index %s: %s", self.index_path, e)
+
+    # =========================================================================
+    # SCANNING
+    # =========================================================================
+
+    def update(self, save=True) -> dict:
+        """
+        Bring the index up to date with the folder.
+
+        New files are scanned, grown files are scanned from where the last
+        scan stopped, replaced or truncated files are rescanned and deleted
+        files are dropped.
+
+        Returns:
+            dict: {'files', 'scanned', 'bytes'} - files indexed, files read,
+                bytes read
+        """
+        stats = {'files': 0, 'scanned': 0, 'bytes': 0}
+        present = set()
+        try:
+            paths = sorted(p for p in self.folder.iterdir() if is_combat_log(p.name))
+        except OSError as e:
+            logger.warning("Could not list combat logs in %s: %s", self.folder, e)
+            paths = []
+
+        for path in paths:
+            present.add(path.name)
+            try:
+                read = self._update_file(path)
+            except OSError as e:
+                logger.warning("Could not index %s: %s", path.name, e)
+                continue
+            if read:
+                stats['scanned'] += 1
+                stats['bytes'] += read
+
+        removed = set(self.files) - present
+        for name in removed:
+            del self.files[name]
+        stats['files'] = len(self.files)
+        if save and (stats['scanned'] or removed or not self.index_path.exists()):
+            self.save()
+        return stats
+
+    def _update_file(self, path) -> int:
+        """Scan whatever of path is not indexed yet. Returns bytes read."""
+        st = path.stat()
+        entry = self.files.get(path.name)
+        if entry is not None:
+            if st.st_size < entry['scanned'] or _head_digest(path, entry['head_len']) != entry['head']:
+                entry = None
+            elif st.st_size == entry['size']:
+                return 0
+        if entry is None:
+            entry = self.files[path.name] = _new_entry()
+
+        if entry['head_len'] < HEAD_BYTES:
+            entry['head_len'] = min(st.st_size, HEAD_BYTES)
+            entry['head'] = _head_digest(path, entry['head_len'])
+
+        start = entry['scanned']
+        with open(path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            carry = b""
+            while True:
+                chunk = f.read(SCAN_CHUNK)
+                if not chunk:
+                    break
+                buf = carry + chunk if carry else chunk
+                last = buf.rfind(b"\n")
+                if last < 0:
+                    carry = buf
+                    if len(carry) > MAX_LINE_BYTES:
+                        offset += len(carry)
+                        carry = b""
+                    continue
+                body = buf[:last + 1]
+                self._scan_block(entry, body, offset)
+                offset += len(body)
+                carry = buf[last + 1:]
+        entry['scanned'] = offset
+        entry['size'] = st.st_size
+        entry['mtime'] = st.st_mtime
+        return offset - start
+
+    def _scan_block(self, entry, body, base):
+        """Index one block of complete lines starting at file offset base."""
+        if entry['first_time'] is None:
+            for line_start in _line_starts(body, 0):
+                if self._time_at(entry, body, line_start) is not None:
+                    entry['first_time'] = entry['last_time']
+                    break
+
+        # Collect checkpoint lines and trigger hits, then visit them in file
+        # order so midnight rollover is detected in the right place
+        marks = []
+        end = base + len(body)
+        while entry['next_checkpoint'] < end:
+            pos = max(0, entry['next_checkpoint'] - base)
+            if pos > 0 and body[pos - 1:pos] != b"\n":
+                pos = body.find(b"\n", pos) + 1 or len(body)
+            entry['next_checkpoint'] += CHECKPOINT_BYTES
+            if 0 <= pos < len(body):
+                marks.append((pos, -1))
+        if self._prefilter is not None:
+            line_end = -1
+            for hit in self._prefilter.finditer(body):
+                if hit.start() <= line_end:
+                    continue        # another anchor on a line already seen
+                line_start = body.rfind(b"\n", 0, hit.start()) + 1
+                line_end = body.find(b"\n", hit.end())
+                marks.append((line_start, line_end))
+        marks.sort()
+
+        for line_start, line_end in marks:
+            if line_end < 0:
+                for pos in _line_starts(body, line_start):
+                    t = self._time_at(entry, body, pos)
+                    if t is not None:
+                        entry['checkpoints'].append([base + pos, t])
+                        break
+                continue
+            line = body[line_start:line_end].rstrip(b"\r").decode(self.encoding, 'replace')
+            match = self._engine.match(line)
+            if match is None:
+                continue
+            t = self._time_of(entry, line)
+            if t is None:
+                t = entry['last_time']
+            self._record(entry, base + line_start, base + line_end + 1, t, match.event)
+
+        # Latest time in the block (keeps midnight rollover detection tight)
+        last_line = body.rfind(b"\n", 0, len(body) - 1) + 1
+        self._time_at(entry, body, last_line)
+
+    def _record(self, entry, offset, line_end, t, key):
+        """Add an event and extend or open its encounter's pull."""
+        entry['events'].append([offset, t, self._codes[key]])
+        encounter_id, event = key.split(":", 1)
+        encounter = self.encounters[encounter_id]
+        gap = PULL_GAP_CYCLES * encounter.cycle_duration
+        pull = entry['open'].get(encounter_id)
+        if pull is not None and t is not None and pull[3] is not None and t - pull[3] <= gap:
+            pull[2], pull[3] = line_end, t
+            pull[4] += 1
+            return
+        if pull is not None:
+            entry['pulls'].append([pull[0], pull[1], pull[2], pull[3], encounter_id, pull[4]])
+            del entry['open'][encounter_id]
+        binding = encounter.bindings.get(event)
+        if binding is not None and binding.action == "start":
+            entry['open'][encounter_id] = [offset, t, line_end, t, 1]
+
+    def _time_at(self, entry, body, line_start) -> Optional[float]:
+        """Parse the timestamp of the line at line_start (None if it has none)."""
+        head = body[line_start:line_start + 32].decode(self.encoding, 'replace')
+        return self._time_of(entry, head)
+
+    @staticmethod
+    def _time_of(entry, line) -> Optional[float]:
+        """Log time of a line (None without a timestamp), tracking midnight rollover in entry."""
+        stamp = parse_timestamp(line)
+        if stamp is None:
+            return None
+        t = stamp + entry['day_offset']
+        if entry['last_time'] is not None and t < entry['last_time'] - DAY / 2:
+            entry['day_offset'] += DAY
+            t += DAY
+        t = round(t, 3)
+        entry['last_time'] = t
+        return t
+
+    # =========================================================================
+    # QUERIES
+    # =========================================================================
+
+    def pulls(self, encounter_id=None) -> List[Pull]:
+        """Every pull (oldest log first), optionally for one encounter."""
+        result = []
+        for name in sorted(self.files):
+            entry = self.files[name]
+            path = str(self.folder / name)
+            rows = list(entry['pulls'])
+            rows += [[p[0], p[1], p[2], p[3], enc_id, p[4]] for enc_id, p in entry['open'].items()]
+            for start, start_t, end, end_t, enc_id, count in sorted(rows, key=lambda r: r[0]):
+                if encounter_id is None or enc_id == encounter_id:
+                    result.append(Pull(path, enc_id, start, end,
+                                       start_t or 0.0, end_t or 0.0, count))
+        return result
+
+    def events(self, name=None) -> List[IndexedEvent]:
+        """Every indexed trigger occurrence, optionally for one log file name."""
+        result = []
+        for file_name in sorted(self.files):
+            if name is not None and file_name != Path(name).name:
+                continue
+            path = str(self.folder / file_name)
+            for offset, t, code in self.files[file_name]['events']:
+                encounter_id, event = self._event_keys[code].split(":", 1)
+                result.append(IndexedEvent(path, offset, t or 0.0, encounter_id, event))
+        return result
+
+    def offset_at(self, name, seconds) -> int:
+        """
+        Byte offset to start reading name from to see log time seconds.
+
+        Returns the last checkpoint at or before that time (0 if none), so a
+        reader started there reaches the moment after at most
+        CHECKPOINT_BYTES of lines.
+        """
+        entry = self.files.get(Path(name).name)
+        if not entry or not entry['checkpoints']:
+            return 0
+        times = [t for _, t in entry['checkpoints']]
+        i = bisect.bisect_right(times, seconds) - 1
+        return entry['checkpoints'][i][0] if i >= 0 else 0
+
+
+def _keyed(encounter, trigger):
+    """Trigger copy whose event is "encounter-id:event" (as BossTimer registers them)."""
+    return replace(trigger, event=f"{encounter.id}:{trigger.event}")
+
+
+def _new_entry() -> dict:
+    return {
+        'size': 0, 'mtime': 0.0, 'head': "", 'head_len': 0, 'scanned': 0,
+        'day_offset': 0.0, 'first_time': None, 'last_time': None,
+        'next_checkpoint': 0,
+        'checkpoints': [],      # [offset, time]
+        'events': [],           # [offset, time, event code]
+        'pulls': [],            # [start, start time, end, end time, encounter id, triggers]
+        'open': {},             # encounter id -> [start, start time, end, end time, triggers]
+    }
+
+
+def _head_digest(path, length) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read(length)).hexdigest()
+
+
+def _line_starts(body, pos):
+    """Yield the start offset of each line in body from pos (a line start) on."""
+    while pos < len(body):
+        yield pos
+        nl = body.find(b"\n", pos)
+        if nl < 0:
+            return
+        pos = nl + 1
+
+
+def main(argv=None):
+    """Index a combat log folder and list its pulls, or replay one of them."""
+    parser = argparse.ArgumentParser(prog="python -m Modules.log_index",
+                                     description="Index the combat logs in a folder and list every pull")
+    parser.add_argument("folder", help="folder containing CombatLog*.txt (the AoC game folder)")
+    parser.add_argument("--index-file", default=str(DEFAULT_INDEX_FILE), metavar="PATH",
+                        help=f"index to create or update (default: {DEFAULT_INDEX_FILE})")
+    parser.add_argument("--encounter", metavar="ID", help="only list pulls of this encounter")
+    parser.add_argument("--replay", type=int, metavar="N",
+                        help="replay pull N of the listing and print its phase timeline")
+    args = parser.parse_args(argv)
+
+    index = CombatLogIndex(args.folder, args.index_file)
+    stats = index.update()
+    pulls = index.pulls(args.encounter)
+    if args.replay is not None:
+        if not 1 <= args.replay <= len(pulls):
+            parser.error(f"--replay must be between 1 and {len(pulls)}")
+        pull = pulls[args.replay - 1]
+        print_timeline(LogReplay(speed=None).run(pull.path, start=pull.start_offset,
+                                                 stop=pull.end_offset))
+        return 0
+    for n, pull in enumerate(pulls, 1):
+        print(f"{n:4}  {Path(pull.path).name:32} {pull.encounter_id:14} "
+              f"bytes {pull.start_offset}-{pull.end_offset}  "
+              f"{pull.duration:6.0f}s  {pull.triggers:3} triggers")
+    print(f"\n{stats['files']} logs indexed, {stats['scanned']} scanned ({stats['bytes']} bytes read)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+KzBuilder — Combat Log Line Reader
+Incremental, bounded-memory line reader for a file that is still being written.
+
+The game appends to the combat log while we read it, so a read can end in
+the middle of a line. LogLineReader reads fixed-size binary chunks, yields
+only complete lines, and carries the unfinished tail over to the next
+read. A large backlog (e.g. after rescanning an old log) is streamed chunk
+by chunk instead of being loaded as one string.
+"""
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+# A "line" longer than this without a newline is not combat log output;
+# it is dropped so the carry-over buffer stays bounded
+MAX_LINE_BYTES = 64 * 1024
+
+
+class LogLineReader:
+    """
+    Stream complete lines appended to a file.
+
+    Usage:
+        reader = LogLineReader(path, position=os.path.getsize(path))
+        for line in reader.read_lines():
+            ...
+        reader.close()
+
+    position is the file offset just past the last complete line handed
+    out; bytes of an unfinished line are held in memory and re-read never.
+    Memory use is bounded by chunk_size + max_line_bytes however far
+    behind the reader is.
+    """
+
+    def __init__(self, path, position=0, chunk_size=CHUNK_SIZE,
+                 max_line_bytes=MAX_LINE_BYTES, encoding='utf-8'):
+        """
+        Initialize the reader (the file is opened on first read).
+
+        Args:
+            path: File to follow
+            position: Byte offset to start reading from
+            chunk_size: Bytes per read() call
+            max_line_bytes: Longest line kept; longer ones are dropped
+            encoding: Text encoding of complete lines (errors are replaced)
+        """
+        self.path = str(path)
+        self.chunk_size = chunk_size
+        self.max_line_bytes = max_line_bytes
+        self.encoding = encoding
+        self._handle = None
+        self._offset = position     # file offset of the next byte to read
+        self._partial = b""         # unfinished trailing line
+        self._discarding = False    # inside an over-long line, skip to its newline
+
+    @property
+    def position(self) -> int:
+        """Offset just past the last complete line (where a fresh reader would resume)."""
+        return self._offset - len(self._partial)
+
+    def seek(self, position):
+        """Restart at position, dropping any buffered partial line."""
+        self._offset = position
+        self._partial = b""
+        self._discarding = False
+
+    def close(self):
+        """Close the file handle (the position is kept)."""
+        if self._handle is not None:
+            try:
+                self._handle.close()
+            except OSError:
+                pass
+            self._handle = None
+
+    def read_lines(self):
+        """
+        Yield each complete line appended since the last call, without the
+        line terminator.
+
+        Restarts from the beginning if the file shrank (truncated or
+        replaced). Raises OSError if the file cannot be opened or read;
+        the reader stays usable afterwards.
+        """
+        size = os.stat(self.path).st_size
+        if size < self._offset:
+            self.close()
+            self.seek(0)
+        if size == self._offset:
+            return
+        if self._handle is None:
+            self._handle = open(self.path, 'rb')
+        self._handle.seek(self._offset)
+
+        while True:
+            chunk = self._handle.read(self.chunk_size)
+            if not chunk:
+                return
+            self._offset += len(chunk)
+            start = 0
+            if self._discarding:
+                end = chunk.find(b"\n")
+                if end < 0:
+                    continue
+                self._discarding = False
+                start = end + 1
+            elif self._partial:
+                end = chunk.find(b"\n")
+                if end >= 0:
+                    line = self._partial + chunk[:end]
+                    self._partial = b""
+                    start = end + 1
+                    yield self._decode(line)
+
+            last = chunk.rfind(b"\n")
+            if last >= start:
+                for line in chunk[start:last].split(b"\n"):
+                    yield self._decode(line)
+                tail = chunk[last + 1:]
+            else:
+                tail = chunk[start:]
+            self._carry(tail)
+
+    def _carry(self, tail):
+        """Append an unterminated tail to the partial buffer, dropping over-long lines."""
+        if not tail:
+            return
+        if len(self._partial) + len(tail) > self.max_line_bytes:
+            logger.warning("Dropping combat log line longer than %d bytes", self.max_line_bytes)
+            self._partial = b""
+            self._discarding = True
+            return
+        self._partial += tail
+
+    def _decode(self, line):
+        if line.endswith(b"\r"):
+            line = line[:-1]
+        return line.decode(self.encoding, 'replace')
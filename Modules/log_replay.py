@@ -0,0 +1,241 @@
+"""
+KzBuilder — Combat Log Replay
+Feed a recorded CombatLog*.txt through the live trigger pipeline.
+
+Lines go through CombatLogMonitor._process_line() (the same trigger engine
+and bindings as a live raid) while a VirtualClock follows the timestamps
+in the log, so BossTimer computes exactly the phases it would have shown.
+The overlay loop is simulated the way TrackerScheduler runs it live: a
+refresh on every trigger and at each BossTimer.next_update_in() deadline,
+nothing while idle. Every display change is recorded with its log time.
+
+Speed only controls wall-clock pacing: 1.0 replays in real time, 10.0 ten
+times faster, None as fast as possible. Phase timing is identical at any
+speed because BossTimer never sees the real clock.
+
+Command line (prints the overlay timeline; byte ranges of past pulls come
+from `python -m Modules.log_index`):
+
+    python -m Modules.log_replay CombatLog-x.txt [--start OFFSET] [--stop OFFSET] [--speed N]
+"""
+
+import argparse
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+from .boss_timer import BossTimer
+from .clock import VirtualClock
+from .combat_monitor import CombatLogMonitor
+from .log_reader import LogLineReader
+from .log_triggers import TriggerMatch
+
+# Leading "[HH:MM:SS]" (optionally with fractional seconds); lines without
+# one inherit the previous line's time
+TIMESTAMP_RE = re.compile(r"^\s*\[?(\d{1,2}):(\d{2}):(\d{2})(?:[.,](\d{1,6}))?\]?")
+
+DAY = 24 * 60 * 60
+
+
+def parse_timestamp(line) -> Optional[float]:
+    """Seconds since midnight of a line's leading timestamp, or None."""
+    m = TIMESTAMP_RE.match(line)
+    if m is None:
+        return None
+    hours, minutes, seconds, fraction = m.groups()
+    value = int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+    if fraction:
+        value += int(fraction) / (10 ** len(fraction))
+    return float(value)
+
+
+@dataclass
+class ReplayResult:
+    """What a replay saw. Times are seconds since the first timestamped line."""
+    lines: int = 0
+    log_seconds: float = 0.0
+    wall_seconds: float = 0.0
+    matches: List[Tuple[float, TriggerMatch]] = field(default_factory=list)
+    updates: List[Tuple[float, dict]] = field(default_factory=list)   # display changes
+    pushes: int = 0                                                    # all update callbacks
+
+    @property
+    def lines_per_second(self) -> float:
+        return self.lines / self.wall_seconds if self.wall_seconds else 0.0
+
+    @property
+    def compression(self) -> float:
+        """Log time replayed per wall-clock second."""
+        return self.log_seconds / self.wall_seconds if self.wall_seconds else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.lines} lines, {len(self.matches)} triggers, "
+                f"{len(self.updates)} display changes over {self.log_seconds:.0f}s of log "
+                f"in {self.wall_seconds:.2f}s ({self.compression:.0f}x)")
+
+
+class LogReplay:
+    """
+    Replay a combat log against a fresh BossTimer.
+
+    Usage:
+        result = LogReplay(speed=None).run("CombatLog-2024-01-01.txt")
+        for t, display in result.updates:
+            print(f"{t:7.2f}  {display['row1_msg']}{display['row1_player']}")
+    """
+
+    def __init__(self, encounters=None, speed=None, on_update: Optional[Callable] = None):
+        """
+        Initialize the replay.
+
+        Args:
+            encounters: Encounter list for BossTimer (default: bundled definitions)
+            speed: Wall-clock speed multiplier (1.0 = real time), None = unpaced
+            on_update: Optional extra display callback (e.g. a TimerOverlay's
+                update_display) called with every push
+        """
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be positive (or None for as fast as possible)")
+        self.speed = speed
+        self.on_update = on_update
+        self.clock = VirtualClock()
+        self.timer = BossTimer(update_callback=self._record, encounters=encounters,
+                               clock=self.clock)
+        # Never started: only its trigger engine and _process_line() are used
+        self.monitor = CombatLogMonitor(self.timer)
+        self._result = None
+        self._last_display = None
+        self._due = None            # log time of the next scheduled refresh
+        self._wall_start = 0.0
+
+    def run(self, source, start=0, stop=None) -> ReplayResult:
+        """
+        Replay source to the end (or to byte offset stop).
+
+        Args:
+            source: Path to a combat log (streamed from byte offset start),
+                or any iterable of lines
+            start: Byte offset to begin at when source is a path
+            stop: Byte offset to end at when source is a path (e.g. a
+                log_index.Pull's end_offset); None = end of file
+
+        Returns:
+            ReplayResult
+        """
+        if isinstance(source, (str, bytes)) or hasattr(source, "__fspath__"):
+            if stop is not None:
+                return self._run(_read_range(source, start, stop))
+            reader = LogLineReader(source, position=start)
+            try:
+                return self._run(reader.read_lines())
+            finally:
+                reader.close()
+        return self._run(source)
+
+    def _run(self, lines) -> ReplayResult:
+        result = self._result = ReplayResult()
+        self._last_display = None
+        self._due = None
+        self._wall_start = time.perf_counter()
+        first = None
+        previous = None
+        day_offset = 0.0
+
+        for line in lines:
+            result.lines += 1
+            stamp = parse_timestamp(line)
+            if stamp is not None:
+                if first is None:
+                    first = stamp
+                elif stamp + day_offset < previous - DAY / 2:
+                    day_offset += DAY       # crossed midnight
+                previous = stamp + day_offset
+                self._advance(previous - first)
+            match = self.monitor._process_line(line)
+            if match is not None:
+                result.matches.append((self.clock.now(), match))
+                self._refresh(self.clock.now())     # the live loop is woken by triggers
+
+        # Let the last cycle run out
+        while self._due is not None:
+            self._refresh(self._due)
+
+        result.log_seconds = self.clock.now()
+        result.wall_seconds = time.perf_counter() - self._wall_start
+        return result
+
+    def _advance(self, target):
+        """Run the refreshes due up to log time target, then move the clock there."""
+        while self._due is not None and self._due <= target:
+            self._refresh(self._due)
+        self._pace(target)
+        self.clock.set(target)
+
+    def _refresh(self, log_time):
+        """One simulated overlay refresh at log_time; schedules the next deadline."""
+        self._pace(log_time)
+        self.clock.set(log_time)
+        self.timer.update_display()
+        delay = self.timer.next_update_in()
+        self._due = None if delay is None else self.clock.now() + delay
+
+    def _pace(self, log_time):
+        """Sleep until log_time is due at the configured speed."""
+        if self.speed is None:
+            return
+        delay = self._wall_start + log_time / self.speed - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _record(self, **display):
+        """BossTimer display callback: count pushes, keep changes."""
+        self._result.pushes += 1
+        if display != self._last_display:
+            self._last_display = display
+            self._result.updates.append((self.clock.now(), display))
+        if self.on_update:
+            self.on_update(**display)
+
+
+def _read_range(path, start, stop):
+    """Lines of path between byte offsets start and stop (a bounded slice, e.g. one pull)."""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(max(0, stop - start))
+    return [line.rstrip(b"\r").decode('utf-8', 'replace') for line in data.split(b"\n") if line]
+
+
+def format_update(t, display) -> str:
+    """One timeline line for a recorded display change."""
+    row2 = f"{display['row2_msg']}{display['row2_player']} {display['row2_timer']}".strip()
+    return (f"{t:9.2f}  {display['cycle_timer']:>4}  "
+            f"{display['row1_msg']}{display['row1_player']} {display['row1_timer']}".rstrip()
+            + (f"  | {row2}" if row2 else ""))
+
+
+def print_timeline(result):
+    """Print every display change of a replay, then its summary."""
+    for t, display in result.updates:
+        print(format_update(t, display))
+    print(f"\n{result.summary()}")
+
+
+def main(argv=None):
+    """Replay a combat log (or a byte range of it) and print its phase timeline."""
+    parser = argparse.ArgumentParser(prog="python -m Modules.log_replay",
+                                     description="Replay a combat log through the Live Tracker pipeline")
+    parser.add_argument("log", help="CombatLog*.txt to replay")
+    parser.add_argument("--start", type=int, default=0, metavar="OFFSET",
+                        help="byte offset to start at (e.g. a pull from python -m Modules.log_index)")
+    parser.add_argument("--stop", type=int, metavar="OFFSET", help="byte offset to stop at")
+    parser.add_argument("--speed", type=float, metavar="N",
+                        help="wall-clock speed multiplier (default: as fast as possible)")
+    args = parser.parse_args(argv)
+    print_timeline(LogReplay(speed=args.speed).run(args.log, start=args.start, stop=args.stop))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+KzBuilder — Combat Log Triggers
+Compiled multi-pattern matcher for combat log lines.
+
+Triggers are data: a phrase template with {actor} / {target} placeholders
+and the event it raises. TriggerEngine matches in two stages:
+
+1. Every trigger's longest literal run (its anchor) is compiled into one
+   prefix-trie regex, so a line is scanned once and the regex engine
+   follows a single branch per character — cost stays flat as triggers
+   are added (the same idea as an Aho-Corasick automaton).
+2. Only lines that contain an anchor run the full template regexes, which
+   extract the actor and target.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+# Placeholder -> capture pattern. A placeholder with literal text on both
+# sides takes whatever lies between them (_BETWEEN), like the old marker
+# extraction did, so any player name matches ("Ædric", "élise",
+# "xXSlayerXx"). These patterns are only used at the start or end of a
+# template, where there is no marker to stop at: "you" or runs of words
+# starting with a letter, which keeps a leading {actor} from swallowing
+# the timestamp and a trailing {target} from stopping after one character.
+_NAME = r"you|[^\W\d_][\w'-]*(?: [^\W\d_][\w'-]*)*"
+_BETWEEN = r".+?"
+
+PLACEHOLDERS = {
+    "actor": _NAME,
+    "target": _NAME,
+}
+
+_PLACEHOLDER_RE = re.compile(r"\{(\w+)\}")
+
+# The log names the local player "you"; handlers receive this instead
+YOU = "YOU"
+
+
+@dataclass
+class Trigger:
+    """
+    One combat log phrase and the event it raises.
+
+    template: Literal log text with {actor} and/or {target} placeholders
+    event: Handler key passed to TriggerEngine.on()
+    ability: Ability name reported with the match
+    actor: Fixed actor when the template has no {actor} placeholder
+    """
+    template: str
+    event: str
+    ability: str = ""
+    actor: str = ""
+
+
+@dataclass
+class TriggerMatch:
+    """Result of matching one line."""
+    trigger: Trigger
+    actor: str
+    target: str
+    ability: str
+    line: str
+    time: Optional[float] = None    # clock time the line was read, if known
+
+    @property
+    def event(self) -> str:
+        return self.trigger.event
+
+
+def compile_template(template) -> str:
+    """Turn a phrase template into a regex with one named group per placeholder."""
+    parts = []
+    pos = 0
+    for m in _PLACEHOLDER_RE.finditer(template):
+        name = m.group(1)
+        if name not in PLACEHOLDERS:
+            raise ValueError(f"Unknown placeholder {{{name}}} in trigger {template!r}")
+        before = template[pos:m.start()]
+        after = _PLACEHOLDER_RE.split(template[m.end():], 1)[0]
+        bounded = before.strip() and after.strip()
+        parts.append(re.escape(before))
+        parts.append(f"(?P<{name}>{_BETWEEN if bounded else PLACEHOLDERS[name]})")
+        pos = m.end()
+    parts.append(re.escape(template[pos:]))
+    return "".join(parts)
+
+
+def template_anchor(template) -> str:
+    """Longest literal run of a template (what the prefilter looks for)."""
+    anchor = max(_PLACEHOLDER_RE.split(template)[::2], key=len).strip()
+    if not anchor:
+        raise ValueError(f"Trigger {template!r} has no literal text")
+    return anchor
+
+
+def trie_pattern(words) -> str:
+    """
+    Regex matching any of words, factored into a prefix trie.
+
+    "Lotus Fixation|Lotus Bloom" becomes "Lotus\\ (?:Bloom|Fixation)", so
+    the engine never retries shared prefixes per alternative.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        if "" in node:
+            body = "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class TriggerEngine:
+    """
+    Match combat log lines against many triggers.
+
+    Usage:
+        engine = TriggerEngine(encounter.triggers)
+        engine.on("seed", lambda m: timer.start_cycle(m.target))
+        engine.dispatch(line)
+    """
+
+    def __init__(self, triggers=()):
+        """Initialize and compile triggers (more can be added with add())."""
+        self.triggers: List[Trigger] = []
+        self._handlers: Dict[str, List[Callable[[TriggerMatch], None]]] = {}
+        self._compiled = []         # (anchor, regex, trigger) in priority order
+        self._prefilter = None
+        self.add(*triggers)
+
+    def add(self, *triggers):
+        """Add triggers and recompile."""
+        self.triggers.extend(triggers)
+        self._compile()
+
+    def on(self, event, handler):
+        """Register handler(match) for an event name."""
+        self._handlers.setdefault(event, []).append(handler)
+
+    def _compile(self):
+        """Compile each template and the shared anchor prefilter."""
+        self._compiled = [
+            (template_anchor(t.template), re.compile(compile_template(t.template)), t)
+            for t in self.triggers
+        ]
+        anchors = {anchor for anchor, _, _ in self._compiled}
+        self._prefilter = re.compile(trie_pattern(anchors)) if anchors else None
+
+    def prefilter_pattern(self) -> Optional[str]:
+        """The anchor prefilter regex source (None with no triggers), e.g. to
+        scan raw log bytes before decoding lines."""
+        return self._prefilter.pattern if self._prefilter is not None else None
+
+    def match(self, line) -> Optional[TriggerMatch]:
+        """Return the highest-priority trigger match in line, or None."""
+        if self._prefilter is None or self._prefilter.search(line) is None:
+            return None
+        for anchor, regex, trigger in self._compiled:
+            if anchor not in line:
+                continue
+            m = regex.search(line)
+            if m is None:
+                continue
+            groups = m.groupdict()
+            actor = (groups.get("actor") or trigger.actor).strip()
+            target = (groups.get("target") or "").strip()
+            if target == "you":
+                target = YOU
+            return TriggerMatch(trigger, actor, target, trigger.ability, line)
+        return None
+
+    def dispatch(self, line, at=None) -> Optional[TriggerMatch]:
+        """Match line (read at clock time at) and call the handlers registered for its event."""
+        match = self.match(line)
+        if match is not None:
+            match.time = at
+            for handler in self._handlers.get(match.trigger.event, ()):
+                handler(match)
+        return match
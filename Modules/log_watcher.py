@@ -0,0 +1,357 @@
+"""
+KzBuilder — Combat Log Watchers
+Pluggable wake-up backends for CombatLogMonitor.
+
+A watcher only answers "has the log folder changed?" — the monitor still
+does the reading. InotifyWatcher blocks in the kernel until the game writes
+(Linux, including AoC under Wine/Proton), so triggers arrive within a few
+milliseconds and the thread sleeps between fights. WindowsWatcher does the
+same with folder change notifications, re-reading at least every 100ms
+because NTFS may report a growing file late. PollingWatcher is the portable
+fallback: it polls fast while lines are arriving and backs off while the
+log is quiet, never beyond the old fixed 100ms poll.
+"""
+
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+# wait() result bits
+MODIFIED = 1    # a combat log may have grown (always set by polling)
+CREATED = 2     # a combat log appeared or was renamed into the folder
+
+LOG_PREFIX = "CombatLog"
+LOG_SUFFIX = ".txt"
+
+WATCHER_KINDS = ("auto", "inotify", "windows", "polling")
+
+
+def is_combat_log(name) -> bool:
+    """True for CombatLog*.txt file names."""
+    return name.startswith(LOG_PREFIX) and name.endswith(LOG_SUFFIX)
+
+
+class LogWatcher:
+    """
+    Base watcher.
+
+    Subclasses implement wait(). The monitor calls note_activity() after
+    every read so adaptive backends can retune themselves, and wake() from
+    another thread to interrupt a pending wait() on shutdown.
+    """
+
+    name = "base"
+
+    def __init__(self, folder):
+        """Initialize for the folder that holds the combat logs."""
+        self.folder = str(folder)
+
+    def wait(self, timeout) -> int:
+        """Block up to timeout seconds. Returns MODIFIED/CREATED bits, 0 on timeout."""
+        raise NotImplementedError
+
+    def note_activity(self, had_data):
+        """Tell the watcher whether the last read returned new lines."""
+
+    def wake(self):
+        """Make a pending wait() return early (thread-safe)."""
+
+    def close(self):
+        """Release OS resources."""
+
+
+class PollingWatcher(LogWatcher):
+    """
+    Adaptive-backoff polling.
+
+    The interval drops to min_interval as soon as a read returns data and
+    stays there for active_window seconds after the last line (a fight in
+    progress). Once the log is quiet the interval doubles per idle poll up
+    to max_interval, so the first line after a quiet spell is seen at most
+    max_interval late.
+    """
+
+    name = "polling"
+
+    def __init__(self, folder, min_interval=0.005, max_interval=0.1, active_window=10.0):
+        super().__init__(folder)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.active_window = active_window
+        self.interval = max_interval
+        self._last_data = None
+        self._wake = threading.Event()
+
+    def wait(self, timeout) -> int:
+        """Sleep one polling interval (capped by timeout) and report MODIFIED."""
+        if self._wake.wait(min(self.interval, timeout)):
+            self._wake.clear()
+        return MODIFIED
+
+    def note_activity(self, had_data):
+        """Tighten the interval on data, back off after active_window of silence."""
+        now = time.monotonic()
+        if had_data:
+            self._last_data = now
+            self.interval = self.min_interval
+        elif self._last_data is None or now - self._last_data > self.active_window:
+            self.interval = min(self.max_interval, self.interval * 2)
+
+    def wake(self):
+        self._wake.set()
+
+
+class InotifyWatcher(LogWatcher):
+    """
+    Linux inotify on the log folder.
+
+    Watches the folder rather than the file so a new CombatLog*.txt (the
+    game starts one per session) is reported as CREATED without rescanning.
+    Events for other files in the folder are ignored.
+    """
+
+    name = "inotify"
+
+    IN_MODIFY = 0x00000002
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_NONBLOCK = os.O_NONBLOCK if hasattr(os, "O_NONBLOCK") else 0
+    IN_CLOEXEC = 0o2000000
+
+    _EVENT = struct.Struct("iIII")      # wd, mask, cookie, name length
+
+    def __init__(self, folder):
+        super().__init__(folder)
+        libc = _load_libc()
+        if libc is None:
+            raise OSError("inotify is not available on this platform")
+        self._fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(_errno(), "inotify_init1 failed")
+        mask = self.IN_MODIFY | self.IN_CREATE | self.IN_MOVED_TO
+        if libc.inotify_add_watch(self._fd, os.fsencode(self.folder), mask) < 0:
+            err = _errno()
+            os.close(self._fd)
+            raise OSError(err, f"inotify_add_watch failed for {self.folder}")
+        self._wake_r, self._wake_w = os.pipe()
+
+    def wait(self, timeout) -> int:
+        """Block until a combat log changes, wake() is called, or timeout."""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return 0
+            try:
+                ready, _, _ = select.select([self._fd, self._wake_r], [], [], remaining)
+            except InterruptedError:
+                continue
+            if self._wake_r in ready:
+                os.read(self._wake_r, 512)
+                return 0
+            if not ready:
+                return 0
+            flags = self._drain()
+            if flags:
+                return flags
+
+    def _drain(self) -> int:
+        """Read all queued events and fold the combat log ones into result bits."""
+        flags = 0
+        while True:
+            try:
+                data = os.read(self._fd, 8192)
+            except BlockingIOError:
+                return flags
+            offset = 0
+            while offset + self._EVENT.size <= len(data):
+                _wd, mask, _cookie, length = self._EVENT.unpack_from(data, offset)
+                offset += self._EVENT.size
+                name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", "replace")
+                offset += length
+                if not is_combat_log(name):
+                    continue
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    flags |= CREATED | MODIFIED
+                elif mask & self.IN_MODIFY:
+                    flags |= MODIFIED
+
+    def wake(self):
+        try:
+            os.write(self._wake_w, b"x")
+        except OSError:
+            pass
+
+    def close(self):
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class WindowsWatcher(LogWatcher):
+    """
+    Windows folder change notifications (FindFirstChangeNotificationW).
+
+    Two notification handles on the log folder: file name changes (a new
+    CombatLog*.txt, reported as CREATED) and size/last-write changes
+    (MODIFIED). Notifications do not say which file changed, so other files
+    in the folder wake the monitor too; it then simply finds nothing to
+    read. NTFS can report the size of a file held open by the game only when
+    its cache is flushed, so wait() never blocks longer than max_interval
+    and reports MODIFIED when it times out, like a poll.
+    """
+
+    name = "windows"
+
+    FILE_NOTIFY_CHANGE_FILE_NAME = 0x001
+    FILE_NOTIFY_CHANGE_SIZE = 0x008
+    FILE_NOTIFY_CHANGE_LAST_WRITE = 0x010
+    WAIT_OBJECT_0 = 0
+    WAIT_TIMEOUT = 0x102
+
+    def __init__(self, folder, max_interval=0.1):
+        super().__init__(folder)
+        kernel32 = _load_kernel32()
+        if kernel32 is None:
+            raise OSError("folder change notifications are not available on this platform")
+        import ctypes
+        invalid = ctypes.c_void_p(-1).value       # INVALID_HANDLE_VALUE
+        self._k32 = kernel32
+        self.max_interval = max_interval
+        self._handles = []
+        try:
+            for mask in (self.FILE_NOTIFY_CHANGE_FILE_NAME,
+                         self.FILE_NOTIFY_CHANGE_SIZE | self.FILE_NOTIFY_CHANGE_LAST_WRITE):
+                handle = kernel32.FindFirstChangeNotificationW(self.folder, False, mask)
+                if handle is None or handle == invalid:
+                    raise OSError(_errno(), f"FindFirstChangeNotificationW failed for {self.folder}")
+                self._handles.append(handle)
+            self._wake_event = kernel32.CreateEventW(None, False, False, None)
+            if not self._wake_event:
+                raise OSError(_errno(), "CreateEventW failed")
+        except OSError:
+            self._close_notifications()
+            raise
+        self._wait_handles = (ctypes.c_void_p * 3)(*self._handles, self._wake_event)
+
+    def wait(self, timeout) -> int:
+        """Block until the folder changes, wake() is called, or min(timeout, max_interval)."""
+        ms = max(0, int(min(timeout, self.max_interval) * 1000))
+        result = self._k32.WaitForMultipleObjects(3, self._wait_handles, False, ms)
+        if result == self.WAIT_TIMEOUT:
+            return MODIFIED
+        index = result - self.WAIT_OBJECT_0
+        if index == 2:
+            return 0
+        if index not in (0, 1):
+            # WAIT_FAILED: behave like a poll rather than spin or kill the monitor
+            time.sleep(ms / 1000)
+            return MODIFIED
+        self._k32.FindNextChangeNotification(self._handles[index])
+        return CREATED | MODIFIED if index == 0 else MODIFIED
+
+    def wake(self):
+        self._k32.SetEvent(self._wake_event)
+
+    def close(self):
+        self._close_notifications()
+        if getattr(self, "_wake_event", None):
+            self._k32.CloseHandle(self._wake_event)
+            self._wake_event = None
+
+    def _close_notifications(self):
+        for handle in self._handles:
+            self._k32.FindCloseChangeNotification(handle)
+        self._handles = []
+
+
+_libc = None
+_kernel32 = None
+
+
+def _load_libc():
+    """Return libc with the inotify functions, or None where unavailable."""
+    global _libc
+    if not sys.platform.startswith("linux"):
+        return None
+    if _libc is None:
+        import ctypes
+        import ctypes.util
+        try:
+            lib = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        except OSError:
+            return None
+        if not (hasattr(lib, "inotify_init1") and hasattr(lib, "inotify_add_watch")):
+            return None
+        _libc = lib
+    return _libc
+
+
+def _load_kernel32():
+    """Return kernel32 with argument types set for the change notification API, or None."""
+    global _kernel32
+    if sys.platform != "win32":
+        return None
+    if _kernel32 is None:
+        import ctypes
+        from ctypes import wintypes
+        try:
+            k32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        except OSError:
+            return None
+        k32.FindFirstChangeNotificationW.restype = wintypes.HANDLE
+        k32.FindFirstChangeNotificationW.argtypes = [wintypes.LPCWSTR, wintypes.BOOL, wintypes.DWORD]
+        k32.FindNextChangeNotification.argtypes = [wintypes.HANDLE]
+        k32.FindCloseChangeNotification.argtypes = [wintypes.HANDLE]
+        k32.CreateEventW.restype = wintypes.HANDLE
+        k32.CreateEventW.argtypes = [ctypes.c_void_p, wintypes.BOOL, wintypes.BOOL, wintypes.LPCWSTR]
+        k32.SetEvent.argtypes = [wintypes.HANDLE]
+        k32.CloseHandle.argtypes = [wintypes.HANDLE]
+        k32.WaitForMultipleObjects.restype = wintypes.DWORD
+        k32.WaitForMultipleObjects.argtypes = [wintypes.DWORD, ctypes.c_void_p, wintypes.BOOL, wintypes.DWORD]
+        _kernel32 = k32
+    return _kernel32
+
+
+def _errno() -> int:
+    import ctypes
+    if sys.platform == "win32":
+        return ctypes.get_last_error()
+    return ctypes.get_errno()
+
+
+def create_watcher(folder, kind="auto") -> LogWatcher:
+    """
+    Build a watcher for folder.
+
+    Args:
+        folder: Folder containing the CombatLog*.txt files
+        kind: "auto" (inotify on Linux, change notifications on Windows,
+            else polling), "inotify", "windows" or "polling"; a callable is
+            called with folder instead
+
+    Returns:
+        LogWatcher
+
+    Raises:
+        OSError: If an explicitly requested native watcher is unavailable
+            ("auto" falls back to polling instead)
+    """
+    if callable(kind):
+        return kind(folder)
+    if kind not in WATCHER_KINDS:
+        raise ValueError(f"Unknown log watcher {kind!r} (expected one of {', '.join(WATCHER_KINDS)})")
+    native = {"inotify": (InotifyWatcher,), "windows": (WindowsWatcher,),
+              "auto": (InotifyWatcher, WindowsWatcher)}.get(kind, ())
+    for watcher_class in native:
+        try:
+            return watcher_class(folder)
+        except OSError:
+            if kind != "auto":
+                raise
+    return PollingWatcher(folder)
@@ -9,7 +9,8 @@ import tempfile
 from pathlib import Path
 from typing import Tuple
 
-from .build_utils import compile_as2, escape_as2_string, resolve_assets_path
+from .build_utils import build_stage, compile_as2, escape_as2_string, resolve_assets_path
+from .template_engine import load_template
 from .stopwatch_settings import validate_all_settings
 from .stopwatch_data import (
     StopwatchPresetSettings, StopwatchPreset, StopwatchPhase,
@@ -22,11 +23,9 @@ from .stopwatch_data import (
 # =============================================================================
 
 def _load_template(assets_path=None):
-    """Load KzStopwatch.as.template."""
+    """Load KzStopwatch.as.template (parsed once, cached until the file changes)."""
     base = resolve_assets_path(assets_path)
-    template_path = base / "flash_stopwatch" / "KzStopwatch.as.template"
-    with open(template_path, 'r', encoding='utf-8') as f:
-        return f.read()
+    return load_template(base / "flash_stopwatch" / "KzStopwatch.as.template")
 
 
 # =============================================================================
@@ -117,10 +116,7 @@ def generate_stopwatch_code(settings: dict, assets_path=None,
         "PRESETS_ARRAY": presets_str,
     }
 
-    for key, value in replacements.items():
-        template = template.replace(f"%%{key}%%", value)
-
-    return template
+    return template.render(replacements)
 
 
 # =============================================================================
@@ -162,30 +158,35 @@ def build_stopwatch(
     temp_dir = None
     try:
         # Step 1: Generate AS2 code
-        code = generate_stopwatch_code(
-            settings, str(flash_stopwatch_path.parent),
-            preset_settings=preset_settings)
+        with build_stage("generate"):
+            code = generate_stopwatch_code(
+                settings, str(flash_stopwatch_path.parent),
+                preset_settings=preset_settings)
 
         # Step 2: Write .as file to temp directory
-        temp_dir = tempfile.mkdtemp(prefix="flash_stopwatch_")
+        with build_stage("write_temp"):
+            temp_dir = tempfile.mkdtemp(prefix="flash_stopwatch_")
 
-        temp_as = Path(temp_dir) / "KzStopwatch.as"
-        with open(temp_as, 'w', encoding='utf-8') as f:
-            f.write(code)
+            temp_as = Path(temp_dir) / "KzStopwatch.as"
+            with open(temp_as, 'w', encoding='utf-8') as f:
+                f.write(code)
 
         # Step 3: Copy base.swf to temp, compile AS2 into it with -main
-        output_swf.parent.mkdir(parents=True, exist_ok=True)
-        temp_swf = Path(temp_dir) / "KzStopwatch_temp.swf"
-        shutil.copy2(base_swf, temp_swf)
-
-        ok, err = compile_as2(
-            compiler_path, [common_stubs], temp_swf.name,
-            temp_as.name, temp_dir)
+        with build_stage("copy_base"):
+            output_swf.parent.mkdir(parents=True, exist_ok=True)
+            temp_swf = Path(temp_dir) / "KzStopwatch_temp.swf"
+            shutil.copy2(base_swf, temp_swf)
+
+        with build_stage("compile"):
+            ok, err = compile_as2(
+                compiler_path, [common_stubs], temp_swf.name,
+                temp_as.name, temp_dir)
         if not ok:
             return False, f"MTASC compilation failed:\n{err}"
 
         # Step 4: Copy to final location
-        shutil.copy2(temp_swf, output_swf)
+        with build_stage("copy_output"):
+            shutil.copy2(temp_swf, output_swf)
 
         output_size = output_swf.stat().st_size
         return True, f"KzStopwatch.swf built successfully ({output_size:,} bytes)"
@@ -0,0 +1,414 @@
+"""
+KzBuilder — SWF Post-Processor
+Shrink a compiled SWF and report where its bytes go.
+
+Runs on every module output in staging after MTASC (see postprocess_job):
+
+- parses the header and the top-level tag stream (pure Python, no Flash
+  tooling)
+- drops tags the game client never reads: debugger switches, debug IDs,
+  product info and the XMP Metadata block Flash CS6 stamps into every
+  base.swf (FileAttributes' HasMetadata flag is cleared to match)
+- recompresses CWS bodies at zlib level 9 (memLevel 8 and 9), keeping
+  whichever stream (or the original, if no tag changed) is smallest
+- reports bytes per tag type and per DoInitAction, attributed to the AS2
+  class it defines via ExportAssets ("__Packages.KzGrids" -> KzGrids)
+
+Only FWS (uncompressed) and CWS (zlib) files are handled; ZWS (LZMA) and
+malformed files raise SwfFormatError and are left untouched.
+
+Command line (prints the size report; the file is only rewritten with
+--write):
+
+    python -m Modules.swf_postprocess Flash/DamageInfo.swf [--write]
+"""
+
+import argparse
+import logging
+import shutil
+import struct
+import sys
+import tempfile
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .build_utils import build_stage
+
+logger = logging.getLogger(__name__)
+
+# Tag codes (SWF file format specification, version 19)
+END = 0
+DO_ACTION = 12
+DEFINE_SPRITE = 39
+PRODUCT_INFO = 41
+EXPORT_ASSETS = 56
+ENABLE_DEBUGGER = 58
+DO_INIT_ACTION = 59
+DEBUG_ID = 63
+ENABLE_DEBUGGER2 = 64
+FILE_ATTRIBUTES = 69
+METADATA = 77
+
+TAG_NAMES = {
+    0: "End", 1: "ShowFrame", 2: "DefineShape", 4: "PlaceObject", 6: "DefineBits",
+    8: "JPEGTables", 9: "SetBackgroundColor", 10: "DefineFont", 11: "DefineText",
+    12: "DoAction", 13: "DefineFontInfo", 14: "DefineSound", 20: "DefineBitsLossless",
+    21: "DefineBitsJPEG2", 22: "DefineShape2", 24: "Protect", 26: "PlaceObject2",
+    28: "RemoveObject2", 32: "DefineShape3", 33: "DefineText2", 34: "DefineButton2",
+    35: "DefineBitsJPEG3", 36: "DefineBitsLossless2", 37: "DefineEditText",
+    39: "DefineSprite", 41: "ProductInfo", 43: "FrameLabel", 46: "DefineMorphShape",
+    48: "DefineFont2", 56: "ExportAssets", 57: "ImportAssets", 58: "EnableDebugger",
+    59: "DoInitAction", 62: "DefineFontInfo2", 63: "DebugID", 64: "EnableDebugger2",
+    65: "ScriptLimits", 66: "SetTabIndex", 69: "FileAttributes", 70: "PlaceObject3",
+    71: "ImportAssets2", 73: "DefineFontAlignZones", 74: "CSMTextSettings",
+    75: "DefineFont3", 77: "Metadata", 78: "DefineScalingGrid", 83: "DefineShape4",
+    84: "DefineMorphShape2", 86: "DefineSceneAndFrameLabelData", 88: "DefineFontName",
+}
+
+# Tags the AoC client never reads
+STRIP_TAGS = frozenset({PRODUCT_INFO, ENABLE_DEBUGGER, DEBUG_ID, ENABLE_DEBUGGER2, METADATA})
+
+# FileAttributes flag that must match the presence of a Metadata tag
+HAS_METADATA = 0x10
+
+EXPORT_PREFIX = "__Packages."
+
+# (memLevel, strategy) pairs tried at level 9; neither memLevel wins on
+# every file (castbars' fonts compress better at 8). Z_FILTERED and Z_RLE
+# lost on every bundled SWF by 1-20% and are not worth the extra passes.
+COMPRESS_CANDIDATES = (
+    (9, zlib.Z_DEFAULT_STRATEGY),
+    (8, zlib.Z_DEFAULT_STRATEGY),
+)
+
+
+class SwfFormatError(ValueError):
+    """The file is not a SWF this module can rewrite."""
+
+
+def tag_name(code: int) -> str:
+    return TAG_NAMES.get(code, f"Tag{code}")
+
+
+@dataclass
+class SwfFile:
+    """A parsed SWF: header fields and the raw top-level tags (header included)."""
+    signature: bytes                    # b"FWS" or b"CWS"
+    version: int
+    frame_header: bytes                 # frame RECT, frame rate, frame count
+    tags: List[Tuple[int, bytes]]       # (code, raw tag bytes)
+    compressed_size: int                # size of the file as read
+    trailing: int = 0                   # bytes after the SWF data (ignored)
+
+    def body(self) -> bytes:
+        return self.frame_header + b"".join(raw for _, raw in self.tags)
+
+    def file_length(self) -> int:
+        """Uncompressed file length as stored in the header."""
+        return 8 + len(self.frame_header) + sum(len(raw) for _, raw in self.tags)
+
+
+@dataclass
+class SwfReport:
+    """What post-processing found and changed."""
+    name: str
+    size_before: int = 0
+    size_after: int = 0
+    uncompressed: int = 0
+    tag_sizes: Dict[str, Tuple[int, int]] = field(default_factory=dict)    # name -> (count, bytes)
+    class_sizes: List[Tuple[str, int]] = field(default_factory=list)       # largest first
+    stripped: Dict[str, int] = field(default_factory=dict)                 # name -> bytes
+    written: bool = False
+
+    @property
+    def saved(self) -> int:
+        return self.size_before - self.size_after
+
+    def summary(self, top=3) -> str:
+        """One line for the build summary."""
+        parts = [f"SWF post-process: {self.size_before:,} -> {self.size_after:,} bytes"]
+        if self.stripped:
+            parts.append("stripped " + ", ".join(self.stripped))
+        if self.class_sizes:
+            parts.append("largest classes " + ", ".join(
+                f"{name} {size / 1024:.1f}KB" for name, size in self.class_sizes[:top]))
+        return "; ".join(parts)
+
+    def format(self) -> str:
+        """Full breakdown, one tag type or class per line (uncompressed bytes)."""
+        lines = [f"{self.name}: {self.size_before:,} -> {self.size_after:,} bytes "
+                 f"({self.uncompressed:,} uncompressed)"]
+        if self.stripped:
+            lines.append("  stripped: " + ", ".join(
+                f"{name} ({size:,} bytes)" for name, size in self.stripped.items()))
+        lines.append("  tags:")
+        for name, (count, size) in sorted(self.tag_sizes.items(), key=lambda kv: -kv[1][1]):
+            lines.append(f"    {name:<28} {count:>5}  {size:>10,}")
+        if self.class_sizes:
+            lines.append("  actions by class:")
+            for name, size in self.class_sizes:
+                lines.append(f"    {name:<40} {size:>10,}")
+        return "\n".join(lines)
+
+
+# =============================================================================
+# PARSING / WRITING
+# =============================================================================
+
+def parse_swf(data: bytes) -> SwfFile:
+    """
+    Parse a SWF's header and top-level tag stream.
+
+    Raises:
+        SwfFormatError: On an unsupported signature or a truncated tag stream
+    """
+    if len(data) < 8:
+        raise SwfFormatError("file too short for a SWF header")
+    signature, version, length = data[:3], data[3], struct.unpack_from("<I", data, 4)[0]
+    if signature == b"CWS":
+        inflater = zlib.decompressobj()
+        try:
+            body = inflater.decompress(data[8:], length - 8)
+        except zlib.error as e:
+            raise SwfFormatError(f"corrupt zlib body: {e}") from None
+        trailing = len(inflater.unused_data)
+    elif signature == b"FWS":
+        body = data[8:length]
+        trailing = max(0, len(data) - length)
+    elif signature == b"ZWS":
+        raise SwfFormatError("LZMA-compressed (ZWS) SWFs are not supported")
+    else:
+        raise SwfFormatError(f"not a SWF (signature {signature!r})")
+    if len(body) != length - 8:
+        raise SwfFormatError(f"header says {length:,} bytes, body has {len(body) + 8:,}")
+
+    # Frame RECT (5-bit field size, four signed fields) + rate + count
+    if not body:
+        raise SwfFormatError("missing frame header")
+    nbits = body[0] >> 3
+    pos = (5 + 4 * nbits + 7) // 8 + 4
+    frame_header = body[:pos]
+
+    tags = []
+    while pos < len(body):
+        start = pos
+        code, length, pos = _tag_header(body, pos)
+        end = pos + length
+        if end > len(body):
+            raise SwfFormatError(f"{tag_name(code)} at {start} runs past the end of the file")
+        tags.append((code, body[start:end]))
+        pos = end
+        if code == END:
+            break
+    return SwfFile(signature, version, frame_header, tags, len(data), trailing)
+
+
+def write_swf(swf: SwfFile, original: Optional[bytes] = None) -> bytes:
+    """
+    Serialize swf, recompressing CWS bodies at maximum effort.
+
+    Args:
+        swf: Parsed file (tags may have been removed)
+        original: The file's current bytes; its compressed stream is kept
+            if the body is unchanged and no candidate beats it
+    """
+    body = swf.body()
+    header = swf.signature + bytes([swf.version]) + struct.pack("<I", 8 + len(body))
+    if swf.signature != b"CWS":
+        return header + body
+    best = None
+    for mem_level, strategy in COMPRESS_CANDIDATES:
+        deflater = zlib.compressobj(9, zlib.DEFLATED, 15, mem_level, strategy)
+        stream = deflater.compress(body) + deflater.flush()
+        if best is None or len(stream) < len(best):
+            best = stream
+    if original is not None and original[:8] == header:
+        kept = original[8:len(original) - swf.trailing]
+        if len(kept) <= len(best):
+            best = kept
+    return header + best
+
+
+def _tag_header(body, pos):
+    """Return (code, length, offset of the tag data)."""
+    if pos + 2 > len(body):
+        raise SwfFormatError(f"truncated tag header at {pos}")
+    code_and_length = struct.unpack_from("<H", body, pos)[0]
+    code, length = code_and_length >> 6, code_and_length & 0x3F
+    pos += 2
+    if length == 0x3F:
+        if pos + 4 > len(body):
+            raise SwfFormatError(f"truncated long tag header at {pos - 2}")
+        length = struct.unpack_from("<I", body, pos)[0]
+        pos += 4
+    return code, length, pos
+
+
+def _tag_data(raw: bytes) -> bytes:
+    """A raw tag's payload (without its short or long header)."""
+    return raw[6:] if raw[0] & 0x3F == 0x3F else raw[2:]
+
+
+def _exports(tags) -> Dict[int, str]:
+    """Character id -> exported name, from every ExportAssets tag."""
+    names = {}
+    for code, raw in tags:
+        if code != EXPORT_ASSETS:
+            continue
+        data = _tag_data(raw)
+        count = struct.unpack_from("<H", data, 0)[0]
+        pos = 2
+        for _ in range(count):
+            char_id = struct.unpack_from("<H", data, pos)[0]
+            end = data.index(b"\0", pos + 2)
+            names[char_id] = data[pos + 2:end].decode("utf-8", "replace")
+            pos = end + 1
+    return names
+
+
+# =============================================================================
+# POST-PROCESSING
+# =============================================================================
+
+def analyze_swf(swf: SwfFile, name: str = "") -> SwfReport:
+    """Per-tag and per-class size breakdown (uncompressed bytes, tag headers included)."""
+    report = SwfReport(name=name, size_before=swf.compressed_size,
+                       size_after=swf.compressed_size, uncompressed=swf.file_length())
+    exports = _exports(swf.tags)
+    classes = {}
+    frame = 1
+    for code, raw in swf.tags:
+        tname = tag_name(code)
+        count, size = report.tag_sizes.get(tname, (0, 0))
+        report.tag_sizes[tname] = (count + 1, size + len(raw))
+        if code == DO_INIT_ACTION:
+            sprite = struct.unpack_from("<H", _tag_data(raw), 0)[0]
+            cls = exports.get(sprite, f"sprite {sprite}")
+            if cls.startswith(EXPORT_PREFIX):
+                cls = cls[len(EXPORT_PREFIX):]
+            classes[cls] = classes.get(cls, 0) + len(raw)
+        elif code == DO_ACTION:
+            key = f"<frame {frame} actions>"
+            classes[key] = classes.get(key, 0) + len(raw)
+        elif code == 1:     # ShowFrame
+            frame += 1
+    report.class_sizes = sorted(classes.items(), key=lambda kv: -kv[1])
+    return report
+
+
+def strip_tags(swf: SwfFile, codes=STRIP_TAGS) -> Dict[str, int]:
+    """Remove tags with the given codes. Returns {tag name: bytes removed}."""
+    stripped = {}
+    kept = []
+    for code, raw in swf.tags:
+        if code in codes:
+            name = tag_name(code)
+            stripped[name] = stripped.get(name, 0) + len(raw)
+        else:
+            kept.append((code, raw))
+    if METADATA in codes and "Metadata" in stripped:
+        kept = [(code, _clear_metadata_flag(raw) if code == FILE_ATTRIBUTES else raw)
+                for code, raw in kept]
+    swf.tags = kept
+    return stripped
+
+
+def _clear_metadata_flag(raw: bytes) -> bytes:
+    header = len(raw) - len(_tag_data(raw))
+    if len(raw) <= header:
+        return raw
+    return raw[:header] + bytes([raw[header] & ~HAS_METADATA & 0xFF]) + raw[header + 1:]
+
+
+def postprocess_swf(path, strip=STRIP_TAGS, recompress=True) -> SwfReport:
+    """
+    Strip unneeded tags from the SWF at path and recompress it in place.
+
+    The file is only rewritten when the result is smaller.
+
+    Args:
+        path: SWF to process
+        strip: Tag codes to remove (empty = keep every tag)
+        recompress: Recompress CWS bodies (False keeps the original stream
+            when no tag is removed)
+
+    Returns:
+        SwfReport (sizes, stripped tags, per-tag/per-class breakdown)
+
+    Raises:
+        SwfFormatError: If the file cannot be parsed
+        OSError: If the file cannot be read or written
+    """
+    path = Path(path)
+    data = path.read_bytes()
+    swf = parse_swf(data)
+    stripped = strip_tags(swf, strip) if strip else {}
+    report = analyze_swf(swf, path.name)
+    report.size_before = len(data)
+    report.stripped = stripped
+    if not stripped and not recompress:
+        return report
+    out = write_swf(swf, original=None if stripped else data)
+    if len(out) < len(data):
+        path.write_bytes(out)
+        report.size_after = len(out)
+        report.written = True
+    else:
+        report.stripped = {}
+    return report
+
+
+def postprocess_job(job, output_dir):
+    """
+    Wrap a build job so every SWF it leaves in output_dir is post-processed.
+
+    The job's (success, message) is returned with one summary line per SWF
+    appended. Post-processing problems are logged and reported but never
+    fail a build: the MTASC output is kept as is.
+    """
+    def run():
+        ok, message = job()
+        if not ok:
+            return ok, message
+        notes = []
+        with build_stage("postprocess"):
+            for swf_path in sorted(Path(output_dir).glob("*.swf")):
+                try:
+                    notes.append(postprocess_swf(swf_path).summary())
+                except (SwfFormatError, OSError) as e:
+                    logger.warning("SWF post-processing skipped for %s: %s", swf_path.name, e)
+                    notes.append(f"SWF post-process skipped: {e}")
+        return ok, "\n".join([message] + notes)
+    return run
+
+
+def main(argv=None):
+    """Print the size report of one or more SWFs (and optionally post-process them)."""
+    parser = argparse.ArgumentParser(prog="python -m Modules.swf_postprocess",
+                                     description="SWF size report by tag type and AS2 class")
+    parser.add_argument("swf", nargs="+", help="SWF file(s) to report on")
+    parser.add_argument("--write", action="store_true",
+                        help="strip and recompress the files in place (default: report only)")
+    args = parser.parse_args(argv)
+    status = 0
+    for path in args.swf:
+        try:
+            if args.write:
+                report = postprocess_swf(path)
+            else:
+                with tempfile.TemporaryDirectory(prefix="kzswf_") as work:
+                    copy = Path(work) / Path(path).name
+                    shutil.copyfile(path, copy)
+                    report = postprocess_swf(copy)
+        except (SwfFormatError, OSError) as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            status = 1
+            continue
+        print(report.format())
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
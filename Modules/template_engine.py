@@ -0,0 +1,220 @@
+"""
+KzBuilder — AS2 Template Engine
+Compiled %%KEY%% templates for the AS2 generators.
+
+A template file is parsed once into a list of segments (literal text,
+value slots and conditional blocks) and cached per path on (mtime, size),
+so a build neither re-reads the file nor scans it once per placeholder:
+render() walks the segments and joins the output in one go.
+
+Syntax:
+
+    %%KEY%%                 value of KEY (str() of whatever is passed)
+    %%IF KEY%% ... %%ENDIF%%
+    %%IF !KEY%% ... %%ELSE%% ... %%ENDIF%%
+                            block kept only when KEY is truthy (or falsy
+                            with !); blocks nest. Use it to compile out code
+                            for features a build does not use.
+
+A control tag (IF/ELSE/ENDIF) alone on its line takes the whole line with
+it, so blocks can be written one tag per line without leaving blank lines
+in the output.
+
+Keys are identifiers ([A-Za-z_][A-Za-z0-9_]*). A key the template uses but
+the caller did not pass is an error (a typo'd placeholder no longer ends up
+verbatim in the generated AS2); keys passed but never used are logged.
+"""
+
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# %%KEY%%, %%IF KEY%%, %%IF !KEY%%, %%ELSE%%, %%ENDIF%%
+_TAG_RE = re.compile(r"%%(?:(IF) +(!?)([A-Za-z_]\w*)|(ELSE|ENDIF)|([A-Za-z_]\w*))%%")
+
+# Parsed template cache: {resolved path: ((mtime_ns, size), Template)}
+_template_cache = {}
+_template_lock = threading.Lock()
+
+
+class TemplateError(ValueError):
+    """Malformed template, or keys missing from a render."""
+
+
+@dataclass(frozen=True)
+class Slot:
+    """A %%KEY%% placeholder."""
+    key: str
+
+
+@dataclass(frozen=True)
+class Block:
+    """A %%IF KEY%% block: body when the condition holds, otherwise orelse."""
+    key: str
+    negate: bool
+    body: Tuple["Segment", ...]
+    orelse: Tuple["Segment", ...] = ()
+
+
+Segment = Union[str, Slot, Block]
+
+
+class Template:
+    """
+    A parsed template.
+
+    Usage:
+        template = load_template(assets / "castbars" / "KzCastbars.as.template")
+        code = template.render({"PLAYER_X": 100, ...})
+    """
+
+    def __init__(self, source: str, name: str = "<template>"):
+        """
+        Parse a template.
+
+        Args:
+            source: Template text
+            name: Shown in error messages (usually the file name)
+
+        Raises:
+            TemplateError: On unbalanced IF/ELSE/ENDIF tags
+        """
+        self.name = name
+        self.segments = _parse(source, name)
+        self.keys: FrozenSet[str] = frozenset(_keys(self.segments))
+
+    def check(self, values) -> Tuple[List[str], List[str]]:
+        """
+        Compare the keys passed with the keys the template uses.
+
+        Returns:
+            (missing, unused) sorted key lists
+        """
+        return sorted(self.keys.difference(values)), sorted(set(values).difference(self.keys))
+
+    def render(self, values: Dict[str, object]) -> str:
+        """
+        Fill the template.
+
+        Args:
+            values: {KEY: value}; slot values are str()'d, IF conditions use
+                the value's truthiness (pass bools, not "true"/"false")
+
+        Raises:
+            TemplateError: If the template uses a key that is not in values
+        """
+        missing, unused = self.check(values)
+        if missing:
+            raise TemplateError(f"{self.name}: no value for {', '.join(missing)}")
+        if unused:
+            logger.warning("%s: unused template values %s", self.name, ", ".join(unused))
+        out = []
+        _emit(self.segments, values, out)
+        return "".join(out)
+
+
+def load_template(path) -> Template:
+    """
+    Return the parsed template at path, re-parsing only when the file changed.
+
+    Raises:
+        OSError: If the file cannot be read
+        TemplateError: If the template is malformed
+    """
+    path = Path(path).resolve()
+    st = path.stat()
+    sig = (st.st_mtime_ns, st.st_size)
+    with _template_lock:
+        cached = _template_cache.get(path)
+    if cached and cached[0] == sig:
+        return cached[1]
+    with open(path, 'r', encoding='utf-8') as f:
+        template = Template(f.read(), path.name)
+    with _template_lock:
+        _template_cache[path] = (sig, template)
+    return template
+
+
+def render_template(path, values: Dict[str, object]) -> str:
+    """Load (cached) and render the template at path."""
+    return load_template(path).render(values)
+
+
+def _parse(source: str, name: str) -> Tuple[Segment, ...]:
+    """Split source into literal/slot/block segments."""
+    # Stack of open blocks: (key, negate, body, orelse or None, line)
+    root: List[Segment] = []
+    stack = []
+    current = root
+    pos = 0
+    for m in _TAG_RE.finditer(source):
+        if_tag, negate, if_key, control, key = m.groups()
+        start, end = m.start(), m.end()
+        if not key:
+            start, end = _standalone(source, start, end, pos)
+        if start > pos:
+            current.append(source[pos:start])
+        pos = end
+        if key:
+            current.append(Slot(key))
+        elif if_tag:
+            frame = [if_key, bool(negate), [], None, _line(source, m.start())]
+            stack.append((frame, current))
+            current = frame[2]
+        elif not stack:
+            raise TemplateError(f"{name}:{_line(source, m.start())}: %%{control}%% without %%IF%%")
+        elif control == "ELSE":
+            frame = stack[-1][0]
+            if frame[3] is not None:
+                raise TemplateError(f"{name}:{_line(source, m.start())}: second %%ELSE%%")
+            frame[3] = current = []
+        else:
+            frame, current = stack.pop()
+            current.append(Block(frame[0], frame[1], tuple(frame[2]), tuple(frame[3] or ())))
+    if stack:
+        frame = stack[-1][0]
+        raise TemplateError(f"{name}:{frame[4]}: %%IF {frame[0]}%% is never closed")
+    if pos < len(source):
+        current.append(source[pos:])
+    return tuple(root)
+
+
+def _standalone(source, start, end, floor):
+    """Widen a control tag's span to its whole line if nothing else is on it."""
+    line_start = source.rfind("\n", 0, start) + 1
+    line_end = source.find("\n", end)
+    line_end = len(source) if line_end < 0 else line_end + 1
+    if line_start >= floor and not source[line_start:start].strip() and not source[end:line_end].strip():
+        return line_start, line_end
+    return start, end
+
+
+def _keys(segments):
+    for seg in segments:
+        if isinstance(seg, Slot):
+            yield seg.key
+        elif isinstance(seg, Block):
+            yield seg.key
+            yield from _keys(seg.body)
+            yield from _keys(seg.orelse)
+
+
+def _emit(segments, values, out):
+    """Append the rendered segments to out."""
+    for seg in segments:
+        if seg.__class__ is str:
+            out.append(seg)
+        elif seg.__class__ is Slot:
+            out.append(str(values[seg.key]))
+        else:
+            keep = bool(values[seg.key]) != seg.negate
+            _emit(seg.body if keep else seg.orelse, values, out)
+
+
+def _line(source, offset):
+    return source.count("\n", 0, offset) + 1
@@ -15,6 +15,55 @@ except ImportError:
     HAS_WIN32 = False
 
 
+class WidgetRenderer:
+    """
+    Change-only widget updates.
+
+    Remembers the options last applied to each widget and only calls
+    .config() with the ones that differ, so a 50ms loop repeating the same
+    display costs no Tcl round trips (and no re-layout). Any object with a
+    config(**options) method works.
+
+    Counters (per widget update): applied = a config() call was made,
+    suppressed = nothing had changed.
+    """
+
+    def __init__(self):
+        self._state = {}
+        self.applied = 0
+        self.suppressed = 0
+
+    def render(self, widget, **options):
+        """Apply the options that changed since the last render of widget."""
+        last = self._state.get(widget)
+        if last is None:
+            changed = options
+            self._state[widget] = dict(options)
+        else:
+            changed = {k: v for k, v in options.items() if last.get(k) != v}
+            last.update(changed)
+        if changed:
+            widget.config(**changed)
+            self.applied += 1
+        else:
+            self.suppressed += 1
+
+    def forget(self, widget=None):
+        """Drop cached state (for widget, or all) so the next render applies everything."""
+        if widget is None:
+            self._state.clear()
+        else:
+            self._state.pop(widget, None)
+
+    def stats(self):
+        """Return {'applied', 'suppressed'} counts."""
+        return {'applied': self.applied, 'suppressed': self.suppressed}
+
+    def reset_stats(self):
+        self.applied = 0
+        self.suppressed = 0
+
+
 class TimerOverlay:
     """
     Transparent overlay window for displaying Ethram-Fal timer phases.
@@ -34,6 +83,9 @@ class TimerOverlay:
     BG_INNER = '#1a1a1a'
     BG_BORDER = '#333333'
 
+    # Labels written by update_display()
+    DISPLAY_LABELS = 7
+
     def __init__(self, root, settings, on_settings_changed=None):
         """
         Initialize the overlay window.
@@ -66,6 +118,10 @@ class TimerOverlay:
         # Track widgets that need background updates
         self._bg_widgets = []
 
+        # Change-only rendering of the display labels
+        self._renderer = WidgetRenderer()
+        self._last_display = None
+
         # Position window
         x = settings.get('x', 0)
         y = settings.get('y', 50)
@@ -270,6 +326,9 @@ class TimerOverlay:
         """
         Update all display elements.
 
+        Only labels whose text or color changed are reconfigured; a push
+        identical to the previous one returns without touching Tk.
+
         Args:
             row1_msg: Text for row 1 (e.g., "Seed: ")
             row1_player: Player name for row 1
@@ -281,18 +340,37 @@ class TimerOverlay:
             row2_color: Color for row 2 text
             cycle_timer: Overall cycle timer (e.g., "25s")
         """
-        self.row1_text.config(text=row1_msg, fg=row1_color)
-        self.row1_player.config(text=row1_player)
-        self.row1_timer.config(text=row1_timer, fg=row1_color)
+        display = (row1_msg, row1_player, row1_timer, row1_color,
+                   row2_msg, row2_player, row2_timer, row2_color, cycle_timer)
+        render = self._renderer
+        if display == self._last_display:
+            render.suppressed += self.DISPLAY_LABELS
+            return
+        self._last_display = display
 
-        self.row2_text.config(text=row2_msg, fg=row2_color)
-        self.row2_player.config(text=row2_player)
-        self.row2_timer.config(text=row2_timer, fg=row2_color)
+        render.render(self.row1_text, text=row1_msg, fg=row1_color)
+        render.render(self.row1_player, text=row1_player)
+        render.render(self.row1_timer, text=row1_timer, fg=row1_color)
 
-        self.timer_label.config(
-            text=cycle_timer if cycle_timer else "",
-            fg='#888888'
-        )
+        render.render(self.row2_text, text=row2_msg, fg=row2_color)
+        render.render(self.row2_player, text=row2_player)
+        render.render(self.row2_timer, text=row2_timer, fg=row2_color)
+
+        render.render(self.timer_label, text=cycle_timer if cycle_timer else "", fg='#888888')
+
+    def render_stats(self):
+        """
+        Label update counters since creation (or reset_render_stats()).
+
+        Returns:
+            dict: {'applied': config() calls made,
+                   'suppressed': label updates skipped as unchanged}
+        """
+        return self._renderer.stats()
+
+    def reset_render_stats(self):
+        """Zero the render_stats() counters."""
+        self._renderer.reset_stats()
 
     def toggle_lock(self):
         """Toggle lock state (drag/click-through)."""
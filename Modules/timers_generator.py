@@ -10,7 +10,8 @@ import tempfile
 from pathlib import Path
 from typing import Tuple
 
-from .build_utils import compile_as2, escape_as2_string, resolve_assets_path
+from .build_utils import build_stage, compile_as2, escape_as2_string, resolve_assets_path
+from .template_engine import load_template
 from .timers_data import (
     CooldownSettings, CooldownTimer, CooldownPreset,
     TriggerType, MAX_TIMERS_PER_PRESET,
@@ -23,19 +24,15 @@ from .timers_data import (
 # =============================================================================
 
 def _load_timer_template(assets_path=None):
-    """Load KzTimers.as.template."""
+    """Load KzTimers.as.template (parsed once, cached until the file changes)."""
     base = resolve_assets_path(assets_path)
-    template_path = base / "flash_timer" / "KzTimers.as.template"
-    with open(template_path, 'r', encoding='utf-8') as f:
-        return f.read()
+    return load_template(base / "flash_timer" / "KzTimers.as.template")
 
 
 def _load_engine_template(assets_path=None):
-    """Load TimerManager.as.template."""
+    """Load TimerManager.as.template (parsed once, cached until the file changes)."""
     base = resolve_assets_path(assets_path)
-    template_path = base / "flash_timer" / "TimerManager.as.template"
-    with open(template_path, 'r', encoding='utf-8') as f:
-        return f.read()
+    return load_template(base / "flash_timer" / "TimerManager.as.template")
 
 
 # =============================================================================
@@ -77,6 +74,33 @@ def _generate_preset_literal(preset: CooldownPreset) -> str:
     return f'{{label:"{label}", timerIds:[{ids_arr}]}}'
 
 
+# =============================================================================
+# CODE GENERATION — FEATURES
+# =============================================================================
+
+def _trigger_features(settings: CooldownSettings) -> dict:
+    """
+    Which trigger kinds the timers use, per source.
+
+    Checks ALL timers (not just enabled) — presets can enable any timer at
+    runtime. Handlers and signal connections for kinds no timer uses are
+    left out of the generated code.
+
+    Returns:
+        {PLAYER_BUFFS, PLAYER_CASTS, TARGET_BUFFS, TARGET_CASTS, BUFFS, CASTS: bool}
+    """
+    features = dict.fromkeys(("PLAYER_BUFFS", "PLAYER_CASTS", "TARGET_BUFFS", "TARGET_CASTS"), False)
+    for timer in settings.timers:
+        side = "PLAYER" if timer.trigger_source == "player" else "TARGET"
+        if timer.trigger_type in (TriggerType.BUFF_ADD.value, TriggerType.BUFF_REMOVE.value):
+            features[f"{side}_BUFFS"] = True
+        elif timer.trigger_type == TriggerType.CAST_SUCCESS.value:
+            features[f"{side}_CASTS"] = True
+    features["BUFFS"] = features["PLAYER_BUFFS"] or features["TARGET_BUFFS"]
+    features["CASTS"] = features["PLAYER_CASTS"] or features["TARGET_CASTS"]
+    return features
+
+
 # =============================================================================
 # CODE GENERATION — MAIN
 # =============================================================================
@@ -117,20 +141,9 @@ def generate_flash_timer_code(
     presets_str = ", ".join(presets_arr) if presets_arr else ""
 
     # Determine which game signals are needed
-    # Check ALL timers (not just enabled) — presets can enable any timer at runtime
-    needs_player = False
-    needs_target = False
-
-    for timer in settings.timers:
-        src = timer.trigger_source
-        trigger_type = timer.trigger_type
-
-        if trigger_type in (TriggerType.BUFF_ADD.value, TriggerType.BUFF_REMOVE.value,
-                            TriggerType.CAST_SUCCESS.value):
-            if src == "player":
-                needs_player = True
-            else:
-                needs_target = True
+    features = _trigger_features(settings)
+    needs_player = features["PLAYER_BUFFS"] or features["PLAYER_CASTS"]
+    needs_target = features["TARGET_BUFFS"] or features["TARGET_CASTS"]
 
     # Panel dimensions
     panel_width = 240
@@ -144,9 +157,10 @@ def generate_flash_timer_code(
         "COLOR_TEXT": appearance["colors"]["text"],
         "MAX_ACTIVE": str(MAX_TIMERS_PER_PRESET),
         "SHOW_DECIMALS": "true" if appearance.get("show_decimals", True) else "false",
+        "BUFFS": features["BUFFS"],
+        "CASTS": features["CASTS"],
     }
-    for key, value in engine_replacements.items():
-        engine_template = engine_template.replace(f"%%{key}%%", str(value))
+    engine_code = engine_template.render(engine_replacements)
 
     # --- Fill timer template ---
     timer_template = _load_timer_template(assets_path)
@@ -179,11 +193,15 @@ def generate_flash_timer_code(
         "COLOR_BUTTON_ACTIVE": appearance["button_colors"]["active_text"],
         "COLOR_BUTTON_INACTIVE": appearance["button_colors"].get("inactive", "CCCCCC"),
         "MAX_BARS": str(MAX_TIMERS_PER_PRESET),
+        # Compiled-out handlers (see _trigger_features)
+        "PLAYER_BUFFS": features["PLAYER_BUFFS"],
+        "PLAYER_CASTS": features["PLAYER_CASTS"],
+        "TARGET_BUFFS": features["TARGET_BUFFS"],
+        "TARGET_CASTS": features["TARGET_CASTS"],
     }
-    for key, value in timer_replacements.items():
-        timer_template = timer_template.replace(f"%%{key}%%", str(value))
+    timer_code = timer_template.render(timer_replacements)
 
-    return timer_template, engine_template
+    return timer_code, engine_code
 
 
 # =============================================================================
@@ -230,34 +248,39 @@ def build_flash_timer(
     temp_dir = None
     try:
         # Step 1: Generate AS2 code (two files)
-        timer_code, engine_code = generate_flash_timer_code(
-            settings, appearance=appearance, assets_path=str(flash_timer_path.parent))
+        with build_stage("generate"):
+            timer_code, engine_code = generate_flash_timer_code(
+                settings, appearance=appearance, assets_path=str(flash_timer_path.parent))
 
         # Step 2: Write both .as files to temp directory
-        temp_dir = tempfile.mkdtemp(prefix="flash_timer_")
+        with build_stage("write_temp"):
+            temp_dir = tempfile.mkdtemp(prefix="flash_timer_")
 
-        temp_timer_as = Path(temp_dir) / "KzTimers.as"
-        with open(temp_timer_as, 'w', encoding='utf-8') as f:
-            f.write(timer_code)
+            temp_timer_as = Path(temp_dir) / "KzTimers.as"
+            with open(temp_timer_as, 'w', encoding='utf-8') as f:
+                f.write(timer_code)
 
-        temp_engine_as = Path(temp_dir) / "TimerManager.as"
-        with open(temp_engine_as, 'w', encoding='utf-8') as f:
-            f.write(engine_code)
+            temp_engine_as = Path(temp_dir) / "TimerManager.as"
+            with open(temp_engine_as, 'w', encoding='utf-8') as f:
+                f.write(engine_code)
 
         # Step 3: Copy base.swf to temp location
-        output_swf.parent.mkdir(parents=True, exist_ok=True)
-        temp_swf = Path(temp_dir) / "KzTimers_temp.swf"
-        shutil.copy2(base_swf, temp_swf)
+        with build_stage("copy_base"):
+            output_swf.parent.mkdir(parents=True, exist_ok=True)
+            temp_swf = Path(temp_dir) / "KzTimers_temp.swf"
+            shutil.copy2(base_swf, temp_swf)
 
         # Step 4: Compile both AS2 files into one SWF
-        ok, err = compile_as2(
-            compiler_path, [common_stubs], temp_swf.name,
-            [temp_timer_as.name, temp_engine_as.name], temp_dir)
+        with build_stage("compile"):
+            ok, err = compile_as2(
+                compiler_path, [common_stubs], temp_swf.name,
+                [temp_timer_as.name, temp_engine_as.name], temp_dir)
         if not ok:
             return False, f"MTASC compilation failed:\n{err}"
 
         # Step 5: Move to final location
-        shutil.copy2(temp_swf, output_swf)
+        with build_stage("copy_output"):
+            shutil.copy2(temp_swf, output_swf)
 
         output_size = output_swf.stat().st_size
         return True, f"KzTimers.swf built successfully ({output_size:,} bytes)"
@@ -0,0 +1,192 @@
+"""
+KzBuilder — Live Tracker Scheduler
+Deadline-scheduled overlay refresh for the Live Tracker.
+
+Instead of polling BossTimer every 50ms, the loop asks the timer when its
+display can next change (BossTimer.next_update_in) and sleeps exactly
+until then:
+
+- running cycle: the next whole second of elapsed time (phase boundaries
+  and the cycle counter all change on whole seconds)
+- waiting / interrupted: never, until a trigger arrives
+
+Threading: CombatLogMonitor's daemon thread only builds TimerEvents and
+post()s them into a thread-safe queue. The first post after a refresh
+wakes the Tk thread with a virtual event (event_generate is marshalled to
+the Tk thread by tkinter); the Tk thread then drains the queue in one
+batch, applies every event to BossTimer and pushes the display once. So
+BossTimer state and the overlay are only ever touched on the Tk thread.
+IDLE_WAKE bounds the sleep in case a wake is lost (Tk not yet in its main
+loop).
+
+Latency from a line being read to its display push is measured per event
+(stats()).
+"""
+
+import logging
+import math
+import queue
+import tkinter as tk
+
+logger = logging.getLogger(__name__)
+
+
+class TrackerScheduler:
+    """
+    Apply queued TimerEvents and run BossTimer.update_display() on deadlines,
+    all on the Tk thread.
+
+    Usage:
+        scheduler = TrackerScheduler(tab, boss_timer)
+        monitor = CombatLogMonitor(boss_timer, event_sink=scheduler.post)
+        scheduler.start()
+        # ...later...
+        scheduler.stop()
+    """
+
+    WAKE_EVENT = "<<KzTrackerWake>>"
+
+    # Sleep while nothing is scheduled (waiting/interrupted), in seconds
+    IDLE_WAKE = 1.0
+
+    def __init__(self, widget, boss_timer):
+        """
+        Initialize the scheduler.
+
+        Args:
+            widget: Tk widget that owns the after() timer and receives wake events
+            boss_timer: BossTimer to drive (its clock is used for deadlines
+                and latency)
+        """
+        self.widget = widget
+        self.boss_timer = boss_timer
+        self.clock = boss_timer.clock
+        self.queue = queue.SimpleQueue()
+        self.running = False
+        self.deadline = None            # clock time of the next scheduled refresh
+        self._after_id = None
+        self._wake_requested = False
+        self.reset_stats()
+        widget.bind(self.WAKE_EVENT, self._on_wake, add='+')
+
+    def start(self):
+        """
+        Start refreshing (refreshes immediately, also when already running).
+
+        Events left over from before the last stop() are stale and dropped.
+        """
+        if not self.running:
+            self._drain()
+            self.running = True
+        self._refresh()
+
+    def stop(self):
+        """Stop refreshing and cancel the pending timer."""
+        self.running = False
+        self._cancel()
+        self.deadline = None
+
+    def post(self, event):
+        """Queue a TimerEvent and wake the Tk thread. Safe to call from any thread."""
+        self.queue.put(event)
+        if self._wake_requested or not self.running:
+            return
+        self._wake_requested = True
+        try:
+            self.widget.event_generate(self.WAKE_EVENT, when='tail')
+        except (RuntimeError, tk.TclError) as e:
+            # Tk not in its main loop (startup/shutdown): IDLE_WAKE catches up
+            self._wake_requested = False
+            logger.debug("Tracker wake failed: %s", e)
+
+    def wake(self):
+        """Refresh now (Tk thread only), e.g. after driving the timer directly."""
+        if self.running:
+            self._refresh()
+
+    def _on_wake(self, _event=None):
+        self._wake_requested = False
+        if self.running:
+            self.wakes += 1
+            self._refresh()
+
+    def _drain(self):
+        """Take every queued event (one batch)."""
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _refresh(self):
+        """Apply queued events, update the display and schedule the next deadline."""
+        self._cancel()
+        batch = self._drain()
+        try:
+            for event in batch:
+                self.boss_timer.apply_event(event)
+            self.boss_timer.update_display()
+        except Exception as e:
+            logger.error("Timer loop error: %s", e)
+        self.refreshes += 1
+        if batch:
+            self._record_latency(batch)
+        if self.running:
+            self._schedule()
+
+    def _record_latency(self, batch):
+        now = self.clock.now()
+        self.batches += 1
+        self.events += len(batch)
+        for event in batch:
+            latency = max(0.0, now - event.read_at)
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+        self.latency_last = max(0.0, now - batch[-1].read_at)
+
+    def _schedule(self):
+        delay = self.boss_timer.next_update_in()
+        if delay is None:
+            delay = self.IDLE_WAKE
+        self.deadline = self.clock.now() + delay
+        # Round up: firing a millisecond early would find the old second
+        delay_ms = max(1, math.ceil(delay * 1000))
+        self._after_id = self.widget.after(delay_ms, self._refresh)
+
+    def _cancel(self):
+        if self._after_id is not None:
+            try:
+                self.widget.after_cancel(self._after_id)
+            except tk.TclError:
+                pass
+            self._after_id = None
+
+    def reset_stats(self):
+        """Zero the counters reported by stats()."""
+        self.refreshes = 0
+        self.wakes = 0
+        self.batches = 0
+        self.events = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.latency_last = 0.0
+
+    def stats(self):
+        """
+        Loop counters.
+
+        Returns:
+            dict: refreshes, wakes, batches, events, pending (queued now), and
+                line-read-to-display latency in ms (latency_last/mean/max_ms)
+        """
+        return {
+            'refreshes': self.refreshes,
+            'wakes': self.wakes,
+            'batches': self.batches,
+            'events': self.events,
+            'pending': self.queue.qsize(),
+            'latency_last_ms': self.latency_last * 1000,
+            'latency_mean_ms': self.latency_total / self.events * 1000 if self.events else 0.0,
+            'latency_max_ms': self.latency_max * 1000,
+        }
@@ -0,0 +1,11 @@
+"""
+KzBuilder — Version
+Single source of the application version.
+
+Imported by kzbuilder.py (window title, profiles, generated code headers,
+build fingerprints), build.py (release bundle) and the benchmarks, so a
+release only changes it here. Kept free of imports so none of those pull
+in Tk.
+"""
+
+APP_VERSION = "3.3.7"
@@ -93,7 +93,7 @@ class KzGridsSlot {
         newSlot._y = oldY;
 
         if (cfg.showTimers) createTimerTF(newSlot, fs, cfg.timerYOffset);
-        createStackTF(newSlot);
+        if (cfg.stacks) createStackTF(newSlot);
 
         newSlot._idx = idx;
         newSlot._sz = sz;
@@ -0,0 +1,529 @@
+"""
+Kaz Flash Modz Build Benchmarks
+Times the code generators, buff database search, the Build All pipeline
+and Live Tracker log replay on synthetic profiles and combat logs.
+
+Runs headless on any OS: MTASC is replaced by the in-process StubBackend,
+so "compile" measures the pipeline overhead around the compiler, not
+MTASC itself. The build cache is disabled.
+
+Usage:
+    python benchmarks/bench_build.py                  # full matrix, table to stdout
+    python benchmarks/bench_build.py --quick          # small matrix (CI smoke run)
+    python benchmarks/bench_build.py --json out.json  # also write machine-readable results
+    python benchmarks/bench_build.py --replay CombatLog-x.txt   # replay a real log, print phases
+"""
+
+import argparse
+import json
+import logging
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from Modules.buff_database import BuffDatabase  # noqa: E402
+from Modules.build_scheduler import BuildScheduler  # noqa: E402
+from Modules.build_utils import record_build_stages, set_build_cache, set_compiler_backend  # noqa: E402
+from Modules.compiler_backend import StubBackend  # noqa: E402
+from Modules.grids_generator import CodeGenerator, build_grids, MAX_TOTAL_SLOTS  # noqa: E402
+from Modules.castbar_generator import generate_castbar_code, build_castbars  # noqa: E402
+from Modules.castbar_settings import get_default_settings as castbar_defaults  # noqa: E402
+from Modules.timers_generator import generate_flash_timer_code, build_flash_timer  # noqa: E402
+from Modules.timers_data import (  # noqa: E402
+    CooldownSettings, CooldownTimer, CooldownPreset, MAX_PRESETS, MAX_TIMERS_PER_PRESET,
+)
+from Modules.stopwatch_generator import generate_stopwatch_code, build_stopwatch  # noqa: E402
+from Modules.stopwatch_settings import get_default_settings as stopwatch_defaults  # noqa: E402
+from Modules.stopwatch_data import (  # noqa: E402
+    StopwatchPresetSettings, StopwatchPreset, StopwatchPhase, MAX_PHASES_PER_PRESET,
+)
+from Modules.damageinfo_generator import DamageInfoGenerator, build_damageinfo, prepare_overlay  # noqa: E402
+from Modules.damageinfo_settings import get_default_global_settings  # noqa: E402
+from Modules.log_replay import LogReplay  # noqa: E402
+from Modules.log_index import CombatLogIndex  # noqa: E402
+from Modules.swf_postprocess import postprocess_job, postprocess_swf  # noqa: E402
+from Modules.version import APP_VERSION  # noqa: E402
+
+SCHEMA_VERSION = 1
+ASSETS_DIR = ROOT_DIR / "assets"
+COMPILER = ASSETS_DIR / "compiler" / "mtasc.exe"
+
+FULL_MATRIX = {
+    'slots': [1, 8, 16, 32, MAX_TOTAL_SLOTS],
+    'db_sizes': [200, 2000, 10000, 40000],
+    'timers': [0, MAX_TIMERS_PER_PRESET, MAX_PRESETS * MAX_TIMERS_PER_PRESET],
+    'raid_minutes': [10, 180],
+}
+QUICK_MATRIX = {
+    'slots': [8, MAX_TOTAL_SLOTS],
+    'db_sizes': [200, 10000],
+    'timers': [MAX_PRESETS * MAX_TIMERS_PER_PRESET],
+    'raid_minutes': [10],
+}
+
+
+# ============================================================================
+# SYNTHETIC PROFILES
+# ============================================================================
+def make_database(size):
+    """Build a BuffDatabase with `size` IDs: every 4th entry stacks (4 IDs)."""
+    db = BuffDatabase()
+    buffs = []
+    next_id = 1000000
+    types = ("buff", "debuff", "misc")
+    i = 0
+    while next_id - 1000000 < size:
+        stacking = i % 4 == 0
+        count = 4 if stacking else 1
+        entry = {
+            'name': f"Synthetic Buff {i}",
+            'ids': list(range(next_id, next_id + count)),
+            'category': f"#Category{i % 12}",
+            'type': types[i % 3],
+        }
+        if stacking:
+            entry['stacking'] = True
+        buffs.append(entry)
+        next_id += count
+        i += 1
+    db.buffs = buffs
+    db._rebuild_indexes()
+    return db
+
+
+def make_grids(total_slots, database):
+    """Split `total_slots` across up to 8 grids; dynamic grids whitelist the whole database."""
+    all_ids = sorted(database.by_id)
+    grids = []
+    remaining = total_slots
+    n = 0
+    while remaining > 0:
+        cols = min(remaining, 8)
+        static = n % 2 == 1
+        grid = {
+            'id': f"Grid{n}", 'enabled': True,
+            'type': "player" if n % 2 == 0 else "target",
+            'rows': 1, 'cols': cols, 'iconSize': 56, 'gap': -1,
+            'x': 100, 'y': 100 + n * 60,
+            'slotMode': "static" if static else "dynamic",
+            'showTimers': True, 'timerFontSize': 18, 'timerFlashThreshold': 6,
+            'timerYOffset': 0, 'enableFlashing': True,
+            'fillDirection': "LR", 'sortOrder': "longest", 'layout': "buffFirst",
+            'whitelist': [] if static else list(all_ids),
+            'slotAssignments': {},
+        }
+        if static:
+            grid['slotAssignments'] = {
+                str(s): all_ids[s * 4:s * 4 + 4] for s in range(cols)}
+        grids.append(grid)
+        remaining -= cols
+        n += 1
+    return grids
+
+
+def make_timers(count):
+    """Build CooldownSettings with `count` timers spread across the presets."""
+    timers = []
+    for i in range(count):
+        kind = ("buff_add", "buff_remove", "cast_success")[i % 3]
+        timers.append(CooldownTimer(
+            id=f"t{i}", name=f"Timer {i}", trigger_type=kind,
+            trigger_source="player" if i % 2 == 0 else "target",
+            trigger_buff_id=None if kind == "cast_success" else 2000000 + i,
+            trigger_spell_name=f"Spell {i}" if kind == "cast_success" else None,
+            duration=10.0 + i))
+    presets = []
+    for p in range(MAX_PRESETS):
+        ids = [t.id for t in timers[p * MAX_TIMERS_PER_PRESET:(p + 1) * MAX_TIMERS_PER_PRESET]]
+        presets.append(CooldownPreset(f"P{p + 1}", ids))
+    return CooldownSettings(version=2, enabled=True, timers=timers, presets=presets)
+
+
+def make_stopwatch_presets():
+    """Maximum stopwatch configuration: every preset with the maximum phase count."""
+    presets = []
+    for p in range(3):
+        phases = [StopwatchPhase(name=f"Phase {i}", duration=5.0 + i)
+                  for i in range(MAX_PHASES_PER_PRESET)]
+        presets.append(StopwatchPreset(f"S{p}", "loop", "ascending", phases))
+    return StopwatchPresetSettings(version=1, presets=presets)
+
+
+def make_combat_log(minutes, lines_per_second=40):
+    """
+    Synthetic raid log: filler combat lines plus an Ethram-Fal seed cycle
+    (seed, fixation 4s later) every 39s, a double seed every 4th cycle and
+    a syphon every 5th.
+    """
+    lines = []
+    for second in range(minutes * 60):
+        stamp = f"[{(20 + second // 3600) % 24:02d}:{second // 60 % 60:02d}:{second % 60:02d}]"
+        for n in range(lines_per_second):
+            lines.append(f"{stamp} Player{n % 24} hits Ethram-Fal for {100 + n} crushing damage.")
+        cycle, offset = divmod(second, 39)
+        if offset == 0:
+            lines.append(f"{stamp} Ethram-Fal afflicts Player{cycle % 24} with Viscous Seed.")
+        elif offset == 4:
+            lines.append(f"{stamp} The Emerald Lotus afflicts Player{(cycle + 7) % 24} with Lotus Fixation.")
+        elif offset == 8 and cycle % 4 == 3:
+            lines.append(f"{stamp} Ethram-Fal afflicts Player{cycle % 24} with Viscous Seed.")
+        elif offset == 20 and cycle % 5 == 4:
+            lines.append(f"{stamp} Ethram-Fal's Syphon hits Player{cycle % 24} for 5000 nature damage.")
+    return lines
+
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+def measure(fn, repeat):
+    """Run fn `repeat` times. Returns (wall times, per-run stage dicts, last result)."""
+    walls = []
+    stages = []
+    result = None
+    for _ in range(repeat):
+        with record_build_stages() as timings:
+            start = time.perf_counter()
+            result = fn()
+            walls.append(time.perf_counter() - start)
+        stages.append(dict(timings))
+    return walls, stages, result
+
+
+def summarize(name, params, walls, stages, extra=None):
+    """Reduce raw timings to a result record (medians)."""
+    stage_names = sorted({k for s in stages for k in s})
+    record = {
+        'name': name,
+        'params': params,
+        'repeat': len(walls),
+        'median_s': statistics.median(walls),
+        'min_s': min(walls),
+        'stages': {k: statistics.median([s.get(k, 0.0) for s in stages]) for k in stage_names},
+    }
+    if extra:
+        record.update(extra)
+    return record
+
+
+def bench_generators(matrix, repeat):
+    """Time each code generator in isolation."""
+    records = []
+
+    for db_size in matrix['db_sizes']:
+        database = make_database(db_size)
+        for slots in matrix['slots']:
+            grids = make_grids(slots, database)
+            walls, stages, code = measure(
+                lambda: CodeGenerator(grids, database, APP_VERSION).generate(), repeat)
+            records.append(summarize("grids.generate", {'slots': slots, 'db_size': db_size},
+                                     walls, stages, {'output_bytes': len(code)}))
+
+    for count in matrix['timers']:
+        settings = make_timers(count)
+        walls, stages, code = measure(
+            lambda: generate_flash_timer_code(settings, assets_path=ASSETS_DIR), repeat)
+        records.append(summarize("timers.generate", {'timers': count}, walls, stages,
+                                 {'output_bytes': sum(len(c) for c in code)}))
+
+    walls, stages, code = measure(
+        lambda: generate_castbar_code(castbar_defaults(), assets_path=ASSETS_DIR), repeat)
+    records.append(summarize("castbars.generate", {}, walls, stages, {'output_bytes': len(code)}))
+
+    presets = make_stopwatch_presets()
+    walls, stages, code = measure(
+        lambda: generate_stopwatch_code(stopwatch_defaults(), assets_path=ASSETS_DIR,
+                                        preset_settings=presets), repeat)
+    records.append(summarize("stopwatch.generate", {}, walls, stages, {'output_bytes': len(code)}))
+
+    source = ASSETS_DIR / "damageinfo" / "src" / "__Packages"
+
+    def damageinfo_generate():
+        out = Path(tempfile.mkdtemp(prefix="bench_damageinfo_"))
+        try:
+            return DamageInfoGenerator(source, get_default_global_settings()).generate(out / "__Packages")
+        finally:
+            shutil.rmtree(out, ignore_errors=True)
+
+    walls, stages, _ = measure(damageinfo_generate, repeat)
+    records.append(summarize("damageinfo.generate", {}, walls, stages))
+
+    # In-memory render from the cached patch maps (what a live preview runs per slider move)
+    render_settings = dict(get_default_global_settings(), shadow_blur=2, text_scale=0.1)
+    walls, stages, patched = measure(
+        lambda: DamageInfoGenerator(source, render_settings).render(), repeat)
+    records.append(summarize("damageinfo.render", {}, walls, stages, {
+        'files_patched': len(patched),
+        'output_bytes': sum(len(c) for c in patched.values()),
+    }))
+
+    # Overlay mode as build_damageinfo uses it: fresh (settings changed) and reused
+    overlay_settings = dict(get_default_global_settings(), shadow_blur=2, text_scale=0.1)
+    overlay_root = Path(tempfile.mkdtemp(prefix="bench_damageinfo_overlay_"))
+    try:
+        def damageinfo_overlay():
+            shutil.rmtree(overlay_root, ignore_errors=True)
+            return prepare_overlay(DamageInfoGenerator(source, overlay_settings), overlay_root)
+
+        walls, stages, overlay = measure(damageinfo_overlay, repeat)
+        records.append(summarize("damageinfo.overlay", {'cached': False}, walls, stages, {
+            'files_written': sum(1 for p in overlay.rglob("*") if p.is_file()),
+        }))
+        walls, stages, _ = measure(
+            lambda: prepare_overlay(DamageInfoGenerator(source, overlay_settings), overlay_root), repeat)
+        records.append(summarize("damageinfo.overlay", {'cached': True}, walls, stages))
+    finally:
+        shutil.rmtree(overlay_root, ignore_errors=True)
+    return records
+
+
+# Filter-box inputs as typed in the Database / buff selector dialogs
+SEARCH_QUERIES = ["s", "syn", "synthetic buff 12", "1000", "100012", "no match"]
+
+
+def bench_database(matrix, repeat):
+    """Time BuffDatabase.search() for a burst of typical filter queries."""
+    records = []
+    for db_size in matrix['db_sizes']:
+        database = make_database(db_size)
+
+        def run_queries():
+            count = 0
+            for query in SEARCH_QUERIES:
+                count += len(database.search(query))
+                count += len(database.search(query, "#Category3", "debuff"))
+            return count
+
+        walls, stages, matches = measure(run_queries, repeat)
+        records.append(summarize("database.search", {'db_size': db_size}, walls, stages,
+                                 {'queries': len(SEARCH_QUERIES) * 2, 'matches': matches}))
+    return records
+
+
+def bench_replay(matrix, repeat):
+    """Time as-fast-as-possible replay of synthetic raid logs through the trigger pipeline."""
+    records = []
+    for minutes in matrix['raid_minutes']:
+        lines = make_combat_log(minutes)
+        walls, stages, result = measure(lambda: LogReplay(speed=None).run(lines), repeat)
+        records.append(summarize("replay.log", {'minutes': minutes}, walls, stages, {
+            'lines': result.lines,
+            'triggers': len(result.matches),
+            'overlay_pushes': result.pushes,
+            'display_changes': len(result.updates),
+            'lines_per_s': result.lines / statistics.median(walls),
+        }))
+    return records
+
+
+def bench_index(matrix, repeat):
+    """Time a full combat log index scan and an incremental update after the log grows."""
+    records = []
+    for minutes in matrix['raid_minutes']:
+        lines = make_combat_log(minutes)
+        half = len(lines) // 2
+        work = Path(tempfile.mkdtemp(prefix="bench_index_"))
+        try:
+            log = work / "logs" / "CombatLog-bench.txt"
+            log.parent.mkdir()
+            log.write_text("\n".join(lines) + "\n", encoding='utf-8')
+
+            def full_scan():
+                index = CombatLogIndex(log.parent, work / "index_full.json")
+                index.files = {}
+                return index.update()
+
+            walls, stages, stats = measure(full_scan, repeat)
+            records.append(summarize("index.scan", {'minutes': minutes}, walls, stages, {
+                'bytes': stats['bytes'],
+                'mb_per_s': stats['bytes'] / statistics.median(walls) / 1e6,
+            }))
+
+            def grow():
+                log.write_text("\n".join(lines[:half]) + "\n", encoding='utf-8')
+                index = CombatLogIndex(log.parent, work / "index_grow.json")
+                index.update()
+                with open(log, 'a', encoding='utf-8') as f:
+                    f.write("\n".join(lines[half:]) + "\n")
+                with record_build_stages() as timings:
+                    start = time.perf_counter()
+                    stats = index.update()
+                    timings['update'] = time.perf_counter() - start
+                return stats, timings['update'], len(index.pulls())
+
+            stats, update_s, pulls = grow()
+            records.append(summarize("index.update", {'minutes': minutes}, [update_s], [{}], {
+                'bytes': stats['bytes'],
+                'pulls': pulls,
+            }))
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+    return records
+
+
+def bench_swf(repeat):
+    """Time SWF post-processing (strip + recompress) over every bundled base SWF."""
+    sources = sorted(ASSETS_DIR.glob("*/*.swf"))
+    work = Path(tempfile.mkdtemp(prefix="bench_swf_"))
+    try:
+        def run():
+            reports = []
+            for n, src in enumerate(sources):
+                dest = work / f"{n}_{src.name}"
+                shutil.copyfile(src, dest)
+                reports.append(postprocess_swf(dest))
+            return reports
+
+        walls, stages, reports = measure(run, repeat)
+        return [summarize("swf.postprocess", {'files': len(sources)}, walls, stages, {
+            'bytes_before': sum(r.size_before for r in reports),
+            'bytes_after': sum(r.size_after for r in reports),
+        })]
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def bench_pipeline(matrix, repeat):
+    """Time the headless equivalent of KzBuilder._execute_builds (all five modules)."""
+    records = []
+    db_size = max(matrix['db_sizes'])
+    slots = max(matrix['slots'])
+    timer_count = max(matrix['timers'])
+
+    database = make_database(db_size)
+    grids = make_grids(slots, database)
+    timers = make_timers(timer_count)
+    stopwatch = make_stopwatch_presets()
+
+    def run_pipeline():
+        work = Path(tempfile.mkdtemp(prefix="bench_pipeline_"))
+        staging = work / "staging"
+        flash = work / "Flash"
+        module_stages = {}
+
+        def staged(name, job):
+            def run():
+                with record_build_stages() as timings:
+                    result = job()
+                module_stages[name] = dict(timings)
+                return result
+            return run
+
+        try:
+            jobs = {
+                "KzGrids": lambda d: build_grids(
+                    grids, database, str(ASSETS_DIR / "kzgrids" / "base.swf"),
+                    str(ASSETS_DIR / "kzgrids" / "stubs"), str(d / "KzGrids.swf"),
+                    str(COMPILER), APP_VERSION),
+                "DamageInfo": lambda d: build_damageinfo(
+                    str(ASSETS_DIR / "damageinfo" / "src" / "__Packages"),
+                    str(ASSETS_DIR / "damageinfo" / "DamageInfo_backup.swf"),
+                    str(d / "DamageInfo.swf"), get_default_global_settings(), str(COMPILER)),
+                "KzCastbars": lambda d: build_castbars(
+                    str(ASSETS_DIR / "castbars"), str(d / "KzCastbars.swf"),
+                    castbar_defaults(), str(COMPILER)),
+                "KzTimers": lambda d: build_flash_timer(
+                    str(ASSETS_DIR / "flash_timer"), str(d / "KzTimers.swf"), timers, str(COMPILER)),
+                "KzStopwatch": lambda d: build_stopwatch(
+                    str(ASSETS_DIR / "flash_stopwatch"), str(d / "KzStopwatch.swf"),
+                    stopwatch_defaults(), str(COMPILER), preset_settings=stopwatch),
+            }
+            scheduler = BuildScheduler()
+            for name, make_job in jobs.items():
+                module_dir = staging / name
+                module_dir.mkdir(parents=True)
+                job = postprocess_job(lambda d=module_dir, m=make_job: m(d), module_dir)
+                scheduler.add_job(name, staged(name, job))
+            results = scheduler.run()
+            failed = {n: msg for n, (ok, msg) in results.items() if not ok}
+            if failed:
+                raise RuntimeError(f"Pipeline build failed: {failed}")
+
+            start = time.perf_counter()
+            flash.mkdir(parents=True)
+            for swf in staging.glob("*/*.swf"):
+                shutil.copy2(swf, flash / swf.name)
+            module_stages["install"] = {'install': time.perf_counter() - start}
+            return module_stages
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+
+    walls = []
+    per_run = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        per_run.append(run_pipeline())
+        walls.append(time.perf_counter() - start)
+
+    # Flatten to "<Module>.<stage>" so one record carries the whole breakdown
+    flat = [{f"{mod}.{stage}": t for mod, st in run.items() for stage, t in st.items()}
+            for run in per_run]
+    records.append(summarize("pipeline.build_all",
+                             {'slots': slots, 'db_size': db_size, 'timers': timer_count},
+                             walls, flat))
+    return records
+
+
+# ============================================================================
+# ENTRY POINT
+# ============================================================================
+def print_table(records):
+    """Print a human-readable summary."""
+    for r in records:
+        params = ", ".join(f"{k}={v}" for k, v in r['params'].items())
+        print(f"{r['name']:<22} {params:<40} median {r['median_s'] * 1000:9.2f} ms"
+              f"   min {r['min_s'] * 1000:9.2f} ms")
+        for stage, t in r['stages'].items():
+            print(f"    {stage:<34} {t * 1000:9.2f} ms")
+
+
+def main(argv=None):
+    """Run the benchmark matrix and report results."""
+    parser = argparse.ArgumentParser(description="Kaz Flash Modz build benchmarks")
+    parser.add_argument("--quick", action="store_true", help="run the small matrix")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement (default 5)")
+    parser.add_argument("--json", metavar="PATH", help="write machine-readable results to PATH")
+    args = parser.parse_args(argv)
+
+
+    # Synthetic profiles are deliberately oversized; keep the KzGrids
+    # bytecode budget warnings out of the timing table
+    logging.basicConfig(level=logging.ERROR)
+
+    matrix = QUICK_MATRIX if args.quick else FULL_MATRIX
+    set_build_cache(None)
+    set_compiler_backend(StubBackend())
+    try:
+        records = (bench_generators(matrix, args.repeat) + bench_database(matrix, args.repeat)
+                   + bench_pipeline(matrix, args.repeat) + bench_replay(matrix, args.repeat)
+                   + bench_index(matrix, args.repeat) + bench_swf(args.repeat))
+    finally:
+        set_compiler_backend(None)
+
+    print_table(records)
+
+    if args.json:
+        report = {
+            'schema': SCHEMA_VERSION,
+            'app_version': APP_VERSION,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'matrix': 'quick' if args.quick else 'full',
+            'results': records,
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,10 +13,11 @@ import sys
 from pathlib import Path
 from datetime import datetime
 
+from Modules.version import APP_VERSION as VERSION
+
 # Configuration
 APP_NAME = "Kaz Flash Modz"
 MAIN_SCRIPT = "kzbuilder.py"
-VERSION = "3.3.7"
 
 # Directories
 ROOT_DIR = Path(__file__).parent
@@ -34,6 +35,7 @@ ASSETS_TO_COPY = [
     "castbars",
     "flash_timer",
     "flash_stopwatch",
+    "encounters",
 ]
 
 # Profile to include
@@ -81,12 +83,18 @@ def build_executable():
         "--specpath", str(ROOT_DIR),
         "--hidden-import", "Modules",
         "--hidden-import", "Modules.as2_template",
+        "--hidden-import", "Modules.as2_budget",
         "--hidden-import", "Modules.database_editor",
+        "--hidden-import", "Modules.buff_database",
         "--hidden-import", "Modules.damageinfo_tab",
         "--hidden-import", "Modules.damageinfo_generator",
         "--hidden-import", "Modules.damageinfo_settings",
         "--hidden-import", "Modules.damageinfo_xml",
         "--hidden-import", "Modules.build_utils",
+        "--hidden-import", "Modules.build_scheduler",
+        "--hidden-import", "Modules.build_cache",
+        "--hidden-import", "Modules.build_manifest",
+        "--hidden-import", "Modules.compiler_backend",
         "--hidden-import", "Modules.grids_tab",
         "--hidden-import", "Modules.grids_generator",
         "--hidden-import", "Modules.castbar_tab",
@@ -102,6 +110,17 @@ def build_executable():
         "--hidden-import", "Modules.boss_timer",
         "--hidden-import", "Modules.timer_overlay",
         "--hidden-import", "Modules.combat_monitor",
+        "--hidden-import", "Modules.encounters",
+        "--hidden-import", "Modules.clock",
+        "--hidden-import", "Modules.log_replay",
+        "--hidden-import", "Modules.tracker_scheduler",
+        "--hidden-import", "Modules.log_index",
+        "--hidden-import", "Modules.swf_postprocess",
+        "--hidden-import", "Modules.template_engine",
+        "--hidden-import", "Modules.version",
+        "--hidden-import", "Modules.log_reader",
+        "--hidden-import", "Modules.log_triggers",
+        "--hidden-import", "Modules.log_watcher",
         "--hidden-import", "Modules.live_tracker_tab",
         "--hidden-import", "Modules.stopwatch_settings",
         "--hidden-import", "Modules.stopwatch_tab",
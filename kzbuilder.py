@@ -9,6 +9,8 @@ import ttkbootstrap as ttb
 import tkinter as tk
 from tkinter import ttk, filedialog
 from ttkbootstrap.dialogs import Messagebox
+import copy
+import functools
 import json
 import sys
 import shutil
@@ -41,8 +43,17 @@ from Modules.stopwatch_generator import build_stopwatch
 
 # Import Grids modules
 from Modules.grids_tab import GridsTab, MAX_TOTAL_SLOTS
-from Modules.grids_generator import build_grids
-from Modules.build_utils import find_compiler, strip_marker_block, update_script_with_marker
+from Modules.grids_generator import build_grids, grid_buff_ids
+from Modules.build_utils import (
+    find_compiler, strip_marker_block, update_script_with_marker, set_build_cache, compile_session,
+)
+from Modules.build_cache import BuildCache
+from Modules.build_manifest import (
+    compute_fingerprint, load_manifest, save_manifest, manifest_entry, is_up_to_date,
+)
+from Modules.build_scheduler import BuildScheduler, failed_job
+from Modules.swf_postprocess import postprocess_job
+from Modules.version import APP_VERSION
 from Modules.ui_helpers import (
     init_settings, disable_mousewheel_on_inputs, setup_custom_styles,
     restore_window_position, bind_window_position_save,
@@ -53,7 +64,6 @@ from Modules.ui_helpers import (
 )
 
 APP_NAME = "Kaz Flash Modz"
-APP_VERSION = "3.3.7"
 SETTINGS_FILE = "kzbuilder_settings.json"
 PROFILES_DIR = "profiles"
 
@@ -124,9 +134,12 @@ class KzBuilder(ttb.Window):
         self.assets_path = self.app_path / "assets"
         self.assets_path.mkdir(exist_ok=True)
         self._compiler_path = None
+        self._building = False
 
         self.settings = SettingsManager(self.settings_path / SETTINGS_FILE)
         init_settings(self.settings)
+        self.build_cache = BuildCache(self.settings_path / "build_cache")
+        set_build_cache(self.build_cache)
         setup_custom_styles(self)
         disable_mousewheel_on_inputs(self)
 
@@ -311,13 +324,31 @@ class KzBuilder(ttb.Window):
         self._restore_textcolors_cb.pack(side='left')
         add_tooltip(self._restore_textcolors_cb, "Restore TextColors.xml when DamageInfo is disabled")
 
+        # Build cache info
+        cache_row = ttk.Frame(bottom_frame)
+        cache_row.pack(fill='x', pady=(5, 0))
+        self._cache_label = ttk.Label(cache_row, font=FONT_SMALL, foreground=THEME_COLORS['muted'])
+        self._cache_label.pack(side='left')
+        clear_cache_btn = ttk.Button(cache_row, text="Clear Cache", command=self._clear_build_cache,
+                                     width=BTN_MEDIUM)
+        clear_cache_btn.pack(side='right')
+        add_tooltip(clear_cache_btn, "Delete cached SWFs — the next build recompiles every module")
+        self._refresh_cache_info()
+
         # Build All button
         build_row = ttk.Frame(bottom_frame)
         build_row.pack(fill='x', pady=(5, 0))
-        build_btn = ttk.Button(build_row, text="Build & Install All",
+        build_btns = ttk.Frame(build_row)
+        build_btns.pack()
+        build_btn = ttk.Button(build_btns, text="Build & Install All",
                                command=self.build)
-        build_btn.pack()
+        build_btn.pack(side='left', padx=(0, 5))
         add_tooltip(build_btn, "Compile all enabled modules and install SWFs to your AoC game directory")
+        changed_btn = ttk.Button(build_btns, text="Build Changed",
+                                 command=lambda: self.build(changed_only=True))
+        changed_btn.pack(side='left')
+        add_tooltip(changed_btn, "Rebuild and reinstall only the modules whose settings or assets "
+                                 "changed since they were last installed")
 
         ttk.Label(bottom_frame,
                   text="After building:  /reloadui  >  /reloadgrids   |   Preview: Ctrl+Shift+Alt",
@@ -401,6 +432,27 @@ class KzBuilder(ttb.Window):
         self.build_damageinfo_var.trace_add('write', self._update_restore_options)
         self._update_restore_options()
 
+    def _refresh_cache_info(self):
+        """Update the Welcome tab build cache summary."""
+        stats = self.build_cache.stats()
+        used_mb = stats['bytes'] / (1024 * 1024)
+        cap_mb = stats['max_bytes'] / (1024 * 1024)
+        text = f"Build cache: {stats['entries']} SWFs, {used_mb:.1f} / {cap_mb:.0f} MB"
+        if stats['hits'] or stats['misses']:
+            text += f"  (this session: {stats['hits']} reused, {stats['misses']} compiled)"
+        self._cache_label.configure(text=text)
+
+    def _clear_build_cache(self):
+        """Delete all cached SWFs after confirmation."""
+        if self._building:
+            return
+        if Messagebox.yesno("Clear the build cache?\n\nThe next build will recompile every module.",
+                            title="Clear Build Cache") != "Yes":
+            return
+        removed = self.build_cache.clear()
+        self._refresh_cache_info()
+        self.status_var.set(f"Build cache cleared ({removed} SWFs removed)")
+
     def _update_restore_options(self, *args):
         """Update restore option availability based on module checkboxes."""
         if not hasattr(self, '_restore_castbar_cb'):
@@ -798,16 +850,26 @@ class KzBuilder(ttb.Window):
             self.settings.set('game_path', path)
             self.settings.save()
 
-    def build(self):
-        """Orchestrate the full build pipeline."""
+    def build(self, changed_only=False):
+        """Orchestrate the full build pipeline.
+
+        Args:
+            changed_only: Skip enabled modules whose fingerprint matches the
+                install manifest in the game's Flash folder
+        """
+        # The UI stays live while modules compile — ignore repeat clicks
+        if self._building:
+            return
+
         game_path = self._validate_build_prerequisites()
         if not game_path:
             return
 
-        config = self._get_build_configuration(game_path)
+        config = self._get_build_configuration(game_path, changed_only=changed_only)
         if not config:
             return
 
+        self._building = True
         try:
             result = self._execute_builds(game_path, config)
             if result is not None:
@@ -820,6 +882,9 @@ class KzBuilder(ttb.Window):
                 f"({type(e).__name__}: {e})",
                 title="Build Error")
             self.status_var.set("Build failed")
+        finally:
+            self._building = False
+            self._refresh_cache_info()
 
     def _validate_build_prerequisites(self):
         """Validate game path and directory structure. Returns normalized path or None."""
@@ -850,7 +915,7 @@ class KzBuilder(ttb.Window):
         self._compiler_path = compiler
         return game_path
 
-    def _get_build_configuration(self, game_path):
+    def _get_build_configuration(self, game_path, changed_only=False):
         """Determine which modules to build and validate. Returns config dict or None."""
         grids = self.grids_tab.get_profile_data()
         has_grids = len(grids) > 0 and self.build_grids_var.get()
@@ -867,7 +932,26 @@ class KzBuilder(ttb.Window):
 
         flash_path = Path(game_path) / "Data" / "Gui" / "Default" / "Flash"
         scripts_path = Path(game_path) / "Scripts"
-        total_steps = sum([has_grids, build_damageinfo, build_castbars, build_timers, build_stopwatch]) + 1  # +1 for install
+
+        enabled = {
+            "KzGrids": has_grids, "DamageInfo": build_damageinfo, "KzCastbars": build_castbars,
+            "KzTimers": build_timers, "KzStopwatch": build_stopwatch,
+        }
+        fingerprints = self._module_fingerprints(
+            [name for name, on in enabled.items() if on], grids)
+
+        skipped = []
+        if changed_only:
+            manifest = load_manifest(flash_path)
+            skipped = [name for name, fp in fingerprints.items()
+                       if is_up_to_date(manifest, flash_path, name, fp)]
+            if len(skipped) == len(fingerprints):
+                Messagebox.show_info("All enabled mods are already up to date.\n\n"
+                                     "Nothing was rebuilt.", title="Build Changed")
+                self.status_var.set("Everything up to date")
+                return None
+
+        total_steps = len(fingerprints) - len(skipped) + 1  # +1 for install
 
         return {
             'grids': grids, 'has_grids': has_grids,
@@ -877,8 +961,41 @@ class KzBuilder(ttb.Window):
             'restore_textcolors_xml': self.restore_textcolors_var.get(),
             'flash_path': flash_path, 'scripts_path': scripts_path,
             'total_steps': total_steps,
+            'fingerprints': fingerprints, 'skipped': skipped,
         }
 
+    def _module_fingerprints(self, modules, grids):
+        """Compute change fingerprints for the given modules. Returns {name: digest}."""
+        assets = self.assets_path
+        common_stubs = assets / "common_stubs"
+        compiler = self._compiler_path
+
+        fingerprints = {}
+        for name in modules:
+            if name == "KzGrids":
+                # Generated code also depends on database type/stack info for tracked IDs
+                db_info = [(bid, self.database.get_type(bid), self.database.get_stack_level(bid))
+                           for bid in sorted(grid_buff_ids(grids))]
+                data = {'grids': grids, 'database': db_info,
+                        'lookup_encoding': self.grids_tab.get_lookup_encoding()}
+                paths = [assets / "kzgrids" / "base.swf", assets / "kzgrids" / "stubs"]
+            elif name == "DamageInfo":
+                data = self.damageinfo_tab.get_profile_data()
+                paths = [assets / "damageinfo"]
+            elif name == "KzCastbars":
+                data = self.castbar_tab.get_profile_data()
+                paths = [assets / "castbars" / "base.swf", assets / "castbars" / "stubs",
+                         assets / "castbars" / "KzCastbars.as.template"]
+            elif name == "KzTimers":
+                data = self.timers_tab.get_profile_data()
+                paths = [assets / "flash_timer"]
+            else:
+                data = self.stopwatch_tab.get_profile_data()
+                paths = [assets / "flash_stopwatch"]
+            fingerprints[name] = compute_fingerprint(
+                data, paths + [common_stubs, compiler], APP_VERSION)
+        return fingerprints
+
     def _execute_builds(self, game_path, config):
         """Run all enabled module builds. Returns (results, cleaned) or None on fatal failure.
 
@@ -890,34 +1007,16 @@ class KzBuilder(ttb.Window):
         scripts_path = config['scripts_path']
         has_grids = config['has_grids']
         total_steps = config['total_steps']
-        current_step = 0
 
         staging_dir = Path(tempfile.mkdtemp(prefix="kzbuilder_"))
         try:
-            # Phase 1: Compile all enabled modules to staging directory
-            results = {}
-
-            if has_grids:
-                current_step += 1
-                self.status_var.set(f"Step {current_step}/{total_steps}: Building KzGrids...")
-                self.update()
-
-                compiler = self._compiler_path
-                base_swf = self.assets_path / "kzgrids" / "base.swf"
-                if not base_swf.exists():
-                    base_swf = self.assets_path / "base.swf"
-                stubs = self.assets_path / "kzgrids" / "stubs"
-                if not stubs.exists():
-                    stubs = self.assets_path / "stubs"
-                output_swf = staging_dir / "KzGrids.swf"
-
-                kg_success, kg_message = build_grids(
-                    config['grids'], self.database, str(base_swf), str(stubs),
-                    str(output_swf), str(compiler), APP_VERSION
-                )
-                results["KzGrids"] = (kg_success, kg_message)
+            # Phase 1: Compile all enabled modules in parallel, each into its
+            # own staging subdirectory. Inputs are collected here on the Tk
+            # thread; the jobs themselves never touch widgets.
+            scheduler = BuildScheduler()
 
             modules = [
+                ("KzGrids", has_grids, self._compile_grids),
                 ("DamageInfo", config['build_damageinfo'], self._compile_damageinfo),
                 ("KzCastbars", config['build_castbars'], self._compile_castbars),
                 ("KzTimers", config['build_timers'], self._compile_timers),
@@ -925,13 +1024,30 @@ class KzBuilder(ttb.Window):
             ]
 
             for name, enabled, compile_fn in modules:
-                if not enabled:
+                if not enabled or name in config['skipped']:
                     continue
-                current_step += 1
-                self.status_var.set(f"Step {current_step}/{total_steps}: Building {name}...")
-                self.update()
-                success, message = compile_fn(staging_dir)
-                results[name] = (success, message)
+                module_dir = staging_dir / name
+                module_dir.mkdir()
+                # Strip and recompress each SWF in staging before install
+                scheduler.add_job(name, postprocess_job(compile_fn(module_dir), module_dir))
+
+            running = set()
+
+            def on_progress(name, state, done, total):
+                """Stream per-module progress to the status bar."""
+                if state == "started":
+                    running.add(name)
+                else:
+                    running.discard(name)
+                what = ", ".join(sorted(running)) if running else "finishing"
+                self.status_var.set(
+                    f"Step {done}/{total_steps}: Building {what}...")
+
+            self.status_var.set(f"Step 0/{total_steps}: Building {len(scheduler)} modules...")
+            self.update()
+            with compile_session():
+                results = scheduler.run(on_progress=on_progress, pump=self.update)
+            current_step = len(results)
 
             # Check for any compilation failures — abort without touching game directory
             failures = {n: msg for n, (s, msg) in results.items() if not s}
@@ -963,17 +1079,17 @@ class KzBuilder(ttb.Window):
             cleaned = self._cleanup_disabled_modules(game_path, config)
 
             # Copy compiled SWFs from staging to game directory
-            for swf_file in staging_dir.glob("*.swf"):
+            for swf_file in staging_dir.glob("*/*.swf"):
                 shutil.copy2(swf_file, flash_path / swf_file.name)
 
             # Module-specific side effects (XML overrides, scripts)
-            if config['build_damageinfo']:
+            if "DamageInfo" in results:
                 di_ok, di_msg = self._install_damageinfo(game_path)
                 if not di_ok:
                     results["DamageInfo"] = (False,
                         f"The mod was installed, but custom text colors could not be applied.\n({di_msg})")
 
-            if config['build_castbars']:
+            if "KzCastbars" in results:
                 cb_ok, cb_msg = self._install_castbars(game_path)
                 if not cb_ok:
                     results["KzCastbars"] = (False,
@@ -985,10 +1101,26 @@ class KzBuilder(ttb.Window):
                                  build_timers=config['build_timers'],
                                  build_stopwatch=config['build_stopwatch'])
 
+            self._update_manifest(config, results)
+
             return results, cleaned
         finally:
             shutil.rmtree(staging_dir, ignore_errors=True)
 
+    def _update_manifest(self, config, results):
+        """Record fingerprints of freshly installed modules; drop disabled ones."""
+        flash_path = config['flash_path']
+        fingerprints = config['fingerprints']
+        manifest = {name: entry for name, entry in load_manifest(flash_path).items()
+                    if name in fingerprints}
+        for name, (success, _) in results.items():
+            if success:
+                manifest[name] = manifest_entry(flash_path, name, fingerprints[name])
+            else:
+                # Side effect failed — force a rebuild next time
+                manifest.pop(name, None)
+        save_manifest(flash_path, manifest)
+
     def _display_build_summary(self, game_path, config, results, cleaned):
         """Show build completion summary."""
         has_results = len(results) > 0
@@ -1015,8 +1147,13 @@ class KzBuilder(ttb.Window):
         for name, (success, message) in results.items():
             if success:
                 summary += f"  {name} — Updated\n"
+                # Extra lines carry build notes (e.g. KzGrids bytecode estimate)
+                for note in message.splitlines()[1:]:
+                    summary += f"      {note}\n"
             else:
                 summary += f"  {name} — Warning: {message}\n"
+        for name in config['skipped']:
+            summary += f"  {name} — Unchanged (skipped)\n"
 
         # Disabled module cleanup
         if cleaned:
@@ -1152,10 +1289,30 @@ class KzBuilder(ttb.Window):
 
         return cleaned
 
+    def _compile_grids(self, staging_dir):
+        """Collect KzGrids inputs and return a job that builds KzGrids.swf into staging_dir."""
+        grids = copy.deepcopy(self.grids_tab.get_profile_data())
+        # The Database Editor stays usable while the job runs on a worker
+        # thread, so the job reads a copy of the entries it needs
+        database = self.database.snapshot(grid_buff_ids(grids))
+
+        base_swf = self.assets_path / "kzgrids" / "base.swf"
+        if not base_swf.exists():
+            base_swf = self.assets_path / "base.swf"
+        stubs = self.assets_path / "kzgrids" / "stubs"
+        if not stubs.exists():
+            stubs = self.assets_path / "stubs"
+        output_swf = staging_dir / "KzGrids.swf"
+
+        return functools.partial(
+            build_grids, grids, database, str(base_swf), str(stubs),
+            str(output_swf), str(self._compiler_path), APP_VERSION,
+            lookup_encoding=self.grids_tab.get_lookup_encoding())
+
     def _compile_damageinfo(self, staging_dir):
-        """Compile DamageInfo.swf to staging directory."""
+        """Collect DamageInfo inputs and return a job that builds DamageInfo.swf into staging_dir."""
         self.damageinfo_tab.save_settings()
-        global_settings = self.damageinfo_tab.get_global_settings()
+        global_settings = copy.deepcopy(self.damageinfo_tab.get_global_settings())
 
         damageinfo_path = self.assets_path / "damageinfo"
         source_path = damageinfo_path / "src" / "__Packages"
@@ -1166,17 +1323,16 @@ class KzBuilder(ttb.Window):
         compiler = self._compiler_path
 
         if not source_path.exists():
-            return False, f"DamageInfo sources not found:\n{source_path}"
+            return failed_job(f"DamageInfo sources not found:\n{source_path}")
         if not backup_swf.exists():
-            return False, f"DamageInfo_backup.swf not found:\n{backup_swf}"
+            return failed_job(f"DamageInfo_backup.swf not found:\n{backup_swf}")
         if not compiler or not compiler.exists():
-            return False, "MTASC compiler not found"
+            return failed_job("MTASC compiler not found")
 
         output_swf = staging_dir / "DamageInfo.swf"
-        return build_damageinfo(
-            str(source_path), str(backup_swf), str(output_swf),
-            global_settings, str(compiler)
-        )
+        return functools.partial(
+            build_damageinfo, str(source_path), str(backup_swf), str(output_swf),
+            global_settings, str(compiler))
 
     def _install_damageinfo(self, game_path):
         """Install DamageInfo side effects (TextColors.xml)."""
@@ -1197,22 +1353,22 @@ class KzBuilder(ttb.Window):
         return True, str(output_xml)
 
     def _compile_castbars(self, staging_dir):
-        """Compile KzCastbars.swf to staging directory."""
+        """Collect castbar inputs and return a job that builds KzCastbars.swf into staging_dir."""
         self.castbar_tab.save_settings()
-        settings = self.castbar_tab.get_profile_data()
+        settings = copy.deepcopy(self.castbar_tab.get_profile_data())
 
         castbars_path = self.assets_path / "castbars"
         compiler = self._compiler_path
 
         if not castbars_path.exists():
-            return False, f"Castbars assets not found:\n{castbars_path}"
+            return failed_job(f"Castbars assets not found:\n{castbars_path}")
         if not (castbars_path / "base.swf").exists():
-            return False, f"Castbar base.swf not found:\n{castbars_path / 'base.swf'}"
+            return failed_job(f"Castbar base.swf not found:\n{castbars_path / 'base.swf'}")
         if not compiler or not compiler.exists():
-            return False, "MTASC compiler not found"
+            return failed_job("MTASC compiler not found")
 
         output_swf = staging_dir / "KzCastbars.swf"
-        return build_castbars(str(castbars_path), str(output_swf), settings, str(compiler))
+        return functools.partial(build_castbars, str(castbars_path), str(output_swf), settings, str(compiler))
 
     def _install_castbars(self, game_path):
         """Install castbar side effects (XML hiding, auto_login script)."""
@@ -1235,39 +1391,39 @@ class KzBuilder(ttb.Window):
         return True, ""
 
     def _compile_timers(self, staging_dir):
-        """Compile KzTimers.swf to staging directory."""
-        settings = self.timers_tab.timer_editor.get_settings()
-        appearance = self.timers_tab.appearance_settings
+        """Collect timer inputs and return a job that builds KzTimers.swf into staging_dir."""
+        settings = copy.deepcopy(self.timers_tab.timer_editor.get_settings())
+        appearance = copy.deepcopy(self.timers_tab.appearance_settings)
 
         flash_timer_path = self.assets_path / "flash_timer"
         compiler = self._compiler_path
 
         base_swf = flash_timer_path / "base.swf"
         if not base_swf.exists():
-            return False, f"KzTimers base.swf not found:\n{base_swf}\nSee assets/flash_timer/README.md"
+            return failed_job(f"KzTimers base.swf not found:\n{base_swf}\nSee assets/flash_timer/README.md")
         if not compiler or not compiler.exists():
-            return False, "MTASC compiler not found"
+            return failed_job("MTASC compiler not found")
 
         output_swf = staging_dir / "KzTimers.swf"
         from Modules.timers_generator import build_flash_timer
-        return build_flash_timer(str(flash_timer_path), str(output_swf), settings, str(compiler),
-                                 appearance=appearance)
+        return functools.partial(build_flash_timer, str(flash_timer_path), str(output_swf), settings,
+                                 str(compiler), appearance=appearance)
 
     def _compile_stopwatch(self, staging_dir):
-        """Compile KzStopwatch.swf to staging directory."""
+        """Collect stopwatch inputs and return a job that builds KzStopwatch.swf into staging_dir."""
         self.stopwatch_tab.save_settings()
-        settings = self.stopwatch_tab.stopwatch_settings
-        preset_settings = self.stopwatch_tab.get_preset_settings()
+        settings = copy.deepcopy(self.stopwatch_tab.stopwatch_settings)
+        preset_settings = copy.deepcopy(self.stopwatch_tab.get_preset_settings())
 
         flash_stopwatch_path = self.assets_path / "flash_stopwatch"
         compiler = self._compiler_path
 
         if not compiler or not compiler.exists():
-            return False, "MTASC compiler not found"
+            return failed_job("MTASC compiler not found")
 
         output_swf = staging_dir / "KzStopwatch.swf"
-        return build_stopwatch(str(flash_stopwatch_path), str(output_swf), settings, str(compiler),
-                               preset_settings=preset_settings)
+        return functools.partial(build_stopwatch, str(flash_stopwatch_path), str(output_swf), settings,
+                                 str(compiler), preset_settings=preset_settings)
 
     def on_close(self):
         """Handle window close by prompting to save unsaved changes and cleaning up."""
@@ -0,0 +1,50 @@
+"""Regression tests for combat log trigger matching (Modules/log_triggers.py)."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from Modules.encounters import load_encounters  # noqa: E402
+from Modules.log_triggers import YOU, Trigger, TriggerEngine  # noqa: E402
+
+NAMES = ["Ædric", "élise", "Ørjan", "xXSlayerXx", "Ethram-Fal", "O'Neill", "Two Words"]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    encounter = next(e for e in load_encounters() if e.id == "ethram-fal")
+    return TriggerEngine(encounter.triggers)
+
+
+@pytest.mark.parametrize("name", NAMES)
+def test_seed_target_any_name(engine, name):
+    match = engine.match(f"[20:01:02] Ethram-Fal afflicts {name} with Viscous Seed.")
+    assert match is not None
+    assert (match.event, match.target) == ("seed", name)
+
+
+@pytest.mark.parametrize("name", NAMES)
+def test_fixation_target_any_name(engine, name):
+    match = engine.match(f"[20:01:06] The Emerald Lotus afflicts {name} with Lotus Fixation.")
+    assert match is not None
+    assert (match.event, match.target) == ("fixation", name)
+
+
+def test_local_player(engine):
+    match = engine.match("[20:01:02] Ethram-Fal afflicts you with Viscous Seed.")
+    assert match.target == YOU
+
+
+def test_unrelated_line(engine):
+    assert engine.match("[20:01:02] Ædric hits Ethram-Fal for 120 crushing damage.") is None
+
+
+@pytest.mark.parametrize("name", ["Ædric", "élise", "Ørjan"])
+def test_unbounded_placeholders(name):
+    engine = TriggerEngine([Trigger("{actor} begins casting", "cast"),
+                            Trigger("Lotus Bloom engulfs {target}", "bloom")])
+    assert engine.match(f"[20:01:02] {name} begins casting").actor == name
+    assert engine.match(f"[20:01:02] Lotus Bloom engulfs {name}").target == name